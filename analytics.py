@@ -0,0 +1,179 @@
+# analytics.py
+"""
+Practice analytics served from time-bucketed rollups.
+
+`practice_rollups` holds, per user, session type and day (and per ISO week),
+the number of sessions, total practice time and the sum of accuracy scores.
+A finished session is added to its day and week buckets when it is
+finalised (`tasks.finalise_session`), in the same transaction that marks it
+finalised, so each session is counted exactly once. Sessions are bucketed by
+the UTC day they started.
+
+An analytics request then reads at most one row per bucket and session type
+from the rollup's primary key, however many sessions the user has. Sessions
+written in bulk outside the API (seeding, imports) are folded in with
+`rebuild`, which also covers archived sessions (see `archive.py`).
+"""
+from datetime import date, timedelta
+from enum import Enum
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Date, delete, func, insert, select, type_coerce
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import archive
+from models import PracticeRollup, PracticeSession
+
+MAX_BUCKETS = 366
+# Additive rollup columns, in this order wherever they travel as a tuple
+SUMMED = ("sessions", "practice_seconds", "scored_sessions", "accuracy_sum")
+
+
+class Granularity(str, Enum):
+    day = "day"
+    week = "week"
+
+
+def bucket_start(granularity: Granularity, day: date) -> date:
+    if granularity is Granularity.week:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _increments(user_id: int, session_type: str, day: date, values: tuple) -> List[dict]:
+    """Rollup rows adding `values` (see SUMMED) to `day`'s day and week buckets."""
+    return [
+        {
+            "user_id": user_id,
+            "granularity": granularity.value,
+            "bucket_start": bucket_start(granularity, day),
+            "session_type": session_type,
+            **dict(zip(SUMMED, values)),
+        }
+        for granularity in Granularity
+    ]
+
+
+def record_session(db: Session, session: PracticeSession):
+    """Add a finished session to its day and week buckets. Doesn't commit."""
+    accuracy = session.accuracy_score
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}[db.get_bind().dialect.name]
+    statement = dialect.insert(PracticeRollup)
+    db.connection().execute(
+        statement.on_conflict_do_update(
+            index_elements=["user_id", "granularity", "bucket_start", "session_type"],
+            set_={
+                column: getattr(PracticeRollup, column) + getattr(statement.excluded, column)
+                for column in SUMMED
+            },
+        ),
+        _increments(
+            session.user_id,
+            session.session_type,
+            session.start_time.date(),
+            (1, session.duration or 0, 0 if accuracy is None else 1, accuracy or 0.0),
+        ),
+    )
+
+
+def rebuild(connection, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute rollups from the finalised sessions, live and archived (all
+    users, or just `user_ids`).
+
+    Day buckets are aggregated in SQL; week buckets are summed from those.
+    Returns the number of rollup rows written.
+    """
+    sessions = archive.summaries()
+    day = type_coerce(func.date(sessions.c.start_time), Date)
+    statement = (
+        select(
+            sessions.c.user_id,
+            sessions.c.session_type,
+            day,
+            func.count(),
+            func.coalesce(func.sum(sessions.c.duration), 0),
+            func.count(sessions.c.accuracy_score),
+            func.coalesce(func.sum(sessions.c.accuracy_score), 0.0),
+        )
+        # Only finalised sessions: one ended but not yet finalised will be
+        # added by record_session when its job runs
+        .where(sessions.c.finalised)
+        .group_by(sessions.c.user_id, sessions.c.session_type, day)
+    )
+    cleanup = delete(PracticeRollup)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        statement = statement.where(sessions.c.user_id.in_(user_ids))
+        cleanup = cleanup.where(PracticeRollup.user_id.in_(user_ids))
+
+    rows: Dict[tuple, dict] = {}
+    for user_id, session_type, session_day, *values in connection.execute(statement):
+        for row in _increments(user_id, session_type, session_day, tuple(values)):
+            key = (user_id, row["granularity"], row["bucket_start"], session_type)
+            if key in rows:
+                for column in SUMMED:
+                    rows[key][column] += row[column]
+            else:
+                rows[key] = row
+
+    connection.execute(cleanup)
+    if rows:
+        connection.execute(insert(PracticeRollup), list(rows.values()))
+    return len(rows)
+
+
+def _summary(sessions: int, seconds: int, scored: int, accuracy_sum: float) -> dict:
+    return {
+        "sessions": sessions,
+        "practice_seconds": seconds,
+        "accuracy": round(accuracy_sum / scored, 4) if scored else None,
+    }
+
+
+def series(
+    db: Session,
+    user_id: int,
+    granularity: Granularity,
+    start: date,
+    end: date,
+    session_type: Optional[str] = None,
+) -> dict:
+    """Per-bucket practice time and accuracy for `start`..`end` (inclusive)."""
+    first, last = bucket_start(granularity, start), bucket_start(granularity, end)
+    statement = (
+        select(
+            PracticeRollup.bucket_start,
+            func.sum(PracticeRollup.sessions),
+            func.sum(PracticeRollup.practice_seconds),
+            func.sum(PracticeRollup.scored_sessions),
+            func.sum(PracticeRollup.accuracy_sum),
+        )
+        .where(
+            PracticeRollup.user_id == user_id,
+            PracticeRollup.granularity == granularity.value,
+            PracticeRollup.bucket_start.between(first, last),
+        )
+        .group_by(PracticeRollup.bucket_start)
+    )
+    if session_type is not None:
+        statement = statement.where(PracticeRollup.session_type == session_type)
+    found = {row[0]: row[1:] for row in db.execute(statement)}
+
+    step = timedelta(weeks=1) if granularity is Granularity.week else timedelta(days=1)
+    buckets, totals = [], [0, 0, 0, 0.0]
+    current = first
+    while current <= last:
+        values = found.get(current, (0, 0, 0, 0.0))
+        buckets.append({"bucket_start": current, **_summary(*values)})
+        totals = [total + value for total, value in zip(totals, values)]
+        current += step
+    return {
+        "granularity": granularity.value,
+        "start": first,
+        "end": last,
+        "session_type": session_type,
+        "buckets": buckets,
+        "totals": _summary(*totals),
+    }
@@ -0,0 +1,105 @@
+# archive.py
+"""
+Archival of old practice sessions.
+
+`practice_sessions.session_data` holds per-session transcription data and
+grows without bound, and every query on the table pays for it. Finalised
+sessions that ended more than `SESSION_ARCHIVE_AFTER_DAYS` ago are moved to
+`practice_sessions_archive` by the `archive_sessions` job: the summary
+columns (user, type, lesson, timing, accuracy) are copied as they are and
+stay queryable, while `session_data` is stored zlib-compressed
+(`models.CompressedJSON`). Sessions keep their IDs.
+
+Anything derived from sessions survives archiving: practice rollups and
+leaderboard points are counters, and the full rebuilds of rollups and
+recommendation features read `summaries()`, which covers both tables.
+Only finalised sessions are archived, so every archived session has already
+been counted wherever finalisation counts it.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from models import ArchivedPracticeSession, PracticeSession
+from setttings import settings
+
+SUMMARY_COLUMNS = (
+    "id",
+    "user_id",
+    "session_type",
+    "lesson_id",
+    "start_time",
+    "end_time",
+    "duration",
+    "accuracy_score",
+)
+ARCHIVED_COLUMNS = SUMMARY_COLUMNS + ("session_data",)
+
+# `tasks.finalise_session` records the points it awarded in session_data in
+# the same transaction that counts the session (leaderboards, rollups)
+FINALISED = PracticeSession.session_data["points"].as_integer().is_not(None)
+
+
+def summaries():
+    """
+    Summary columns of live and archived sessions as one subquery (use `.c`),
+    plus `finalised`.
+    """
+    return union_all(
+        select(
+            *(getattr(PracticeSession, name) for name in SUMMARY_COLUMNS),
+            FINALISED.label("finalised"),
+        ),
+        select(
+            *(getattr(ArchivedPracticeSession, name) for name in SUMMARY_COLUMNS),
+            literal(True).label("finalised"),
+        ),
+    ).subquery("all_practice_sessions")
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Move up to `batch_size` finalised sessions that ended before `cutoff`, and commit."""
+    newest = select(func.max(PracticeSession.id)).scalar_subquery()
+    rows = db.execute(
+        select(*(getattr(PracticeSession, name) for name in ARCHIVED_COLUMNS))
+        .where(
+            PracticeSession.end_time < cutoff,
+            FINALISED,
+            # SQLite reuses the highest rowid once it is deleted; keeping the
+            # newest row means an archived ID is never handed out again
+            PracticeSession.id < newest,
+        )
+        .order_by(PracticeSession.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    connection = db.connection()
+    connection.execute(
+        insert(ArchivedPracticeSession),
+        [{**row._asdict(), "archived_at": now} for row in rows],
+    )
+    connection.execute(
+        delete(PracticeSession).where(PracticeSession.id.in_([row.id for row in rows]))
+    )
+    db.commit()
+    return len(rows)
+
+
+def archive_sessions(db: Session, older_than_days: Optional[int] = None) -> int:
+    """
+    Archive every finalised session that ended more than `older_than_days`
+    (default `SESSION_ARCHIVE_AFTER_DAYS`) ago, one committed batch at a time
+    so the table is never locked for long. Returns the number archived.
+    """
+    days = settings.SESSION_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = 0
+    while True:
+        moved = archive_batch(db, cutoff, settings.SESSION_ARCHIVE_BATCH_SIZE)
+        archived += moved
+        if moved < settings.SESSION_ARCHIVE_BATCH_SIZE:
+            return archived
@@ -1,21 +1,88 @@
 # auth_utils.py
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from models import User
 from schemas import TokenData
 from setttings import settings
+import metrics
+import revocation
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow and holds a core for its whole run; doing it on
+# the event loop stalls every other request on the worker.
+_bcrypt_pool = ThreadPoolExecutor(
+    max_workers=settings.BCRYPT_WORKERS, thread_name_prefix="bcrypt"
+)
+_bcrypt_queued = 0
+_bcrypt_queued_lock = threading.Lock()
+
+
+def _adjust_bcrypt_queue(delta: int):
+    global _bcrypt_queued
+    with _bcrypt_queued_lock:
+        _bcrypt_queued += delta
+
+
+BCRYPT_QUEUE_DEPTH = metrics.Gauge(
+    "zonosign_bcrypt_pool_queue_depth",
+    "bcrypt operations waiting for a free thread in the hashing pool.",
+    callback=lambda: _bcrypt_queued,
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        metrics.BCRYPT_OPERATIONS.inc(operation="verify")
+        metrics.BCRYPT_DURATION.observe(time.perf_counter() - start, operation="verify")
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        metrics.BCRYPT_OPERATIONS.inc(operation="hash")
+        metrics.BCRYPT_DURATION.observe(time.perf_counter() - start, operation="hash")
+
+
+async def _run_in_bcrypt_pool(func, *args):
+    if _bcrypt_queued >= settings.BCRYPT_MAX_QUEUE:
+        # Each queued hash is ~a core-second of backlog; shed it up front
+        metrics.ADMISSION_REJECTED.inc(reason="bcrypt_queue")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    def run():
+        _adjust_bcrypt_queue(-1)
+        return func(*args)
+
+    _adjust_bcrypt_queue(1)
+    return await asyncio.get_running_loop().run_in_executor(_bcrypt_pool, run)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_bcrypt_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_bcrypt_pool(get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -24,7 +91,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(settings.TZ) + expires_delta
     else:
         expire = datetime.now(settings.TZ) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti identifies the token so it can be revoked on logout
+    to_encode.update({"exp": expire, "jti": to_encode.get("jti") or uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -42,9 +110,56 @@ def verify_token(token: str) -> TokenData:
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("purpose") is not None:
+            # Purpose-bound tokens (password reset) are not access tokens
             raise credentials_exception
-        token_data = TokenData(email=email)
+        jti = payload.get("jti")
+        if jti is not None and revocation.store.is_revoked(jti):
+            raise credentials_exception
+        token_data = TokenData(email=email, jti=jti, exp=payload.get("exp"))
     except JWTError:
         raise credentials_exception
     return token_data
+
+
+def _password_fingerprint(hashed_password: str) -> str:
+    return hashlib.sha256(hashed_password.encode()).hexdigest()[:16]
+
+
+def create_password_reset_token(email: str, hashed_password: str) -> str:
+    """
+    A signed, short-lived token authorising one password reset.
+
+    It carries a fingerprint of the current password hash, so it stops
+    working as soon as the password changes (i.e. after it has been used).
+    """
+    lifetime = timedelta(minutes=settings.PASSWORD_RESET_EXPIRE_MINUTES)
+    expire = datetime.now(settings.TZ) + lifetime
+    return jwt.encode(
+        {
+            "sub": email,
+            "purpose": "password_reset",
+            "pwd": _password_fingerprint(hashed_password),
+            "exp": expire,
+        },
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+
+def verify_password_reset_token(token: str, db: Session) -> User:
+    """The user a reset token was issued for; 400 if it's invalid, expired or used."""
+    invalid = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token"
+    )
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise invalid
+    email = payload.get("sub")
+    if payload.get("purpose") != "password_reset" or email is None:
+        raise invalid
+    user = db.query(User).filter(User.email == email).first()
+    if user is None or payload.get("pwd") != _password_fingerprint(user.hashed_password):
+        raise invalid
+    return user
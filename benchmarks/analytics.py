@@ -0,0 +1,133 @@
+"""
+Practice analytics latency: rollups vs. aggregating the raw sessions.
+
+Gives one user `--sessions` finished practice sessions spread over the last
+`--days` days, folds them into `practice_rollups` with `analytics.rebuild`,
+then times a full-range daily series read from the rollups against the same
+series computed with a GROUP BY over `practice_sessions` (using
+`ix_practice_sessions_user_start`). Both must agree bucket for bucket.
+
+Usage:
+    python benchmarks/analytics.py [--sessions 100000] [--days 365] [--repeat 50]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from harness import configure_database
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_database(Path(tmp) / "analytics.db")
+        from sqlalchemy import Date, func, insert, select, type_coerce
+
+        import analytics
+        import archive
+        from analytics import Granularity
+        from database import SessionLocal
+        from models import PracticeSession
+        from seed_data import create_synthetic_data
+
+        create_synthetic_data(
+            users=2, signs=10, modules=1, lessons_per_module=1, sessions_per_user=1
+        )
+        rng = random.Random(7)
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        first = today - timedelta(days=args.days - 1)
+        db = SessionLocal()
+        try:
+            rows = []
+            for _ in range(args.sessions):
+                start = first + timedelta(seconds=rng.uniform(0, args.days * 86400))
+                duration = rng.randint(30, 1800)
+                rows.append(
+                    {
+                        "user_id": 1,
+                        "session_type": rng.choice(["transcription", "practice", "assessment"]),
+                        "start_time": start,
+                        "end_time": start + timedelta(seconds=duration),
+                        "duration": duration,
+                        "accuracy_score": rng.uniform(0.3, 1.0) if rng.random() < 0.8 else None,
+                        "session_data": {"points": 0},  # finalised
+                    }
+                )
+            db.connection().execute(insert(PracticeSession), rows)
+            started = time.perf_counter()
+            written = analytics.rebuild(db.connection())
+            db.commit()
+            print(
+                f"rebuild: {written} rollup rows from {args.sessions + 2} sessions "
+                f"in {time.perf_counter() - started:.2f} s"
+            )
+
+            start, end = first.date(), today.date()
+            day = type_coerce(func.date(PracticeSession.start_time), Date)
+            raw = (
+                select(
+                    day,
+                    func.count(),
+                    func.coalesce(func.sum(PracticeSession.duration), 0),
+                    func.count(PracticeSession.accuracy_score),
+                    func.coalesce(func.sum(PracticeSession.accuracy_score), 0.0),
+                )
+                .where(
+                    PracticeSession.user_id == 1,
+                    PracticeSession.start_time >= first,
+                    PracticeSession.start_time < today + timedelta(days=1),
+                    archive.FINALISED,
+                )
+                .group_by(day)
+            )
+
+            def from_sessions():
+                found = {row[0]: row[1:] for row in db.execute(raw)}
+                return {
+                    bucket: analytics._summary(*values) for bucket, values in found.items()
+                }
+
+            def from_rollups():
+                return analytics.series(db, 1, Granularity.day, start, end)
+
+            expected = from_sessions()
+            series = from_rollups()
+            for bucket in series["buckets"]:
+                want = expected.get(
+                    bucket["bucket_start"], {"sessions": 0, "practice_seconds": 0, "accuracy": None}
+                )
+                got = {key: bucket[key] for key in want}
+                assert got == want, (bucket["bucket_start"], got, want)
+            assert series["totals"]["sessions"] == sum(v["sessions"] for v in expected.values())
+
+            for name, query in (("sessions GROUP BY", from_sessions), ("rollups", from_rollups)):
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    query()
+                    timings.append((time.perf_counter() - started) * 1000)
+                p50, p95 = _percentiles(timings)
+                print(
+                    f"{args.days}-day series from {name}: p50 {p50:.2f} ms, p95 {p95:.2f} ms"
+                )
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
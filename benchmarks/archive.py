@@ -0,0 +1,167 @@
+"""
+Practice session archival: hot-table size and query latency before and after.
+
+Seeds `--sessions` finalised sessions with realistic `session_data` (a
+transcript of `--frames` recognised frames each) spread over the last two
+years, measures the size of `practice_sessions` and times typical queries on
+it, runs `archive.archive_sessions` with `--days`, then measures again, along
+with the size of the compressed archive and a summary query against it.
+
+Usage:
+    python benchmarks/archive.py [--sessions 50000] [--frames 40] [--days 180]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from harness import configure_database
+
+SIGNS = ["hello", "thank-you", "please", "mother", "father", "water", "eat", "good", "name"]
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=40)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_database(Path(tmp) / "archive.db")
+        from sqlalchemy import func, insert, select, text
+
+        import archive
+        from database import SessionLocal, engine
+        from models import ArchivedPracticeSession, PracticeSession
+        from seed_data import create_synthetic_data
+
+        create_synthetic_data(
+            users=args.users, signs=10, modules=1, lessons_per_module=1, sessions_per_user=0
+        )
+        rng = random.Random(7)
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            rows = []
+            for _ in range(args.sessions):
+                start = now - timedelta(seconds=rng.uniform(0, 730 * 86400))
+                duration = rng.randint(30, 1800)
+                rows.append(
+                    {
+                        "user_id": rng.randint(1, args.users),
+                        "session_type": rng.choice(["transcription", "practice", "assessment"]),
+                        "start_time": start,
+                        "end_time": start + timedelta(seconds=duration),
+                        "duration": duration,
+                        "accuracy_score": rng.uniform(0.3, 1.0),
+                        "session_data": {
+                            "language": "ASL",
+                            "points": 0,  # finalised
+                            "frames": [
+                                {
+                                    "t": round(i * 0.25, 2),
+                                    "sign": rng.choice(SIGNS),
+                                    "confidence": round(rng.random(), 3),
+                                }
+                                for i in range(args.frames)
+                            ],
+                        },
+                    }
+                )
+            rows.sort(key=lambda row: row["start_time"])  # IDs follow time, as in production
+            db.connection().execute(insert(PracticeSession), rows)
+            db.commit()
+        finally:
+            db.close()
+
+        def table_sizes():
+            with engine.connect() as connection:
+                connection.execute(text("VACUUM"))
+                return dict(
+                    connection.execute(
+                        text(
+                            "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN "
+                            "('practice_sessions', 'practice_sessions_archive') GROUP BY name"
+                        )
+                    ).all()
+                )
+
+        cutoff = now - timedelta(days=30)
+        queries = {
+            "recent sessions, one user": lambda db: db.execute(
+                select(PracticeSession)
+                .where(PracticeSession.user_id == 1)
+                .order_by(PracticeSession.start_time.desc())
+                .limit(20)
+            ).all(),
+            "last 30 days, all users": lambda db: db.execute(
+                select(func.count(), func.avg(PracticeSession.accuracy_score)).where(
+                    PracticeSession.start_time >= cutoff
+                )
+            ).one(),
+            "full scan with session_data": lambda db: db.execute(
+                select(PracticeSession.session_data)
+            ).all(),
+        }
+
+        def measure(label):
+            sizes = table_sizes()
+            print(
+                f"{label}: practice_sessions {sizes.get('practice_sessions', 0) / 2**20:.1f} MiB, "
+                f"archive {sizes.get('practice_sessions_archive', 0) / 2**20:.1f} MiB"
+            )
+            db = SessionLocal()
+            try:
+                for name, query in queries.items():
+                    timings = []
+                    for _ in range(args.repeat):
+                        started = time.perf_counter()
+                        query(db)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    p50, p95 = _percentiles(timings)
+                    print(f"    {name}: p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+            finally:
+                db.close()
+
+        measure("before")
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            archived = archive.archive_sessions(db, args.days)
+            print(
+                f"archived {archived} of {args.sessions} sessions older than {args.days} days "
+                f"in {time.perf_counter() - started:.2f} s"
+            )
+            summary = (
+                select(func.count(), func.sum(ArchivedPracticeSession.duration))
+                .where(
+                    ArchivedPracticeSession.user_id == 1,
+                    ArchivedPracticeSession.start_time >= now - timedelta(days=365),
+                )
+            )
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                db.execute(summary).one()
+                timings.append((time.perf_counter() - started) * 1000)
+            p50, p95 = _percentiles(timings)
+            print(f"    archive summary, one user's year: p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+        finally:
+            db.close()
+        measure("after")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+bcrypt calls per hour: re-login on every access-token expiry vs. refresh tokens.
+
+Simulates `--clients` clients each active for `--hours` hours with access
+tokens that live `--access-minutes` minutes. In "login" mode a client logs in
+again (one bcrypt verify) whenever its access token expires, which is what
+clients had to do before refresh tokens; in "refresh" mode it logs in once
+and then calls `/v1/auth/refresh`. Requests run in-process against the app;
+bcrypt work is read from the `zonosign_bcrypt_operations_total` counter.
+
+Usage:
+    python benchmarks/auth.py [--clients 20] [--hours 8] [--access-minutes 15]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from harness import configure_database
+
+
+def simulate(client, mode: str, emails, renewals: int, password: str) -> float:
+    start = time.perf_counter()
+    for email in emails:
+        body = client.post("/v1/auth/login", json={"email": email, "password": password}).json()
+        for _ in range(renewals):
+            if mode == "login":
+                response = client.post(
+                    "/v1/auth/login", json={"email": email, "password": password}
+                )
+            else:
+                response = client.post(
+                    "/v1/auth/refresh", json={"refresh_token": body["refresh_token"]}
+                )
+            assert response.status_code == 200, response.text
+            body = response.json()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--hours", type=float, default=8.0)
+    parser.add_argument("--access-minutes", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_database(Path(tmp) / "auth.db")
+        from fastapi.testclient import TestClient
+
+        import main as app_module
+        import metrics
+        from seed_data import SYNTHETIC_PASSWORD, create_synthetic_data
+
+        create_synthetic_data(
+            users=args.clients, signs=10, modules=1, lessons_per_module=1, sessions_per_user=1
+        )
+        emails = [f"user{n}@example.com" for n in range(1, args.clients + 1)]
+        renewals = int(args.hours * 60 // args.access_minutes)
+
+        with TestClient(app_module.app) as client:
+            for mode in ("login", "refresh"):
+                before = metrics.BCRYPT_OPERATIONS.value(operation="verify")
+                elapsed = simulate(client, mode, emails, renewals, SYNTHETIC_PASSWORD)
+                verifies = metrics.BCRYPT_OPERATIONS.value(operation="verify") - before
+                per_hour = verifies / (args.clients * args.hours)
+                print(
+                    f"{mode:<8} {verifies:>6.0f} bcrypt verifies "
+                    f"({per_hour:.2f} per client-hour), "
+                    f"{elapsed / (args.clients * (renewals + 1)) * 1000:.1f} ms per token"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Mixed-workload benchmark for the whole API, run in-process against the ASGI app.
+
+Seeds a dedicated SQLite database with `seed_data.create_synthetic_data` at the
+chosen scale (once; pass --reseed to regenerate), then drives a weighted mix of
+realistic requests from `--concurrency` simulated clients and reports
+throughput plus p50/p95/p99 latency per endpoint.
+
+Results can be saved as a named baseline and later runs compared against it;
+the comparison exits non-zero when any endpoint regresses by more than
+`--threshold`.
+
+Usage:
+    python benchmarks/harness.py --scale small
+    python benchmarks/harness.py --scale medium --save-baseline main
+    python benchmarks/harness.py --scale medium --compare main
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINES = Path(__file__).resolve().parent / "baselines"
+
+SCALES = {
+    "small": dict(users=50, signs=5_000, modules=6, lessons_per_module=6, sessions_per_user=20),
+    "medium": dict(users=500, signs=100_000, modules=12, lessons_per_module=8, sessions_per_user=50),
+    "large": dict(users=5_000, signs=100_000, modules=24, lessons_per_module=10, sessions_per_user=200),
+}
+
+
+def configure_database(path: Path):
+    # Must happen before anything imports `database`.
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # Simulated clients all share one address; don't rate limit them
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    # Keep periodic background jobs from competing with the measured requests
+    os.environ["JOBS_ENABLED"] = "false"
+    sys.path.insert(0, str(ROOT))
+
+
+class Workload:
+    """Weighted request generators. Each returns (name, method, url, json)."""
+
+    def __init__(self, scale: dict, rng: random.Random):
+        from seed_data import SIGN_CATEGORIES
+
+        self.scale = scale
+        self.rng = rng
+        self.categories = SIGN_CATEGORIES
+        self.lesson_count = scale["modules"] * scale["lessons_per_module"]
+        self.requests = [
+            (30, self.list_signs),
+            (20, self.get_sign),
+            (10, self.search_signs),
+            (15, self.list_modules),
+            (8, self.module_lessons),
+            (7, self.get_lesson),
+            (6, self.module_progress),
+            (3, self.profile),
+            (1, self.login),
+        ]
+        self.weights = [weight for weight, _ in self.requests]
+
+    def next(self):
+        (_, generator), = self.rng.choices(self.requests, weights=self.weights)
+        return generator()
+
+    def list_signs(self):
+        params = f"skip={self.rng.randint(0, 50) * 20}&limit=20"
+        if self.rng.random() < 0.5:
+            params += f"&category={self.rng.choice(self.categories)}"
+        if self.rng.random() < 0.3:
+            params += f"&difficulty={self.rng.randint(1, 5)}"
+        return "GET /v1/dictionary/signs", "GET", f"/v1/dictionary/signs?{params}", None
+
+    def get_sign(self):
+        sign_id = self.rng.randint(1, self.scale["signs"])
+        return "GET /v1/dictionary/signs/{id}", "GET", f"/v1/dictionary/signs/{sign_id}", None
+
+    def search_signs(self):
+        q = f"word_{self.rng.randint(1, 999)}"
+        return "GET /v1/dictionary/signs/search", "GET", f"/v1/dictionary/signs/search?q={q}", None
+
+    def list_modules(self):
+        return "GET /v1/curriculum/modules", "GET", "/v1/curriculum/modules", None
+
+    def module_lessons(self):
+        module_id = self.rng.randint(1, self.scale["modules"])
+        return (
+            "GET /v1/curriculum/modules/{id}/lessons",
+            "GET",
+            f"/v1/curriculum/modules/{module_id}/lessons",
+            None,
+        )
+
+    def get_lesson(self):
+        lesson_id = self.rng.randint(1, self.lesson_count)
+        module_id = (lesson_id - 1) // self.scale["lessons_per_module"] + 1
+        return (
+            "GET /v1/curriculum/modules/{id}/lessons/{id}",
+            "GET",
+            f"/v1/curriculum/modules/{module_id}/lessons/{lesson_id}",
+            None,
+        )
+
+    def module_progress(self):
+        return "GET /v1/progress/modules", "GET", "/v1/progress/modules", None
+
+    def profile(self):
+        return "GET /v1/users/profile", "GET", "/v1/users/profile", None
+
+    def login(self):
+        from seed_data import SYNTHETIC_PASSWORD
+
+        user = self.rng.randint(1, self.scale["users"])
+        body = {"email": f"user{user}@example.com", "password": SYNTHETIC_PASSWORD}
+        return "POST /v1/auth/login", "POST", "/v1/auth/login", body
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run(scale: dict, requests: int, concurrency: int, seed: int) -> dict:
+    import httpx
+
+    from auth_utils import create_access_token
+    import main
+
+    rng = random.Random(seed)
+    tokens = [
+        create_access_token({"sub": f"user{u}@example.com"}, timedelta(hours=1))
+        for u in range(1, min(scale["users"], 200) + 1)
+    ]
+    workload = Workload(scale, rng)
+    plan = [(workload.next(), rng.choice(tokens)) for _ in range(requests)]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    cursor = iter(plan)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def simulated_client():
+                for (name, method, url, body), token in cursor:
+                    start = time.perf_counter()
+                    response = await client.request(
+                        method, url, json=body, headers={"Authorization": f"Bearer {token}"}
+                    )
+                    latencies[name].append(time.perf_counter() - start)
+                    if response.status_code >= 400:
+                        errors[name] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(simulated_client() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "throughput": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+        }
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "cpus": os.cpu_count()},
+        "scale": scale,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seed": seed,
+        "elapsed_s": elapsed,
+        "throughput": requests / elapsed,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"{result['requests']} requests in {result['elapsed_s']:.2f}s "
+        f"({result['throughput']:.0f} req/s, concurrency {result['concurrency']})"
+    )
+    print(f"{'endpoint':<46} {'n':>6} {'err':>4} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, stats in result["endpoints"].items():
+        print(
+            f"{name:<46} {stats['requests']:>6} {stats['errors']:>4} "
+            f"{stats['throughput']:>8.1f} {stats['p50_ms']:>7.2f}ms "
+            f"{stats['p95_ms']:>7.2f}ms {stats['p99_ms']:>7.2f}ms"
+        )
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> bool:
+    """Print per-endpoint deltas against `baseline`; return False on regression."""
+    ok = True
+    print(f"\nComparison with baseline from {baseline['created_at']} (threshold {threshold:.0%}):")
+    print(f"{'endpoint':<46} {'p95 before':>11} {'p95 after':>10} {'delta':>8}")
+    for name, stats in result["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            print(f"{name:<46} {'-':>11} {stats['p95_ms']:>8.2f}ms {'new':>8}")
+            continue
+        delta = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        regressed = delta > threshold
+        ok = ok and not regressed
+        marker = "  REGRESSION" if regressed else ""
+        print(
+            f"{name:<46} {before['p95_ms']:>9.2f}ms {stats['p95_ms']:>8.2f}ms "
+            f"{delta:>+7.1%}{marker}"
+        )
+    delta = (result["throughput"] - baseline["throughput"]) / baseline["throughput"]
+    print(f"overall throughput: {baseline['throughput']:.0f} -> {result['throughput']:.0f} req/s ({delta:+.1%})")
+    if delta < -threshold:
+        ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ZonoSign API benchmark harness")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", type=Path, help="database file (default: per scale)")
+    parser.add_argument("--reseed", action="store_true", help="regenerate the dataset")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    db_path = args.db or Path(__file__).resolve().parent / f"bench_{args.scale}.db"
+    if args.reseed and db_path.exists():
+        db_path.unlink()
+    configure_database(db_path)
+
+    if not db_path.exists():
+        from seed_data import create_synthetic_data
+
+        create_synthetic_data(seed=args.seed, **scale)
+
+    result = asyncio.run(run(scale, args.requests, args.concurrency, args.seed))
+    print_report(result)
+
+    if args.save_baseline:
+        BASELINES.mkdir(exist_ok=True)
+        path = BASELINES / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(result, indent=2))
+        print(f"\nBaseline saved to {path}")
+
+    if args.compare:
+        baseline = json.loads((BASELINES / f"{args.compare}.json").read_text())
+        if baseline["scale"] != scale:
+            sys.exit("Baseline was recorded at a different scale")
+        if not compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
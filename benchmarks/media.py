@@ -0,0 +1,105 @@
+"""
+Concurrent media streaming throughput.
+
+Creates a scratch MEDIA_ROOT with one large video, scans it, starts the API
+with `python main.py` and has `--concurrency` clients read the file the way a
+video player does: sequential byte ranges of `--range-size` bytes. Reports
+aggregate MB/s and range requests/second.
+
+Usage:
+    python benchmarks/media.py [--size-mb 64] [--concurrency 16] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from workers import ROOT, free_port, wait_until_up
+
+
+async def stream(base_url: str, size: int, range_size: int, concurrency: int, duration: float):
+    transferred = 0
+    requests = 0
+    deadline = time.monotonic() + duration
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=httpx.Limits(max_connections=concurrency)
+    ) as client:
+
+        async def player(offset: int):
+            nonlocal transferred, requests
+            position = offset % size
+            while time.monotonic() < deadline:
+                end = min(position + range_size, size) - 1
+                response = await client.get(
+                    "/videos/bench.mp4", headers={"Range": f"bytes={position}-{end}"}
+                )
+                assert response.status_code == 206, response.status_code
+                transferred += len(response.content)
+                requests += 1
+                position = 0 if end + 1 >= size else end + 1
+
+        await asyncio.gather(*(player(i * range_size * 7) for i in range(concurrency)))
+    return transferred, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--range-size", type=int, default=1024 * 1024)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        media_root = Path(tmp) / "media"
+        (media_root / "videos").mkdir(parents=True)
+        size = args.size_mb * 1024 * 1024
+        with (media_root / "videos" / "bench.mp4").open("wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        port = free_port()
+        env = {
+            **os.environ,
+            "MEDIA_ROOT": str(media_root),
+            "DATABASE_URL": f"sqlite:///{tmp}/media_bench.db",
+            "WORKERS": str(args.workers),
+            "PORT": str(port),
+            "HOST": "127.0.0.1",
+        }
+        subprocess.run([sys.executable, "media.py", "scan"], cwd=ROOT, env=env, check=True)
+        server = subprocess.Popen(
+            [sys.executable, "main.py"],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            wait_until_up(base_url)
+            transferred, requests = asyncio.run(
+                stream(base_url, size, args.range_size, args.concurrency, args.duration)
+            )
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+    print(
+        f"{args.concurrency} concurrent players, {args.range_size // 1024} KiB ranges: "
+        f"{transferred / args.duration / 1024 / 1024:.1f} MB/s, "
+        f"{requests / args.duration:.0f} range requests/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
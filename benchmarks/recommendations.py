@@ -0,0 +1,107 @@
+"""
+Latency of `/v1/progress/recommendations` against its target.
+
+Seeds a synthetic database, then for `--users` users requests recommendations
+three ways: cold (no stored feature vector, so a full rebuild), warm (nothing
+new since the last request) and incremental (one new practice session since
+the last request, the common case for an active learner). Reports p50/p95 for
+each and exits non-zero if the warm or incremental p95 exceeds `--target-ms`.
+
+Usage:
+    python benchmarks/recommendations.py [--signs 100000] [--users 50] [--target-ms 50]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from harness import configure_database
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--signs", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--sessions-per-user", type=int, default=200)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_database(Path(tmp) / "recommendations.db")
+        from fastapi.testclient import TestClient
+
+        import main as app_module
+        from auth_utils import create_access_token
+        from database import SessionLocal
+        from models import PracticeSession
+        from seed_data import create_synthetic_data
+
+        create_synthetic_data(
+            users=args.users,
+            signs=args.signs,
+            modules=12,
+            lessons_per_module=8,
+            sessions_per_user=args.sessions_per_user,
+        )
+        headers = {
+            user_id: {
+                "Authorization": "Bearer "
+                + create_access_token({"sub": f"user{user_id}@example.com"})
+            }
+            for user_id in range(1, args.users + 1)
+        }
+
+        def request(user_id):
+            start = time.perf_counter()
+            response = client.get("/v1/progress/recommendations", headers=headers[user_id])
+            elapsed = (time.perf_counter() - start) * 1000
+            assert response.status_code == 200, response.text
+            return elapsed
+
+        db = SessionLocal()
+        with TestClient(app_module.app) as client:
+            # Builds the worker's catalog; not counted
+            start = time.perf_counter()
+            request(1)
+            print(f"catalog build: {(time.perf_counter() - start) * 1000:.0f} ms (once per content version)")
+
+            results = {"cold": [], "warm": [], "incremental": []}
+            for user_id in range(2, args.users + 1):
+                results["cold"].append(request(user_id))
+                results["warm"].append(request(user_id))
+                db.add(
+                    PracticeSession(
+                        user_id=user_id,
+                        session_type="practice",
+                        lesson_id=1,
+                        end_time=datetime.utcnow(),
+                        duration=60,
+                        accuracy_score=0.5,
+                    )
+                )
+                db.commit()
+                results["incremental"].append(request(user_id))
+        db.close()
+
+        failed = False
+        for name, timings in results.items():
+            p95 = percentile(timings, 0.95)
+            over = name != "cold" and p95 > args.target_ms
+            failed |= over
+            print(
+                f"{name:<12} p50 {percentile(timings, 0.5):6.1f} ms  p95 {p95:6.1f} ms"
+                + ("  OVER TARGET" if over else "")
+            )
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Due-queue latency for spaced-repetition reviews.
+
+Gives one user `--cards` review cards (and every other synthetic user a
+smaller deck) with due times spread over the past and next few months, prints
+the query plan of `srs.due_cards` and times it. The plan should be a search
+of `ix_review_states_user_due` with no temp B-tree for the ORDER BY, so the
+time stays flat as the deck grows.
+
+Usage:
+    python benchmarks/reviews.py [--cards 10000] [--other-users 20] [--repeat 200]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from harness import configure_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cards", type=int, default=10_000)
+    parser.add_argument("--other-users", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_database(Path(tmp) / "reviews.db")
+        from sqlalchemy import insert, text
+
+        import srs
+        from database import SessionLocal
+        from models import ReviewState
+        from seed_data import create_synthetic_data
+
+        create_synthetic_data(
+            users=args.other_users + 1,
+            signs=args.cards,
+            modules=1,
+            lessons_per_module=1,
+            sessions_per_user=1,
+        )
+        rng = random.Random(7)
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            for user_id in range(1, args.other_users + 2):
+                deck = args.cards if user_id == 1 else args.cards // 10
+                db.execute(
+                    insert(ReviewState),
+                    [
+                        {
+                            "user_id": user_id,
+                            "sign_id": sign_id,
+                            "due_at": now + timedelta(days=rng.uniform(-60, 60)),
+                        }
+                        for sign_id in rng.sample(range(1, args.cards + 1), deck)
+                    ],
+                )
+            db.commit()
+
+            statement = srs.due_statement(1, now, args.limit).compile(
+                db.get_bind(), compile_kwargs={"literal_binds": True}
+            )
+            print("Query plan:")
+            for row in db.execute(text(f"EXPLAIN QUERY PLAN {statement}")):
+                print("   ", row[-1])
+
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                cards = srs.due_cards(db, 1, now, args.limit)
+                timings.append((time.perf_counter() - start) * 1000)
+            assert len(cards) == args.limit, len(cards)
+            timings.sort()
+            print(
+                f"due_cards over {args.cards} cards: "
+                f"p50 {statistics.median(timings):.2f} ms, "
+                f"p95 {timings[int(len(timings) * 0.95)]:.2f} ms"
+            )
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Per-row serialisation cost: Pydantic `from_attributes` path vs. projection + orjson.
+
+For each read-heavy list endpoint this builds the response body both ways
+from the same synthetic database:
+
+- "pydantic": load ORM objects, validate each into the response model and
+  render with `jsonable_encoder` + `JSONResponse`, as FastAPI does for a
+  `response_model` endpoint;
+- "projected": select only the schema's columns as row dicts and encode them
+  with orjson (the path the endpoints now use).
+
+It first checks that both produce the same JSON document (same keys, same
+order, same values) and exits non-zero if they don't, then reports the time
+per row of each path.
+
+Usage:
+    python benchmarks/serialization.py [--signs 20000] [--repeat 20]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import configure_database
+
+
+def endpoints(db):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from sqlalchemy.orm import selectinload
+
+    from models import Lesson, Module, SignEntry, UserProgress
+    from schemas import LessonResponse, ModuleResponse, ProgressResponse, SignEntryResponse
+    from serialization import dumps, fetch_dicts, group_by, select_for
+
+    def render(schema, objects):
+        return JSONResponse(jsonable_encoder([schema.model_validate(o) for o in objects])).body
+
+    def signs_pydantic():
+        return render(SignEntryResponse, db.query(SignEntry).limit(100).all())
+
+    def signs_projected():
+        return dumps(fetch_dicts(db, select_for(SignEntryResponse, SignEntry).limit(100)))
+
+    def modules_pydantic():
+        modules = (
+            db.query(Module)
+            .options(selectinload(Module.lessons))
+            .filter(Module.is_active == True)
+            .order_by(Module.order_index)
+            .all()
+        )
+        for module in modules:
+            module.lessons.sort(key=lambda lesson: lesson.id)
+        return render(ModuleResponse, modules)
+
+    def modules_projected():
+        modules = fetch_dicts(
+            db,
+            select_for(ModuleResponse, Module)
+            .where(Module.is_active == True)
+            .order_by(Module.order_index),
+        )
+        lessons = group_by(
+            fetch_dicts(
+                db,
+                select_for(LessonResponse, Lesson)
+                .where(Lesson.module_id.in_([m["id"] for m in modules]))
+                .order_by(Lesson.id),
+            ),
+            "module_id",
+        )
+        for module in modules:
+            module["lessons"] = lessons.get(module["id"], [])
+        return dumps(modules)
+
+    def progress_pydantic():
+        return render(
+            ProgressResponse, db.query(UserProgress).filter(UserProgress.user_id == 1).all()
+        )
+
+    def progress_projected():
+        statement = select_for(ProgressResponse, UserProgress).where(UserProgress.user_id == 1)
+        return dumps(fetch_dicts(db, statement))
+
+    return {
+        "get_signs": (signs_pydantic, signs_projected),
+        "get_modules": (modules_pydantic, modules_projected),
+        "get_module_progress": (progress_pydantic, progress_projected),
+    }
+
+
+def rows_in(body: bytes) -> int:
+    document = json.loads(body)
+    return len(document) + sum(len(item.get("lessons", [])) for item in document)
+
+
+def timed(build, repeat: int, db) -> float:
+    samples = []
+    for _ in range(repeat):
+        db.expire_all()
+        start = time.perf_counter()
+        build()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--signs", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_database(Path(tmp) / "serialization.db")
+        from database import SessionLocal
+        from seed_data import create_synthetic_data
+
+        create_synthetic_data(
+            users=5, signs=args.signs, modules=12, lessons_per_module=8, sessions_per_user=1
+        )
+
+        db = SessionLocal()
+        try:
+            failed = False
+            print(f"{'endpoint':<22}{'rows':>6}{'pydantic us/row':>18}{'projected us/row':>19}{'speedup':>9}")
+            for name, (pydantic_path, projected_path) in endpoints(db).items():
+                expected, actual = pydantic_path(), projected_path()
+                # Compare parsed documents with key order, not just equality
+                same = json.loads(expected, object_pairs_hook=list) == json.loads(
+                    actual, object_pairs_hook=list
+                )
+                if not same:
+                    failed = True
+                    print(f"{name}: projected output differs from the response schema")
+                    continue
+
+                rows = rows_in(expected)
+                before = timed(pydantic_path, args.repeat, db) / rows * 1e6
+                after = timed(projected_path, args.repeat, db) / rows * 1e6
+                print(f"{name:<22}{rows:>6}{before:>18.1f}{after:>19.1f}{before / after:>8.1f}x")
+        finally:
+            db.close()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Throughput of the multi-worker entry point as the worker count grows.
+
+Starts `python main.py` with WORKERS=1, 2, 4, ... up to the number of CPU
+cores, drives it with several client processes for a fixed duration and
+prints requests/second per worker count.
+
+Usage:
+    python benchmarks/workers.py [--duration 10] [--concurrency 64]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+PATHS = ["/v1/curriculum/modules", "/v1/dictionary/signs?limit=20"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not come up")
+
+
+def get_token(base_url: str) -> str:
+    name = uuid.uuid4().hex[:12]
+    credentials = {"email": f"bench-{name}@example.com", "password": "benchmark-pw"}
+    httpx.post(
+        f"{base_url}/v1/auth/register", json={**credentials, "username": name}
+    ).raise_for_status()
+    response = httpx.post(f"{base_url}/v1/auth/login", json=credentials)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def drive(base_url: str, token: str, concurrency: int, duration: float) -> int:
+    completed = 0
+    deadline = time.monotonic() + duration
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits
+    ) as client:
+
+        async def loop(offset: int):
+            nonlocal completed
+            i = offset
+            while time.monotonic() < deadline:
+                await client.get(PATHS[i % len(PATHS)])
+                completed += 1
+                i += 1
+
+        await asyncio.gather(*(loop(i) for i in range(concurrency)))
+    return completed
+
+
+def client_process(args) -> int:
+    return asyncio.run(drive(*args))
+
+
+def run(workers: int, clients: int, concurrency: int, duration: float) -> float:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "WORKERS": str(workers), "PORT": str(port), "HOST": "127.0.0.1"}
+    server = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(base_url)
+        token = get_token(base_url)
+        per_client = max(1, concurrency // clients)
+        with multiprocessing.Pool(clients) as pool:
+            counts = pool.map(
+                client_process, [(base_url, token, per_client, duration)] * clients
+            )
+        return sum(counts) / duration
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8}")
+    baseline = None
+    for workers in counts:
+        rps = run(workers, args.clients, args.concurrency, args.duration)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>10.0f} {rps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# bundles.py
+"""
+Prebuilt lesson bundles: everything a client needs to open a lesson offline.
+
+A bundle is one gzipped JSON document holding the lesson (including its
+`content`), its module, every `SignEntry` the content references and a media
+manifest for each media URL involved. Bundles are stored in `lesson_bundles`
+tagged with the content versions they were built from; they are rebuilt the
+first time they're requested after curriculum, dictionary or media content
+changes, and served as-is (no per-request serialisation or compression)
+until then.
+
+Lesson content references signs through a `signs` list of sign IDs or words:
+
+    {"type": "video", "url": "/videos/lesson1.mp4", "signs": [12, "hello"]}
+"""
+import gzip
+import hashlib
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, undefer, undefer_group
+
+import content_version
+from media import media_manifest
+from models import Lesson, LessonBundle, Module, SignEntry
+from schemas import LessonResponse, ModuleBase, SignEntryResponse
+
+BUNDLE_CONTENT = (
+    content_version.CURRICULUM,
+    content_version.DICTIONARY,
+    content_version.MEDIA,
+)
+
+
+def _referenced_signs(db: Session, content: dict):
+    references = content.get("signs") or []
+    ids = [ref for ref in references if isinstance(ref, int)]
+    words = [ref for ref in references if isinstance(ref, str)]
+    if not ids and not words:
+        return []
+    return (
+        db.query(SignEntry)
+        .options(undefer_group("detail"))
+        .filter(or_(SignEntry.id.in_(ids), SignEntry.word.in_(words)))
+        .order_by(SignEntry.id)
+        .all()
+    )
+
+
+def build_bundle(db: Session, lesson: Lesson, version: str) -> LessonBundle:
+    content = lesson.content or {}
+    signs = _referenced_signs(db, content)
+    module = db.query(Module).filter(Module.id == lesson.module_id).first()
+
+    media_urls = [content.get("url")]
+    for sign in signs:
+        media_urls += [sign.video_url, sign.animation_url]
+    media = {url: media_manifest(url) for url in media_urls if url}
+
+    document = {
+        "version": version,
+        "module": (
+            {"id": module.id, **ModuleBase.model_validate(module, from_attributes=True).model_dump()}
+            if module
+            else None
+        ),
+        "lesson": {
+            **LessonResponse.model_validate(lesson).model_dump(),
+            "content": content,
+        },
+        "signs": [SignEntryResponse.model_validate(sign) for sign in signs],
+        "media": media,
+    }
+    body = json.dumps(jsonable_encoder(document), separators=(",", ":")).encode()
+    payload = gzip.compress(body, compresslevel=9, mtime=0)
+
+    values = {
+        "version": version,
+        "etag": hashlib.sha256(body).hexdigest()[:32],
+        "payload": payload,
+        "built_at": datetime.utcnow(),
+    }
+    # Requests in other workers and the rebuild job may build the same bundle
+    # at once; an upsert lets the last one win instead of failing the rest
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}[db.get_bind().dialect.name]
+    statement = dialect.insert(LessonBundle).values(lesson_id=lesson.id, **values)
+    db.connection().execute(
+        statement.on_conflict_do_update(
+            index_elements=["lesson_id"],
+            set_={column: getattr(statement.excluded, column) for column in values},
+        )
+    )
+    db.commit()
+    return db.get(LessonBundle, lesson.id)
+
+
+def get_bundle(db: Session, lesson: Lesson) -> LessonBundle:
+    """
+    Return the stored bundle for `lesson`, rebuilding it if content changed.
+
+    Blocking (queries, gzip at level 9): call it from the threadpool.
+    """
+    version = content_version.version_key(db.connection(), BUNDLE_CONTENT)
+    bundle = db.get(LessonBundle, lesson.id)
+    if bundle is None or bundle.version != version:
+        bundle = build_bundle(db, lesson, version)
+    return bundle
+
+
+def rebuild_stale_bundles(db: Session) -> int:
+    """Eagerly rebuild every stale bundle of an active lesson; returns the count."""
+    version = content_version.version_key(db.connection(), BUNDLE_CONTENT)
+    current = {
+        lesson_id
+        for (lesson_id,) in db.query(LessonBundle.lesson_id).filter(
+            LessonBundle.version == version
+        )
+    }
+    rebuilt = 0
+    lessons = db.query(Lesson).options(undefer(Lesson.content)).filter(
+        Lesson.is_active == True
+    )
+    for lesson in lessons:
+        if lesson.id not in current:
+            build_bundle(db, lesson, version)
+            rebuilt += 1
+    return rebuilt
+
+
+def decompress_payload(bundle: LessonBundle) -> bytes:
+    return gzip.decompress(bundle.payload)
@@ -0,0 +1,326 @@
+# cache.py
+"""
+Two-level read-through caches with stampede protection.
+
+A `Cache` is a per-worker LRU map with a TTL per entry, optionally backed
+by a shared tier that every worker on the host (or cluster) reads:
+
+    modules = cache.Cache("modules", max_entries=1000, shared=True)
+    module = modules.get_or_load(module_id, lambda: load_module(db, module_id))
+
+A miss checks the shared tier, then calls the loader and stores the value
+in both. Concurrent misses for the same key are coalesced: the first caller
+loads and the others wait for its result, so a cold key costs one query
+however many requests ask for it at once. `aget_or_load` does the same from
+async code, running the shared lookup and the loader in the threadpool.
+
+The shared tier is a `CacheBackend` named by `CACHE_SHARED_BACKEND` (an
+import path, like `RATE_LIMIT_STORE`). `SQLiteBackend` keeps it in a local
+SQLite file, standing in for Redis or memcached on a single host. Values in
+shared caches must be JSON-serialisable and come back in their JSON form
+(datetimes as ISO strings), which suits cached response data; caches of
+anything else stay per-worker.
+
+Invalidation is write-through: `invalidate_on(Model, cache, keys)` drops the
+keys an ORM write to a `Model` row affects, from this worker and the shared
+tier, once the transaction commits. Other workers' local copies expire
+within `CACHE_LOCAL_TTL`. Writes that bypass the ORM (Core bulk statements)
+don't fire these events. Caches of data written that way must key on a
+`content_version` counter the write bumps instead (`sign_details` keys on the
+dictionary version), since another process can't clear a worker's local
+entries.
+"""
+import asyncio
+import importlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from setttings import settings
+
+_MISSING = object()
+
+
+class CacheBackend:
+    """Shared cache tier holding bytes. Implementations must be thread-safe."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, keys: Iterable[str]):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str):
+        raise NotImplementedError
+
+
+class SQLiteBackend(CacheBackend):
+    """A SQLite file shared by the workers on one host (`CACHE_SHARED_PATH`)."""
+
+    PURGE_EVERY = 1000  # writes between sweeps of expired entries
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.CACHE_SHARED_PATH
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, keys):
+        self._connection().executemany(
+            "DELETE FROM cache_entries WHERE key = ?", [(key,) for key in keys]
+        )
+
+    def delete_prefix(self, prefix):
+        # A key range rather than LIKE, so `_` and `%` in keys aren't wildcards
+        self._connection().execute(
+            "DELETE FROM cache_entries WHERE key >= ? AND key < ?",
+            (prefix, prefix + "\U0010ffff"),
+        )
+
+
+def _load_backend(path: str) -> Optional[CacheBackend]:
+    if not path:
+        return None
+    module, _, name = path.rpartition(".")
+    return getattr(importlib.import_module(module), name)()
+
+
+shared_backend: Optional[CacheBackend] = _load_backend(settings.CACHE_SHARED_BACKEND)
+
+CACHES: Dict[str, "Cache"] = {}
+
+
+class Cache:
+    """
+    A per-worker LRU cache with per-entry TTL and an optional shared tier.
+
+    `ttl` (seconds) defaults to `CACHE_LOCAL_TTL`; `math.inf` keeps entries
+    until they're evicted or invalidated. `shared` caches also read and write
+    `shared_backend`, when one is configured, with `CACHE_SHARED_TTL`.
+    """
+
+    def __init__(
+        self, name: str, max_entries: int, ttl: Optional[float] = None, shared: bool = False
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = settings.CACHE_LOCAL_TTL if ttl is None else ttl
+        self.shared = shared
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[Hashable, Future] = {}
+        # Bumped by every invalidation, so a load that started before one
+        # can't store the value it read
+        self._generation = 0
+        CACHES[name] = self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self.name}:{key}"
+
+    def _local_get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    metrics.record_cache(self.name, True)
+                    return entry[1]
+                del self._entries[key]
+        metrics.record_cache(self.name, False)
+        return _MISSING
+
+    def _local_set(self, key: Hashable, value):
+        # Caller holds the lock
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _shared_set(self, key: Hashable, value):
+        if self.shared and shared_backend is not None:
+            shared_backend.set(
+                self._shared_key(key), orjson.dumps(value), settings.CACHE_SHARED_TTL
+            )
+
+    def get(self, key: Hashable, default=None):
+        """The locally cached value for `key`, or `default`."""
+        value = self._local_get(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value):
+        with self._lock:
+            self._local_set(key, value)
+        self._shared_set(key, value)
+
+    def invalidate(self, *keys: Hashable):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+                self._loading.pop(key, None)
+        if self.shared and shared_backend is not None:
+            shared_backend.delete([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._loading.clear()
+        if self.shared and shared_backend is not None:
+            shared_backend.delete_prefix(self._shared_key(""))
+
+    def _fill(self, key: Hashable, load: Callable[[], Any]):
+        """Shared tier, then `load`. Runs once per key at a time."""
+        if self.shared and shared_backend is not None:
+            raw = shared_backend.get(self._shared_key(key))
+            metrics.record_cache(f"{self.name}:shared", raw is not None)
+            if raw is not None:
+                return orjson.loads(raw), False
+        return load(), True
+
+    def _claim(self, key: Hashable) -> Tuple[Future, bool, int]:
+        with self._lock:
+            future = self._loading.get(key)
+            if future is not None:
+                return future, False, self._generation
+            future = self._loading[key] = Future()
+            return future, True, self._generation
+
+    def _finish(self, key: Hashable, future: Future, generation: int, filled):
+        value, loaded = filled
+        with self._lock:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+            current = generation == self._generation
+            if current:
+                self._local_set(key, value)
+        if current and loaded:
+            self._shared_set(key, value)
+        future.set_result(value)
+        return value
+
+    def _fail(self, key: Hashable, future: Future, exc: BaseException):
+        with self._lock:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+        future.set_exception(exc)
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]):
+        """The value for `key`, calling `load()` on a miss (once, however many callers)."""
+        value = self._local_get(key)
+        if value is not _MISSING:
+            return value
+        future, leader, generation = self._claim(key)
+        if not leader:
+            return future.result()
+        try:
+            filled = self._fill(key, load)
+        except BaseException as exc:
+            self._fail(key, future, exc)
+            raise
+        return self._finish(key, future, generation, filled)
+
+    async def aget_or_load(self, key: Hashable, load: Callable[[], Any]):
+        """`get_or_load` for async callers; `load` runs in the threadpool."""
+        value = self._local_get(key)
+        if value is not _MISSING:
+            return value
+        future, leader, generation = self._claim(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            filled = await run_in_threadpool(self._fill, key, load)
+        except BaseException as exc:
+            self._fail(key, future, exc)
+            raise
+        return self._finish(key, future, generation, filled)
+
+
+# Model -> caches to invalidate when one of its rows is written, and a
+# function from the row to the affected keys (None: the whole cache)
+_watchers: Dict[type, List[Tuple[Cache, Optional[Callable[[Any], Iterable[Hashable]]]]]] = {}
+
+
+def invalidate_on(
+    model: type,
+    cache: Cache,
+    keys: Optional[Callable[[Any], Iterable[Hashable]]] = None,
+):
+    """After a commit that inserted, updated or deleted `model` rows, drop their keys."""
+    _watchers.setdefault(model, []).append((cache, keys))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault("cache_invalidations", [])
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        for cache, keys in _watchers.get(type(instance), ()):
+            # Keys are computed now, while attribute history (e.g. a
+            # changed email's old value) is still available
+            pending.append((cache, None if keys is None else list(keys(instance))))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    for cache, keys in session.info.pop("cache_invalidations", ()):
+        if keys is None:
+            cache.clear()
+        else:
+            cache.invalidate(*keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("cache_invalidations", None)
+
+
+CACHE_ENTRIES = metrics.Gauge(
+    "zonosign_cache_entries",
+    "Entries held in this worker's caches.",
+    callback=lambda: sum(len(cache) for cache in CACHES.values()),
+)
@@ -0,0 +1,295 @@
+# compression.py
+"""
+Negotiated response compression.
+
+`CompressionMiddleware` compresses text/JSON responses with the best encoding
+the client accepts: zstd, then brotli, then gzip. gzip is always available;
+brotli and zstd are used when the optional `brotli` / `zstandard` packages are
+installed (`pip install .[compression]`). Small bodies, media, range and
+already-encoded responses pass through untouched. Streamed responses (the
+NDJSON/CSV exports) are compressed chunk by chunk.
+
+For cacheable listings `precompressed_json` goes further: the serialised body
+and each compressed variant are built once per content version (see
+`content_version`) and reused for every request until the content changes,
+so neither serialisation nor compression is paid per request.
+"""
+import gzip
+import hashlib
+import math
+import zlib
+from typing import Callable, Dict, Iterable, Optional
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+import cache
+import content_version
+import serialization
+from setttings import settings
+
+try:
+    import brotli
+except ImportError:  # optional: pip install .[compression]
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install .[compression]
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class _Encoder:
+    """One content-coding: one-shot compression plus a streaming compressor."""
+
+    name = ""
+    # Level used per request by the middleware, and the (slow, dense) level
+    # used for payloads that are compressed once and served many times.
+    level = 0
+    max_level = 0
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        raise NotImplementedError
+
+    def stream(self):
+        """Return `(compress_chunk, finish)` callables for a streamed body."""
+        raise NotImplementedError
+
+
+class _Gzip(_Encoder):
+    name, level, max_level = "gzip", 6, 9
+
+    def compress(self, data, level):
+        return gzip.compress(data, compresslevel=level, mtime=0)
+
+    def stream(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+
+class _Brotli(_Encoder):
+    name, level, max_level = "br", 4, 11
+
+    def compress(self, data, level):
+        return brotli.compress(data, quality=level)
+
+    def stream(self):
+        compressor = brotli.Compressor(quality=self.level)
+        return (
+            lambda chunk: compressor.process(chunk) + compressor.flush(),
+            compressor.finish,
+        )
+
+
+class _Zstd(_Encoder):
+    name, level, max_level = "zstd", 3, 19
+
+    def compress(self, data, level):
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def stream(self):
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return (
+            lambda chunk: compressor.compress(chunk)
+            + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+
+
+# Server preference order, used to break ties between equal q-values
+ENCODERS: Dict[str, _Encoder] = {
+    encoder.name: encoder
+    for encoder, available in (
+        (_Zstd(), zstandard is not None),
+        (_Brotli(), brotli is not None),
+        (_Gzip(), True),
+    )
+    if available
+}
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the best available encoding for an `Accept-Encoding` header, if any."""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        weights[coding.strip()] = q
+
+    best, best_q = None, 0.0
+    for name in ENCODERS:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _is_compressible(headers: MutableHeaders) -> bool:
+    content_type = headers.get("content-type", "")
+    return "content-encoding" not in headers and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing responses with the negotiated encoding.
+
+    Bodies sent in one piece are compressed only when they're at least
+    `minimum_size` bytes; streamed bodies are always compressed, chunk by
+    chunk, flushing after each so clients still receive rows as they're
+    produced.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+        if encoding is None or "range" in request_headers:
+            await self.app(scope, receive, send)
+            return
+
+        encoder = ENCODERS[encoding]
+        start_message = None
+        compress_chunk = finish = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compress_chunk, finish, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                passthrough = True
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if (
+                    start_message["status"] < 200
+                    or start_message["status"] in (204, 206, 304)
+                    or not _is_compressible(headers)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    body = encoder.compress(body, encoder.level)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                # Streamed: the compressed length isn't known up front
+                del headers["Content-Length"]
+                compress_chunk, finish = encoder.stream()
+                await send(start_message)
+                start_message = None
+
+            if more_body:
+                await send(
+                    {"type": "http.response.body", "body": compress_chunk(body), "more_body": True}
+                )
+            else:
+                await send({"type": "http.response.body", "body": compress_chunk(body) + finish()})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class _Payload:
+    """A serialised JSON body and its lazily built compressed variants."""
+
+    __slots__ = ("version", "body", "etag", "variants")
+
+    def __init__(self, version: str, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.variants: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        if encoding not in self.variants:
+            encoder = ENCODERS[encoding]
+            self.variants[encoding] = encoder.compress(self.body, encoder.max_level)
+        return self.variants[encoding]
+
+
+# Keyed by listing and content version, so entries never go stale; ones for
+# old versions are simply evicted
+_payloads = cache.Cache("precompressed", settings.PRECOMPRESSED_CACHE_ENTRIES, ttl=math.inf)
+
+
+async def precompressed_json(
+    request: Request,
+    connection,
+    key: str,
+    content: Iterable[str],
+    build: Callable[[], object],
+) -> Response:
+    """
+    Serve a JSON listing from the per-content-version payload cache.
+
+    `key` identifies the listing (including its query parameters), `content`
+    names the `content_version` counters it depends on and `build` produces
+    the response data (plain dicts/lists, see `serialization`) on a miss.
+    The body is serialised, and each encoding
+    compressed at its highest level, at most once per content version.
+    """
+    version = content_version.version_key(connection, content)
+    payload = _payloads.get(f"{key}@{version}")
+    if payload is None:
+        body = serialization.dumps(build())
+        payload = _Payload(version, body)
+        _payloads.set(f"{key}@{version}", payload)
+
+    headers = {"ETag": payload.etag, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == payload.etag:
+        return Response(status_code=304, headers=headers)
+
+    encoding = negotiate(request.headers.get("accept-encoding", ""))
+    if encoding is None or len(payload.body) < settings.COMPRESSION_MINIMUM_SIZE:
+        return Response(payload.body, media_type="application/json", headers=headers)
+
+    if encoding not in payload.variants:
+        # Highest-level brotli/zstd can take a while on a large page
+        await run_in_threadpool(payload.encoded, encoding)
+    headers["Content-Encoding"] = encoding
+    return Response(payload.encoded(encoding), media_type="application/json", headers=headers)
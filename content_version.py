@@ -0,0 +1,87 @@
+# content_version.py
+"""
+Version counters for cacheable content, shared by all workers.
+
+Every ORM flush that touches curriculum, dictionary or media rows bumps the
+matching counter in `content_versions` inside the same transaction. Models
+are listed in `TRACKED_MODELS` or registered with `watch` by the module that
+owns them (`media` registers media assets). Anything precomputed from that
+content (lesson bundles, compressed listings, ...) records the versions it
+was built from and is stale as soon as they differ.
+Because the counters live in the database, a change made through one worker
+invalidates derived data in every worker.
+
+Writes that bypass the ORM (Core bulk inserts) must call `bump` themselves.
+"""
+from typing import Dict, Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import ContentVersion, Lesson, Module, SignEntry
+
+CURRICULUM = "curriculum"
+DICTIONARY = "dictionary"
+MEDIA = "media"
+
+TRACKED_MODELS = {
+    Module: CURRICULUM,
+    Lesson: CURRICULUM,
+    SignEntry: DICTIONARY,
+}
+
+
+def watch(model: type, name: str):
+    """Bump the `name` counter whenever a `model` row is written through the ORM."""
+    TRACKED_MODELS[model] = name
+
+
+def bump(connection, names: Iterable[str]):
+    """Increment the given counters, creating them on first use."""
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}[connection.dialect.name]
+    for name in sorted(set(names)):
+        stmt = dialect.insert(ContentVersion).values(name=name, version=1)
+        connection.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["name"],
+                set_={"version": ContentVersion.version + 1},
+            )
+        )
+
+
+def set_version(connection, name: str, version: int):
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}[connection.dialect.name]
+    stmt = dialect.insert(ContentVersion).values(name=name, version=version)
+    connection.execute(
+        stmt.on_conflict_do_update(index_elements=["name"], set_={"version": version})
+    )
+
+
+def current(connection, names: Iterable[str]) -> Dict[str, int]:
+    names = list(names)
+    rows = connection.execute(
+        select(ContentVersion.name, ContentVersion.version).where(
+            ContentVersion.name.in_(names)
+        )
+    ).all()
+    versions = dict.fromkeys(names, 0)
+    versions.update(rows)
+    return versions
+
+
+def version_key(connection, names: Iterable[str]) -> str:
+    """A compact string like `curriculum.3-dictionary.12` for cache keys/ETags."""
+    versions = current(connection, names)
+    return "-".join(f"{name}.{version}" for name, version in sorted(versions.items()))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session, flush_context):
+    changed = {
+        TRACKED_MODELS[type(instance)]
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if type(instance) in TRACKED_MODELS
+    }
+    if changed:
+        bump(session.connection(), changed)
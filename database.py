@@ -1,21 +1,56 @@
-# database.py
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./zonosign.db"
+import metrics
+import profiling
+from setttings import settings
+
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args=(
+        {"check_same_thread": False}
+        if SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+        else {}
+    ),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    metrics.DB_QUERY_DURATION.observe(elapsed)
+    stats = metrics.query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+    profile = profiling.query_profile.get()
+    if profile is not None:
+        profile.record(statement, elapsed)
+
+
 def get_db():
-    db = SessionLocal()
+    # FastAPI runs this generator in its threadpool, while most handlers run
+    # their queries on the event loop. Checking the connection out here means
+    # waiting for a free pool slot blocks a worker thread instead of the loop,
+    # and binding the session to it keeps it for the whole request, so a
+    # commit halfway through doesn't send the handler back to the pool.
+    connection = engine.connect()
+    db = SessionLocal(bind=connection)
     try:
         yield db
     finally:
         db.close()
+        connection.close()
@@ -0,0 +1,102 @@
+# export.py
+"""
+Constant-memory streaming of query results as NDJSON or CSV.
+
+The query runs on its own connection inside the response generator (the
+request's `get_db` session is closed before a streaming body is sent) and
+rows are fetched `EXPORT_BATCH_SIZE` at a time with `yield_per`, so memory
+use doesn't depend on how many rows the export covers. CSV cells holding
+JSON columns are written as JSON text, the same layout `sign_import.py`
+reads back.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterator, List, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import JSON
+
+from database import engine
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _ndjson_lines(names: List[str], rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(names, row)), default=_json_default) + "\n" for row in rows
+    )
+
+
+def _csv_lines(names: List[str], json_columns: set, rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            [
+                json.dumps(value) if name in json_columns and value is not None
+                else value.isoformat() if isinstance(value, datetime)
+                else value
+                for name, value in zip(names, row)
+            ]
+        )
+    return buffer.getvalue()
+
+
+def _generate(statements: Sequence, format: ExportFormat) -> Iterator[str]:
+    names = [column.name for column in statements[0].selected_columns]
+    json_columns = {
+        column.name
+        for statement in statements
+        for column in statement.selected_columns
+        if isinstance(column.type, JSON)
+    }
+    if format == ExportFormat.csv:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(names)
+        yield buffer.getvalue()
+
+    with engine.connect() as conn:
+        for statement in statements:
+            result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(statement)
+            for rows in result.partitions():
+                if format == ExportFormat.csv:
+                    yield _csv_lines(names, json_columns, rows)
+                else:
+                    yield _ndjson_lines(names, rows)
+
+
+def stream_export(statements, format: ExportFormat, filename: str) -> StreamingResponse:
+    """
+    Stream the rows of a Core `select()` as an NDJSON or CSV download.
+
+    A list of selects with the same columns is streamed one after another.
+    """
+    if not isinstance(statements, (list, tuple)):
+        statements = [statements]
+    return StreamingResponse(
+        _generate(statements, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{format.value}"'
+        },
+    )
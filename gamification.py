@@ -0,0 +1,212 @@
+# gamification.py
+"""
+Points leaderboards and daily streaks, kept as running counters.
+
+Completing a lesson or ending a practice session awards points. Rather than
+summing `user_progress` and `practice_sessions` at read time, each award is
+added to one counter row per leaderboard window the activity falls in:
+today (`day:2025-01-31`), this ISO week (`week:2025-W05`) and all time
+(`all`). A window is just a key, so rollover needs no job: the first award
+after midnight (or Monday) starts a new row, and the old window simply stops
+being read. `prune` drops windows that are no longer shown.
+
+Top-N reads walk the `(period, points, user_id)` index backwards from the
+top, and later pages continue from a `(points, user_id)` cursor, so a page
+costs the same however many users have points. Ties are broken by user ID.
+
+Streaks are one row per user holding the current and longest run of
+consecutive active UTC days and the last active day; a streak that has
+lapsed reads as 0 without anything having to reset it.
+"""
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, func, or_, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import LeaderboardScore, User, UserStreak
+
+LESSON_BASE_POINTS = 10
+LESSON_SCORE_POINTS = 40  # on top of the base, scaled by the lesson score (0-1)
+SESSION_POINTS_PER_MINUTE = 1
+SESSION_MAX_POINTS = 30
+
+# Windows older than these are no longer shown and can be pruned
+KEEP_DAYS = 7
+KEEP_WEEKS = 8
+
+
+class LeaderboardPeriod(str, Enum):
+    daily = "daily"
+    weekly = "weekly"
+    all_time = "all-time"
+
+
+def window(period: LeaderboardPeriod, day: date) -> str:
+    """The counter key for the `period` window containing `day`."""
+    if period is LeaderboardPeriod.daily:
+        return f"day:{day.isoformat()}"
+    if period is LeaderboardPeriod.weekly:
+        year, week, _ = day.isocalendar()
+        return f"week:{year}-W{week:02d}"
+    return "all"
+
+
+def lesson_points(score: float) -> int:
+    return LESSON_BASE_POINTS + round(LESSON_SCORE_POINTS * score)
+
+
+def session_points(duration_seconds: int, accuracy: Optional[float]) -> int:
+    minutes = min(duration_seconds // 60, SESSION_MAX_POINTS // SESSION_POINTS_PER_MINUTE)
+    points = minutes * SESSION_POINTS_PER_MINUTE
+    return round(points * accuracy) if accuracy is not None else points
+
+
+def record_activity(db: Session, user_id: int, points: int, at: datetime) -> UserStreak:
+    """
+    Add `points` to the user's counters for every window `at` falls in and
+    extend their streak. Doesn't commit: call it in the transaction that
+    records the activity itself.
+    """
+    day = at.date()
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}[db.get_bind().dialect.name]
+    if points:
+        statement = dialect.insert(LeaderboardScore)
+        db.connection().execute(
+            statement.on_conflict_do_update(
+                index_elements=["period", "user_id"],
+                set_={
+                    "points": LeaderboardScore.points + statement.excluded.points,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            ),
+            [
+                {
+                    "period": window(period, day),
+                    "user_id": user_id,
+                    "points": points,
+                    "updated_at": at,
+                }
+                for period in LeaderboardPeriod
+            ],
+        )
+
+    # Lesson completions (request path) and session finalisation (job thread)
+    # can both create a new user's streak at once; insert it race-free first
+    db.connection().execute(
+        dialect.insert(UserStreak)
+        .values(user_id=user_id, current_days=0, longest_days=0)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    streak = db.get(UserStreak, user_id)
+    if streak.last_active_date != day:
+        if streak.last_active_date == day - timedelta(days=1):
+            streak.current_days += 1
+        else:
+            streak.current_days = 1
+        streak.longest_days = max(streak.longest_days, streak.current_days)
+        streak.last_active_date = day
+    return streak
+
+
+def current_streak(streak: Optional[UserStreak], today: date) -> dict:
+    """A user's streak as of `today`; a streak last extended before yesterday has lapsed."""
+    if streak is None or streak.last_active_date is None:
+        return {
+            "current_days": 0,
+            "longest_days": 0,
+            "last_active_date": None,
+            "active_today": False,
+        }
+    alive = streak.last_active_date >= today - timedelta(days=1)
+    return {
+        "current_days": streak.current_days if alive else 0,
+        "longest_days": streak.longest_days,
+        "last_active_date": streak.last_active_date,
+        "active_today": streak.last_active_date == today,
+    }
+
+
+def _parse_cursor(after: str) -> Tuple[int, int, int]:
+    try:
+        points, user_id, rank = (int(part) for part in after.split(":"))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return points, user_id, rank
+
+
+def top(
+    db: Session, key: str, limit: int, after: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of the `key` window, best first, and the cursor for the next page.
+
+    `after` is the previous page's cursor (`points:user_id:rank`); the next
+    cursor is None on the last page.
+    """
+    statement = (
+        select(LeaderboardScore.user_id, User.username, LeaderboardScore.points)
+        .join(User, User.id == LeaderboardScore.user_id)
+        .where(LeaderboardScore.period == key)
+        .order_by(LeaderboardScore.points.desc(), LeaderboardScore.user_id.desc())
+        .limit(limit)
+    )
+    rank = 0
+    if after:
+        points, user_id, rank = _parse_cursor(after)
+        statement = statement.where(
+            tuple_(LeaderboardScore.points, LeaderboardScore.user_id) < (points, user_id)
+        )
+    items = [
+        {"rank": rank + i, "user_id": row.user_id, "username": row.username, "points": row.points}
+        for i, row in enumerate(db.execute(statement), start=1)
+    ]
+    next_after = None
+    if len(items) == limit:
+        last = items[-1]
+        next_after = f"{last['points']}:{last['user_id']}:{last['rank']}"
+    return items, next_after
+
+
+def standing(db: Session, key: str, user_id: int) -> Optional[dict]:
+    """
+    The user's entry in the `key` window, or None if they have no points in it.
+
+    Counting the users ahead is an index range scan as long as the user's rank.
+    """
+    row = db.execute(
+        select(LeaderboardScore.points, User.username)
+        .join(User, User.id == LeaderboardScore.user_id)
+        .where(LeaderboardScore.period == key, LeaderboardScore.user_id == user_id)
+    ).one_or_none()
+    if row is None:
+        return None
+    ahead = db.execute(
+        select(func.count()).where(
+            LeaderboardScore.period == key,
+            or_(
+                LeaderboardScore.points > row.points,
+                and_(LeaderboardScore.points == row.points, LeaderboardScore.user_id > user_id),
+            ),
+        )
+    ).scalar_one()
+    return {"rank": ahead + 1, "user_id": user_id, "username": row.username, "points": row.points}
+
+
+def prune(db: Session, today: date) -> int:
+    """Delete daily and weekly windows older than KEEP_DAYS / KEEP_WEEKS."""
+    oldest_day = window(LeaderboardPeriod.daily, today - timedelta(days=KEEP_DAYS))
+    oldest_week = window(LeaderboardPeriod.weekly, today - timedelta(weeks=KEEP_WEEKS))
+    result = db.execute(
+        delete(LeaderboardScore).where(
+            or_(
+                and_(LeaderboardScore.period.like("day:%"), LeaderboardScore.period < oldest_day),
+                and_(LeaderboardScore.period.like("week:%"), LeaderboardScore.period < oldest_week),
+            )
+        )
+    )
+    db.commit()
+    return result.rowcount
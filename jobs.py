@@ -0,0 +1,411 @@
+# jobs.py
+"""
+Durable background jobs, run in-process by every API worker.
+
+Work that doesn't need to finish before the response (sending email,
+rebuilding derived tables, pruning) is recorded as a row in the `jobs` table
+and picked up by a `JobRunner` running on each worker's event loop:
+
+    @jobs.task("send_password_reset", max_attempts=3)
+    def send_password_reset(db: Session, payload: dict): ...
+
+    jobs.enqueue(db, "send_password_reset", {"email": email})
+    db.commit()
+
+`enqueue` joins the caller's transaction, so a job exists only if the work
+that caused it was committed, and wakes this worker's runner once it is.
+Handlers are plain functions run in the threadpool with their own session.
+
+Workers claim jobs with a conditional UPDATE (`status = 'queued'`), so each
+job runs once even with several workers polling the same table. A claim is a
+lease, renewed every third of `JOB_LEASE_SECONDS` while the handler runs; a
+job whose lease lapses (its worker died) is queued again, or marked `failed`
+if that was its last attempt. Failures are retried with exponential backoff
+and jitter up to the task's `max_attempts`, then marked `failed` with the
+error kept for the status API. Concurrency is capped per worker
+(`JOB_CONCURRENCY`) and per task.
+
+Periodic tasks (`jobs.periodic`) are enqueued under a dedupe key naming the
+current time slot, so each slot produces one job however many workers there
+are.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from database import SessionLocal, engine
+from models import Job
+from setttings import settings
+
+logger = logging.getLogger("zonosign.jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: Callable[[Session, dict], Any]
+    max_attempts: int
+    concurrency: int  # per worker
+
+
+@dataclass(frozen=True)
+class Schedule:
+    task: str
+    every: float  # seconds
+    payload: Optional[dict] = None
+
+
+TASKS: Dict[str, Task] = {}
+SCHEDULES: List[Schedule] = []
+
+
+def task(name: str, max_attempts: Optional[int] = None, concurrency: int = 1):
+    """Register a job handler `func(db, payload)`; its return value is stored as the result."""
+
+    def register(func):
+        TASKS[name] = Task(name, func, max_attempts or settings.JOB_MAX_ATTEMPTS, concurrency)
+        return func
+
+    return register
+
+
+def periodic(name: str, every: float, payload: Optional[dict] = None):
+    """Enqueue task `name` once every `every` seconds, across all workers."""
+    SCHEDULES.append(Schedule(name, every, payload))
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[dict] = None,
+    user_id: Optional[int] = None,
+    delay: float = 0.0,
+    dedupe_key: Optional[str] = None,
+) -> Optional[int]:
+    """
+    Add a job in `db`'s transaction; it becomes runnable when that commits.
+
+    Returns the job ID, or None if a job with `dedupe_key` already exists.
+    """
+    if kind not in TASKS:
+        raise ValueError(f"Unknown job kind: {kind!r}")
+    values = {
+        "kind": kind,
+        "payload": payload or {},
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": TASKS[kind].max_attempts,
+        "run_at": datetime.utcnow() + timedelta(seconds=delay),
+        "dedupe_key": dedupe_key,
+        "user_id": user_id,
+        "created_at": datetime.utcnow(),
+    }
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}[db.get_bind().dialect.name]
+    statement = dialect.insert(Job).values(values)
+    if dedupe_key is not None:
+        statement = statement.on_conflict_do_nothing(index_elements=["dedupe_key"])
+    result = db.connection().execute(statement.returning(Job.id))
+    job_id = result.scalar_one_or_none()
+    if job_id is not None:
+        event.listen(db, "after_commit", lambda session: runner.notify(), once=True)
+    return job_id
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(
+        settings.JOB_BACKOFF_MAX_SECONDS, settings.JOB_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobRunner:
+    def __init__(self, concurrency: int, poll_interval: float, lease_seconds: int):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease_seconds)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Dict[asyncio.Task, str] = {}  # in-flight job -> kind
+        self._scheduled_slots: Dict[str, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def __len__(self):
+        return len(self._running)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="job-runner")
+
+    async def stop(self, timeout: float):
+        """Stop claiming, give running jobs `timeout` seconds, then release the rest."""
+        self._stopping = True
+        if self._task is None:
+            return
+        self.notify()
+        await self._task
+        if self._running:
+            _, pending = await asyncio.wait(list(self._running), timeout=timeout)
+            for job in pending:
+                job.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._task = None
+
+    def notify(self):
+        """Wake the runner to claim new jobs now. Safe from any thread."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while not self._stopping:
+            # Cleared before polling so a notify() during the poll isn't lost
+            self._wake.clear()
+            try:
+                await run_in_threadpool(self._schedule_periodic)
+                claimed = await run_in_threadpool(
+                    self._claim, self._free_slots(), self.concurrency - len(self._running)
+                )
+            except Exception:
+                logger.exception("Job runner failed to poll the jobs table")
+                claimed = []
+            for job in claimed:
+                execution = asyncio.create_task(self._execute(job))
+                self._running[execution] = job.kind
+                execution.add_done_callback(self._finished)
+            if not claimed or not self._free_slots():
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _finished(self, execution: asyncio.Task):
+        self._running.pop(execution, None)
+        if not self._stopping:
+            self._wake.set()
+
+    def _free_slots(self) -> Dict[str, int]:
+        """How many more jobs of each kind this worker may start."""
+        total = self.concurrency - len(self._running)
+        if total <= 0:
+            return {}
+        running: Dict[str, int] = {}
+        for kind in self._running.values():
+            running[kind] = running.get(kind, 0) + 1
+        slots = {}
+        for name, registered in TASKS.items():
+            free = min(total, registered.concurrency - running.get(name, 0))
+            if free > 0:
+                slots[name] = free
+        return slots
+
+    def _schedule_periodic(self):
+        now = time.time()
+        due = []
+        for schedule in SCHEDULES:
+            slot = int(now // schedule.every)
+            if self._scheduled_slots.get(schedule.task) != slot:
+                due.append((schedule, slot))
+        if not due:
+            return
+        db = SessionLocal()
+        try:
+            for schedule, slot in due:
+                enqueue(db, schedule.task, schedule.payload, dedupe_key=f"{schedule.task}@{slot}")
+            db.commit()
+        finally:
+            db.close()
+        for schedule, slot in due:
+            self._scheduled_slots[schedule.task] = slot
+
+    def _claim(self, slots: Dict[str, int], total: int) -> List[Job]:
+        if not slots or total <= 0:
+            return []
+        now = datetime.utcnow()
+        claimed: List[int] = []
+        with engine.begin() as connection:
+            # Leases left behind by a worker that died mid-job. A job that
+            # keeps killing its worker mustn't be retried forever.
+            expired = (Job.status == RUNNING, Job.locked_at < now - self.lease)
+            connection.execute(
+                update(Job)
+                .where(*expired, Job.attempts >= Job.max_attempts)
+                .values(
+                    status=FAILED,
+                    last_error="Lease expired: the worker running it stopped",
+                    locked_by=None,
+                    locked_at=None,
+                    finished_at=now,
+                )
+            )
+            connection.execute(
+                update(Job)
+                .where(*expired)
+                .values(status=QUEUED, locked_by=None, locked_at=None)
+            )
+            candidates = connection.execute(
+                select(Job.id, Job.kind)
+                .where(Job.status == QUEUED, Job.run_at <= now, Job.kind.in_(list(slots)))
+                .order_by(Job.run_at, Job.id)
+                .limit(total * 2)
+            ).all()
+            for job_id, kind in candidates:
+                if len(claimed) == total:
+                    break
+                if not slots.get(kind):
+                    continue
+                # Conditional so only one worker wins each job
+                won = connection.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == QUEUED)
+                    .values(
+                        status=RUNNING,
+                        locked_by=self.worker_id,
+                        locked_at=now,
+                        attempts=Job.attempts + 1,
+                    )
+                ).rowcount
+                if won:
+                    claimed.append(job_id)
+                    slots[kind] -= 1
+        if not claimed:
+            return []
+        db = SessionLocal()
+        try:
+            jobs = db.execute(
+                select(Job).where(Job.id.in_(claimed)).order_by(Job.id)
+            ).scalars().all()
+            db.expunge_all()
+            return jobs
+        finally:
+            db.close()
+
+    async def _execute(self, job: Job):
+        handler = TASKS[job.kind]
+        started = time.perf_counter()
+        heartbeat = asyncio.create_task(self._keep_lease(job.id))
+        try:
+            try:
+                result = await run_in_threadpool(self._call, handler, job.payload or {})
+            finally:
+                heartbeat.cancel()
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back without spending an attempt
+            await run_in_threadpool(self._release, job.id)
+            raise
+        except Exception as exc:
+            error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+            retry = job.attempts < job.max_attempts
+            logger.warning(
+                "Job %s (%s) attempt %d/%d failed: %s",
+                job.id, job.kind, job.attempts, job.max_attempts, error,
+            )
+            await run_in_threadpool(self._record_failure, job, error, retry)
+            metrics.JOBS.inc(kind=job.kind, outcome="retried" if retry else "failed")
+        else:
+            await run_in_threadpool(self._record_success, job, result)
+            metrics.JOBS.inc(kind=job.kind, outcome="succeeded")
+        finally:
+            metrics.JOB_DURATION.observe(time.perf_counter() - started, kind=job.kind)
+
+    async def _keep_lease(self, job_id: int):
+        """Renew the job's lease until cancelled, so a long job isn't reclaimed."""
+        interval = self.lease.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_in_threadpool(self._renew, job_id)
+            except Exception:
+                logger.exception("Failed to renew the lease on job %s", job_id)
+
+    def _renew(self, job_id: int):
+        with engine.begin() as connection:
+            connection.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.locked_by == self.worker_id, Job.status == RUNNING)
+                .values(locked_at=datetime.utcnow())
+            )
+
+    @staticmethod
+    def _call(handler: Task, payload: dict):
+        db = SessionLocal()
+        try:
+            return handler.func(db, payload)
+        finally:
+            db.close()
+
+    def _release(self, job_id: int):
+        with engine.begin() as connection:
+            connection.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.locked_by == self.worker_id)
+                .values(status=QUEUED, locked_by=None, locked_at=None, attempts=Job.attempts - 1)
+            )
+
+    def _record_success(self, job: Job, result):
+        with engine.begin() as connection:
+            connection.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.locked_by == self.worker_id)
+                .values(
+                    status=SUCCEEDED,
+                    result=result,
+                    last_error=None,
+                    locked_by=None,
+                    locked_at=None,
+                    finished_at=datetime.utcnow(),
+                )
+            )
+
+    def _record_failure(self, job: Job, error: str, retry: bool):
+        now = datetime.utcnow()
+        values = {"last_error": error, "locked_by": None, "locked_at": None}
+        if retry:
+            values.update(status=QUEUED, run_at=now + timedelta(seconds=_backoff(job.attempts)))
+        else:
+            values.update(status=FAILED, finished_at=now)
+        with engine.begin() as connection:
+            connection.execute(
+                update(Job).where(Job.id == job.id, Job.locked_by == self.worker_id).values(values)
+            )
+
+
+def prune(db: Session) -> int:
+    """Delete jobs that finished more than JOB_RETENTION_DAYS ago."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    result = db.execute(
+        delete(Job).where(Job.status.in_([SUCCEEDED, FAILED]), Job.finished_at < cutoff)
+    )
+    db.commit()
+    return result.rowcount
+
+
+runner = JobRunner(
+    settings.JOB_CONCURRENCY, settings.JOB_POLL_INTERVAL, settings.JOB_LEASE_SECONDS
+)
+
+JOBS_RUNNING = metrics.Gauge(
+    "zonosign_jobs_running",
+    "Background jobs this worker is running.",
+    callback=lambda: len(runner),
+)
@@ -0,0 +1,186 @@
+# localized.py
+"""
+Per-language dictionary views, materialised in `localized_signs`.
+
+Every sign stores both an `asl_variant` and a `bsl_variant`. For each
+language we keep one precomputed row per sign holding the sign with that
+language's variant merged in, already serialised to JSON: variant keys that
+name a sign field (`handshapes`, `location`, `video_url`, ...) override it,
+anything else is returned under `variant`. Listing a language's dictionary
+then just concatenates stored payloads, with no JSON decoding, merging or
+encoding per request, and ships one variant instead of two.
+
+The view is kept in step with the dictionary:
+
+- ORM changes to `SignEntry` refresh the affected rows in the same flush;
+- bulk writes (`sign_import.py`, synthetic seeding) are caught by comparing
+  the dictionary version the view was built from with the current one, and
+  the view is rebuilt in full (`rebuild`) by the `rebuild_localized_signs`
+  job. The first read that notices queues it (`request_rebuild`) and keeps
+  serving the existing rows meanwhile; the job also runs every minute.
+"""
+from enum import Enum
+from typing import Iterable, List
+
+import orjson
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+
+import content_version
+import jobs
+from database import engine
+from models import ContentVersion, LocalizedSign, SignEntry
+from schemas import LocalizedSignResponse, SignEntryResponse
+
+# `content_versions` row holding the dictionary version the view reflects
+VIEW_VERSION = "localized_signs"
+REBUILD_BATCH_SIZE = 2000
+
+
+class SignLanguage(str, Enum):
+    ASL = "ASL"
+    BSL = "BSL"
+
+
+VARIANT_COLUMNS = {
+    SignLanguage.ASL: "asl_variant",
+    SignLanguage.BSL: "bsl_variant",
+}
+OVERRIDABLE_FIELDS = set(LocalizedSignResponse.model_fields) - {
+    "id",
+    "language",
+    "created_at",
+    "variant",
+}
+SOURCE_COLUMNS = [SignEntry.__table__.c[name] for name in SignEntryResponse.model_fields]
+
+# Dictionary version this worker last queued a rebuild for, so reads while the
+# job is pending don't each try to enqueue it
+_requested_version = None
+
+
+def localize(sign: dict, language: SignLanguage) -> dict:
+    """Merge `language`'s variant into a sign row (a `SignEntryResponse` dict)."""
+    variant = dict(sign.get(VARIANT_COLUMNS[language]) or {})
+    merged = {}
+    for name in LocalizedSignResponse.model_fields:
+        if name == "language":
+            merged[name] = language.value
+        elif name == "variant":
+            merged[name] = variant or None
+        elif name in OVERRIDABLE_FIELDS and name in variant:
+            merged[name] = variant.pop(name)
+        else:
+            merged[name] = sign.get(name)
+    return merged
+
+
+def _rows(signs: Iterable[dict]) -> List[dict]:
+    return [
+        {
+            "language": language.value,
+            "sign_id": sign["id"],
+            "category": sign["category"],
+            "difficulty": sign["difficulty"],
+            "payload": orjson.dumps(localize(sign, language)),
+        }
+        for sign in signs
+        for language in SignLanguage
+    ]
+
+
+def _insert(connection, rows: List[dict]):
+    if rows:
+        connection.execute(insert(LocalizedSign), rows)
+
+
+def refresh(connection, sign_ids: Iterable[int]):
+    """Recompute the view rows of specific signs (deleted signs are dropped)."""
+    sign_ids = list(sign_ids)
+    connection.execute(delete(LocalizedSign).where(LocalizedSign.sign_id.in_(sign_ids)))
+    signs = connection.execute(
+        select(*SOURCE_COLUMNS).where(SignEntry.id.in_(sign_ids))
+    ).mappings()
+    _insert(connection, _rows(signs))
+
+
+def rebuild(connection) -> int:
+    """Recompute the whole view in batches; returns the number of signs."""
+    version = content_version.current(connection, [content_version.DICTIONARY])
+    connection.execute(delete(LocalizedSign))
+    last_id, count = 0, 0
+    while True:
+        signs = connection.execute(
+            select(*SOURCE_COLUMNS)
+            .where(SignEntry.id > last_id)
+            .order_by(SignEntry.id)
+            .limit(REBUILD_BATCH_SIZE)
+        ).mappings().all()
+        if not signs:
+            break
+        _insert(connection, _rows(signs))
+        last_id = signs[-1]["id"]
+        count += len(signs)
+
+    content_version.set_version(connection, VIEW_VERSION, version[content_version.DICTIONARY])
+    return count
+
+
+def is_stale(connection) -> bool:
+    """Whether the view lags the dictionary (or has never been built)."""
+    versions = dict(
+        connection.execute(
+            select(ContentVersion.name, ContentVersion.version).where(
+                ContentVersion.name.in_([content_version.DICTIONARY, VIEW_VERSION])
+            )
+        ).all()
+    )
+    # No marker at all means the view has never been built
+    return VIEW_VERSION not in versions or versions[VIEW_VERSION] != versions.get(
+        content_version.DICTIONARY, 0
+    )
+
+
+def ensure_fresh():
+    """Rebuild the view unless it's current (an earlier job may have just rebuilt it)."""
+    with engine.begin() as connection:
+        if is_stale(connection):
+            rebuild(connection)
+
+
+def request_rebuild(db: Session):
+    """Queue one rebuild job for the current dictionary version, and commit."""
+    global _requested_version
+    version = content_version.current(db.connection(), [content_version.DICTIONARY])[
+        content_version.DICTIONARY
+    ]
+    if version == _requested_version:
+        return
+    # One job per version across all workers, whoever notices first
+    jobs.enqueue(db, "rebuild_localized_signs", dedupe_key=f"{VIEW_VERSION}@{version}")
+    db.commit()
+    _requested_version = version
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_flush(session, flush_context):
+    changed = {
+        instance.id
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(instance, SignEntry)
+    }
+    if not changed:
+        return
+    connection = session.connection()
+    refresh(connection, changed)
+    # `content_version`'s listener (registered first, on import) has already
+    # bumped the dictionary version for this flush. Follow it only if the
+    # view was current before, so a pending full rebuild isn't masked.
+    new_version = content_version.current(connection, [content_version.DICTIONARY])[
+        content_version.DICTIONARY
+    ]
+    connection.execute(
+        update(ContentVersion)
+        .where(ContentVersion.name == VIEW_VERSION, ContentVersion.version == new_version - 1)
+        .values(version=new_version)
+    )
@@ -0,0 +1,126 @@
+# loop_monitor.py
+"""
+Continuous event-loop lag measurement and blocking-call detection.
+
+A background task repeatedly sleeps for `interval` seconds and records how
+much later than requested it was woken. Anything running on the loop without
+yielding (sync SQLAlchemy calls, CPU-bound work) shows up as lag.
+
+Lag measured that way is only known once the loop is free again, so a
+watchdog thread also checks the task's heartbeat. When the loop has not
+ticked for `block_threshold` seconds it captures the loop thread's stack,
+which points at the code that is blocking it, and logs it.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Optional
+
+import metrics
+from setttings import settings
+
+logger = logging.getLogger("zonosign.loop")
+
+LOOP_LAG = metrics.Histogram(
+    "zonosign_event_loop_lag_seconds",
+    "How late the event loop woke a sleeping task.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_BLOCKED = metrics.Counter(
+    "zonosign_event_loop_blocked_total",
+    "Times the event loop was blocked for longer than LOOP_BLOCK_THRESHOLD_MS.",
+)
+LOOP_BLOCK_DURATION = metrics.Histogram(
+    "zonosign_event_loop_block_duration_seconds",
+    "How long the event loop stayed blocked once the watchdog noticed.",
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float, block_threshold: Optional[float] = None):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.lag = 0.0
+        self.recent_blocks: Deque[dict] = deque(maxlen=20)
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        while True:
+            self._heartbeat = time.monotonic()
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - start - self.interval)
+            LOOP_LAG.observe(self.lag)
+
+    def _watch(self):
+        blocked_since = None
+        stack = None
+        while not self._stopping.wait(self.interval / 2):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled >= self.block_threshold:
+                if blocked_since is None:
+                    blocked_since = self._heartbeat + self.interval
+                    stack = self._capture_stack()
+                    LOOP_BLOCKED.inc()
+                    logger.warning(
+                        "Event loop blocked for %.0f ms, currently in:\n%s",
+                        stalled * 1000,
+                        stack,
+                    )
+            elif blocked_since is not None:
+                duration = time.monotonic() - blocked_since
+                LOOP_BLOCK_DURATION.observe(duration)
+                self.recent_blocks.append(
+                    {"duration_ms": round(duration * 1000, 1), "stack": stack}
+                )
+                logger.warning("Event loop unblocked after %.0f ms", duration * 1000)
+                blocked_since = None
+                stack = None
+
+    def _capture_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "<loop thread not found>"
+        return "".join(traceback.format_stack(frame))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if self.block_threshold and self._watchdog is None:
+            self._stopping.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self):
+        if self._watchdog is not None:
+            self._stopping.set()
+            self._watchdog.join()
+            self._watchdog = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+monitor = LoopLagMonitor(
+    settings.LOOP_LAG_INTERVAL_MS / 1000,
+    block_threshold=(
+        settings.LOOP_BLOCK_THRESHOLD_MS / 1000 if settings.LOOP_WATCHDOG_ENABLED else None
+    ),
+)
@@ -1,24 +1,77 @@
 # main.py
+import os
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
-from database import engine
-from models import Base
-from routers import auth, users, curriculum, dictionary, progress, transcription
+from database import engine, SessionLocal
+from sqlalchemy.orm import selectinload
+from models import Base, Module, SignEntry
+from routers import (
+    auth,
+    users,
+    curriculum,
+    dictionary,
+    progress,
+    transcription,
+    health,
+    media,
+    reviews,
+    jobs as jobs_router,
+)
 from scalar_fastapi import get_scalar_api_reference
+from setttings import settings
+import metrics
+from compression import CompressionMiddleware
+from rate_limit import AdmissionControlMiddleware
+import jobs
+import profiling
+import revocation
+import tasks  # registers background job handlers
+from loop_monitor import monitor as loop_monitor
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
 
+def warm_up():
+    """
+    Run the hot curriculum and dictionary queries once before serving traffic.
+
+    This opens the first pooled connection, fills SQLAlchemy's compiled
+    statement cache and pulls the relevant pages into SQLite's page cache, so
+    the first real requests a worker handles don't pay for any of it.
+    """
+    db = SessionLocal()
+    try:
+        db.query(Module).options(selectinload(Module.lessons)).filter(
+            Module.is_active == True
+        ).order_by(Module.order_index).all()
+        db.query(SignEntry).limit(100).all()
+    finally:
+        db.close()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("Starting ZonoSign API...")
+    print(f"Starting ZonoSign API (pid {os.getpid()})...")
+    if settings.WARM_UP_ON_STARTUP:
+        warm_up()
+    loop_monitor.start()
+    await revocation.store.start()
+    if settings.JOBS_ENABLED:
+        await jobs.runner.start()
     yield
-    # Shutdown
-    print("Shutting down ZonoSign API...")
+    # Shutdown: uvicorn has stopped accepting connections and drained
+    # in-flight requests (up to GRACEFUL_SHUTDOWN_TIMEOUT) before we get here.
+    # Jobs still running after the timeout go back to the queue.
+    await jobs.runner.stop(timeout=settings.GRACEFUL_SHUTDOWN_TIMEOUT)
+    await revocation.store.stop()
+    await loop_monitor.stop()
+    engine.dispose()
+    print(f"Shutting down ZonoSign API (pid {os.getpid()})...")
 
 
 app = FastAPI(
@@ -36,6 +89,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.QUERY_PROFILING:
+    app.add_middleware(
+        profiling.QueryProfilerMiddleware,
+        repeat_threshold=settings.QUERY_PROFILING_REPEAT_THRESHOLD,
+    )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+if settings.MAX_IN_FLIGHT_REQUESTS:
+    app.add_middleware(
+        AdmissionControlMiddleware, max_in_flight=settings.MAX_IN_FLIGHT_REQUESTS
+    )
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/v1/auth", tags=["Authentication"])
@@ -43,9 +107,13 @@ app.include_router(users.router, prefix="/v1/users", tags=["Users"])
 app.include_router(curriculum.router, prefix="/v1/curriculum", tags=["Curriculum"])
 app.include_router(dictionary.router, prefix="/v1/dictionary", tags=["Dictionary"])
 app.include_router(progress.router, prefix="/v1/progress", tags=["Progress"])
+app.include_router(reviews.router, prefix="/v1/reviews", tags=["Reviews"])
+app.include_router(jobs_router.router, prefix="/v1/jobs", tags=["Jobs"])
 app.include_router(
     transcription.router, prefix="/v1/transcription", tags=["Transcription"]
 )
+app.include_router(health.router, tags=["Health"])
+app.include_router(media.router, tags=["Media"])
 
 
 @app.get("/")
@@ -53,9 +121,18 @@ async def root():
     return {"message": "ZonoSign API v1.0.0", "status": "active"}
 
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy", "service": "zonosign-api"}
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+if settings.QUERY_PROFILING:
+
+    @app.get("/debug/query-profiles", include_in_schema=False)
+    async def query_profiles():
+        return list(profiling.recent_reports)
 
 
 @app.get("/scalar", include_in_schema=False)
@@ -68,4 +145,16 @@ async def scalar_html():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8024)
+    workers = settings.WORKERS or os.cpu_count() or 1
+    # Tables are created above when this process imports the module, before
+    # any worker is spawned. Each worker re-imports `main:app`, so create_all
+    # runs again there, but it only checks that the tables exist. The worker
+    # then runs `warm_up` in its lifespan and only starts accepting
+    # connections once that is done.
+    uvicorn.run(
+        app if workers == 1 else "main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
@@ -0,0 +1,211 @@
+# media.py
+"""
+Local media storage for sign videos, animations and lesson content.
+
+Media URLs stored on models (`SignEntry.video_url`, `Lesson.content["url"]`,
+...) look like `/videos/lesson1.mp4` and map onto files under `MEDIA_ROOT`.
+`scan_media` hashes every file once and stores its size, SHA-256, duration
+and content type in `media_assets`, so serving a request never reads the file
+just to compute an ETag. Per-path metadata is also kept in memory, keyed by
+the file's size and mtime, so repeated range requests from a video player
+cost one `stat` and no database round trip.
+
+Usage:
+    python media.py scan
+"""
+import hashlib
+import mimetypes
+import os
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+import content_version
+from database import SessionLocal, engine
+from models import Base, MediaAsset
+from setttings import settings
+
+MEDIA_ROOT = Path(settings.MEDIA_ROOT).resolve()
+MEDIA_PREFIXES = ("videos", "animations")
+
+mimetypes.add_type("model/gltf-binary", ".glb")
+mimetypes.add_type("model/gltf+json", ".gltf")
+
+# Scans write MediaAsset rows; derived data (lesson bundles) keys on this
+content_version.watch(MediaAsset, content_version.MEDIA)
+
+_metadata_cache: Dict[str, dict] = {}
+_metadata_lock = threading.Lock()
+
+
+def resolve_media_path(relative_path: str) -> Optional[Path]:
+    """Map `videos/x.mp4` to a file under MEDIA_ROOT, refusing path traversal."""
+    path = (MEDIA_ROOT / relative_path).resolve()
+    if not path.is_relative_to(MEDIA_ROOT) or not path.is_file():
+        return None
+    return path
+
+
+def media_url_to_path(url: str) -> Optional[str]:
+    """`/videos/x.mp4` -> `videos/x.mp4`, or None for URLs we don't serve."""
+    relative = url.lstrip("/")
+    if relative.split("/", 1)[0] not in MEDIA_PREFIXES:
+        return None
+    return relative
+
+
+def mp4_duration(path: Path) -> Optional[float]:
+    """Read the duration from an MP4/MOV `moov/mvhd` box without decoding."""
+
+    def boxes(f, end):
+        while f.tell() + 8 <= end:
+            start = f.tell()
+            size, kind = struct.unpack(">I4s", f.read(8))
+            if size == 1:
+                size = struct.unpack(">Q", f.read(8))[0]
+            elif size == 0:
+                size = end - start
+            if size < 8:
+                return
+            yield kind, start, f.tell(), start + size
+            f.seek(start + size)
+
+    try:
+        with path.open("rb") as f:
+            end = os.fstat(f.fileno()).st_size
+            for kind, _, body, box_end in boxes(f, end):
+                if kind != b"moov":
+                    continue
+                f.seek(body)
+                for child, _, child_body, _ in boxes(f, box_end):
+                    if child != b"mvhd":
+                        continue
+                    f.seek(child_body)
+                    version = f.read(1)[0]
+                    f.read(3)  # flags
+                    if version == 1:
+                        _, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+                    else:
+                        _, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+                    return duration / timescale if timescale else None
+    except (OSError, struct.error, IndexError):
+        pass
+    return None
+
+
+def probe(path: Path) -> dict:
+    """Compute the stored metadata for one file."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    stat = path.stat()
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    duration = mp4_duration(path) if content_type.startswith("video/") else None
+    return {
+        "content_type": content_type,
+        "size": stat.st_size,
+        "sha256": digest.hexdigest(),
+        "duration": duration,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def scan_media() -> dict:
+    """Hash new or changed files under MEDIA_ROOT and drop rows for deleted ones."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    try:
+        existing = {asset.path: asset for asset in db.query(MediaAsset).all()}
+        seen = set()
+        for prefix in MEDIA_PREFIXES:
+            for path in sorted((MEDIA_ROOT / prefix).rglob("*")):
+                if not path.is_file():
+                    continue
+                relative = path.relative_to(MEDIA_ROOT).as_posix()
+                seen.add(relative)
+                stat = path.stat()
+                asset = existing.get(relative)
+                if asset and asset.size == stat.st_size and asset.mtime_ns == stat.st_mtime_ns:
+                    counts["unchanged"] += 1
+                    continue
+                if asset is None:
+                    db.add(MediaAsset(path=relative, **probe(path)))
+                    counts["added"] += 1
+                else:
+                    for key, value in probe(path).items():
+                        setattr(asset, key, value)
+                    counts["updated"] += 1
+        for relative, asset in existing.items():
+            if relative not in seen:
+                db.delete(asset)
+                counts["removed"] += 1
+        db.commit()
+    finally:
+        db.close()
+    with _metadata_lock:
+        _metadata_cache.clear()
+    return counts
+
+
+def asset_metadata(relative_path: str, stat: os.stat_result) -> Optional[dict]:
+    """
+    Stored metadata for a file, if it was scanned and hasn't changed since.
+
+    Looked up in memory first; the database is only consulted when the file
+    is new to this process or its size/mtime changed.
+    """
+    cached = _metadata_cache.get(relative_path)
+    if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+        return cached
+
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(
+                MediaAsset.content_type,
+                MediaAsset.size,
+                MediaAsset.sha256,
+                MediaAsset.duration,
+                MediaAsset.mtime_ns,
+            ).where(MediaAsset.path == relative_path)
+        ).first()
+    if row is None or row.size != stat.st_size or row.mtime_ns != stat.st_mtime_ns:
+        return None
+
+    metadata = dict(row._mapping)
+    with _metadata_lock:
+        _metadata_cache[relative_path] = metadata
+    return metadata
+
+
+def media_manifest(url: Optional[str]) -> Optional[dict]:
+    """Client-facing description of a media URL (size, hash, duration)."""
+    if not url:
+        return None
+    relative = media_url_to_path(url)
+    path = resolve_media_path(relative) if relative else None
+    if path is None:
+        return {"url": url, "available": False}
+    metadata = asset_metadata(relative, path.stat())
+    manifest = {"url": url, "available": True}
+    if metadata:
+        manifest.update(
+            content_type=metadata["content_type"],
+            size=metadata["size"],
+            sha256=metadata["sha256"],
+            duration=metadata["duration"],
+        )
+    return manifest
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["scan"]:
+        sys.exit("usage: python media.py scan")
+    print(f"Scanning {MEDIA_ROOT}...")
+    counts = scan_media()
+    print(", ".join(f"{n} {what}" for what, n in counts.items()))
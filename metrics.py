@@ -0,0 +1,329 @@
+# metrics.py
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Each worker process keeps its own registry, so with WORKERS > 1 every scrape
+of `/metrics` reports the worker that happened to serve it; scrape each worker
+(or sum across scrapes) accordingly.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: List["_Metric"] = []
+
+
+class QueryStats:
+    """SQL statements issued while handling the current request."""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# Set by `MetricsMiddleware` for the duration of each request and filled in by
+# the engine hooks in `database.py`.
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.type}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """A settable gauge, or a read-only one backed by `callback`."""
+
+    type = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        if self._callback is not None:
+            return self._callback()
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        if self._callback is not None:
+            return [f"{self.name} {self._callback()}"]
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames + ("le",), key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    return "".join(metric.render() for metric in _registry)
+
+
+# HTTP
+HTTP_REQUESTS = Counter(
+    "zonosign_http_requests_total",
+    "HTTP requests handled, by route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "zonosign_http_request_duration_seconds",
+    "Time from receiving a request to sending the last response byte.",
+    ("method", "route"),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "zonosign_http_requests_in_progress",
+    "HTTP requests currently being handled by this worker.",
+)
+
+# Database
+DB_QUERY_DURATION = Histogram(
+    "zonosign_db_query_duration_seconds",
+    "Duration of individual SQL statements.",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "zonosign_db_queries_per_request",
+    "Number of SQL statements issued while handling one request.",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "zonosign_db_time_per_request_seconds",
+    "Total time spent in SQL statements while handling one request.",
+    ("route",),
+)
+
+# Password hashing
+BCRYPT_OPERATIONS = Counter(
+    "zonosign_bcrypt_operations_total",
+    "bcrypt hash and verify operations performed.",
+    ("operation",),
+)
+BCRYPT_DURATION = Histogram(
+    "zonosign_bcrypt_duration_seconds",
+    "Time spent inside bcrypt, excluding time queued for a pool thread.",
+    ("operation",),
+)
+
+# Token issuance: password logins cost a bcrypt verify, refreshes don't
+TOKENS_ISSUED = Counter(
+    "zonosign_tokens_issued_total",
+    "Access tokens issued, by grant (password login or refresh token).",
+    ("grant",),
+)
+REFRESH_TOKEN_FAILURES = Counter(
+    "zonosign_refresh_token_failures_total",
+    "Rejected refresh attempts, by reason (unknown, expired, revoked, reused).",
+    ("reason",),
+)
+
+# Load shedding
+RATE_LIMITED = Counter(
+    "zonosign_rate_limited_total",
+    "Requests rejected with 429, by route class and bucket scope (ip, user, account).",
+    ("route_class", "scope"),
+)
+ADMISSION_REJECTED = Counter(
+    "zonosign_admission_rejected_total",
+    "Requests rejected with 503 by admission control, by reason.",
+    ("reason",),
+)
+
+# Background jobs
+JOBS = Counter(
+    "zonosign_jobs_total",
+    "Background job attempts, by kind and outcome (succeeded, retried, failed).",
+    ("kind", "outcome"),
+)
+JOB_DURATION = Histogram(
+    "zonosign_job_duration_seconds",
+    "Time spent running background job attempts.",
+    ("kind",),
+)
+
+# Caches
+CACHE_REQUESTS = Counter(
+    "zonosign_cache_requests_total",
+    "Cache lookups, by cache name and result (hit or miss).",
+    ("cache", "result"),
+)
+
+
+def _cache_hit_ratios() -> List[str]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in list(CACHE_REQUESTS._values.items()):
+        hits_and_total = totals.setdefault(cache, [0.0, 0.0])
+        hits_and_total[1] += value
+        if result == "hit":
+            hits_and_total[0] += value
+    return [
+        f'zonosign_cache_hit_ratio{{cache="{cache}"}} {hits / total if total else 0.0}'
+        for cache, (hits, total) in totals.items()
+    ]
+
+
+class _CacheHitRatio(_Metric):
+    type = "gauge"
+
+    def samples(self) -> List[str]:
+        return _cache_hit_ratios()
+
+
+CACHE_HIT_RATIO = _CacheHitRatio(
+    "zonosign_cache_hit_ratio",
+    "Fraction of cache lookups served from the cache since startup.",
+)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route request counts and latencies,
+    plus the number of SQL statements and time spent in the database for
+    each request (collected by the engine hooks in `database.py`).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            query_stats.reset(token)
+
+            route = scope.get("route")
+            route_path = getattr(route, "path", "<unmatched>")
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=status_code)
+            HTTP_REQUEST_DURATION.observe(elapsed, method=method, route=route_path)
+            DB_QUERIES_PER_REQUEST.observe(stats.count, route=route_path)
+            DB_TIME_PER_REQUEST.observe(stats.duration, route=route_path)
@@ -1,11 +1,27 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, Date, DateTime, Boolean, ForeignKey, JSON, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
+import zlib
+
+import orjson
 
 Base = declarative_base()
 
+class CompressedJSON(TypeDecorator):
+    """JSON stored as zlib-compressed bytes; for bulky values that are rarely read."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else zlib.compress(orjson.dumps(value), 6)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else orjson.loads(zlib.decompress(value))
+
 class User(Base):
     __tablename__ = "users"
     
@@ -58,7 +74,8 @@ class Lesson(Base):
     module_id = Column(Integer, ForeignKey("modules.id"))
     title = Column(String, nullable=False)
     description = Column(Text)
-    content = Column(JSON)  # Lesson content structure
+    # Only bundles read the content; loaded on first access or with undefer()
+    content = deferred(Column(JSON))  # Lesson content structure
     order_index = Column(Integer, nullable=False)
     estimated_duration = Column(Integer)  # minutes
     is_active = Column(Boolean, default=True)
@@ -69,26 +86,36 @@ class Lesson(Base):
 
 class SignEntry(Base):
     __tablename__ = "sign_entries"
+    __table_args__ = (
+        # Natural key used by the bulk importer to upsert
+        Index("ix_sign_entries_word_category", "word", "category", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     word = Column(String, nullable=False, index=True)
     category = Column(String, index=True)
     difficulty = Column(Integer, default=1)
     description = Column(Text)
-    handshapes = Column(JSON)  # Handshape sequence data
-    movement_pattern = Column(JSON)  # Movement data
+    # The JSON detail columns are loaded together, on first access or with
+    # undefer_group("detail"), so existence checks and word lists skip them
+    handshapes = deferred(Column(JSON), group="detail")  # Handshape sequence data
+    movement_pattern = deferred(Column(JSON), group="detail")  # Movement data
     location = Column(String)  # Body location
     palm_orientation = Column(String)
     facial_expression = Column(String)
-    asl_variant = Column(JSON)  # ASL-specific data
-    bsl_variant = Column(JSON)  # BSL-specific data
-    usage_examples = Column(JSON)  # Example sentences
+    asl_variant = deferred(Column(JSON), group="detail")  # ASL-specific data
+    bsl_variant = deferred(Column(JSON), group="detail")  # BSL-specific data
+    usage_examples = deferred(Column(JSON), group="detail")  # Example sentences
     video_url = Column(String)
     animation_url = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class UserProgress(Base):
     __tablename__ = "user_progress"
+    __table_args__ = (
+        # Incremental refresh of recommendation features: rows touched since a watermark
+        Index("ix_user_progress_user_accessed", "user_id", "last_accessed"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -107,6 +134,12 @@ class UserProgress(Base):
 
 class PracticeSession(Base):
     __tablename__ = "practice_sessions"
+    __table_args__ = (
+        # Incremental refresh of recommendation features: sessions ended since a watermark
+        Index("ix_practice_sessions_user_end", "user_id", "end_time"),
+        # A user's sessions in a time range (history, rollup rebuilds)
+        Index("ix_practice_sessions_user_start", "user_id", "start_time"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -121,3 +154,169 @@ class PracticeSession(Base):
     # Relationships
     user = relationship("User", back_populates="practice_sessions")
 
+class MediaAsset(Base):
+    __tablename__ = "media_assets"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String, unique=True, index=True, nullable=False)  # relative to MEDIA_ROOT
+    content_type = Column(String)
+    size = Column(Integer, nullable=False)  # bytes
+    sha256 = Column(String, nullable=False)
+    duration = Column(Float)  # seconds, for video
+    mtime_ns = Column(Integer, nullable=False)  # file mtime when hashed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ContentVersion(Base):
+    __tablename__ = "content_versions"
+    
+    name = Column(String, primary_key=True)  # curriculum, dictionary, media
+    version = Column(Integer, nullable=False, default=0)
+
+class LessonBundle(Base):
+    __tablename__ = "lesson_bundles"
+    
+    lesson_id = Column(Integer, ForeignKey("lessons.id"), primary_key=True)
+    version = Column(String, nullable=False)  # content versions it was built from
+    etag = Column(String, nullable=False)
+    payload = Column(LargeBinary, nullable=False)  # gzipped JSON
+    built_at = Column(DateTime, default=datetime.utcnow)
+
+class LocalizedSign(Base):
+    __tablename__ = "localized_signs"
+    __table_args__ = (
+        Index("ix_localized_signs_language_category", "language", "category"),
+    )
+    
+    language = Column(String, primary_key=True)  # ASL or BSL
+    sign_id = Column(Integer, primary_key=True)
+    category = Column(String)
+    difficulty = Column(Integer)
+    payload = Column(LargeBinary, nullable=False)  # serialised LocalizedSignResponse
+
+class UserFavorite(Base):
+    __tablename__ = "user_favorites"
+    
+    # (user_id, sign_id) is also the index for listing a user's favorites
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    sign_id = Column(Integer, ForeignKey("sign_entries.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String, primary_key=True)  # JWT ID claim of the revoked token
+    expires_at = Column(DateTime, nullable=False, index=True)  # token's own expiry
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    
+    token_hash = Column(String, primary_key=True)  # SHA-256 of the opaque token
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(String, nullable=False, index=True)  # shared by one login's rotations
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    used_at = Column(DateTime)  # set when rotated; presenting it again is reuse
+    revoked = Column(Boolean, default=False, nullable=False)
+
+class ReviewState(Base):
+    __tablename__ = "review_states"
+    __table_args__ = (
+        # The due queue: one index range scan per user
+        Index("ix_review_states_user_due", "user_id", "due_at"),
+    )
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    sign_id = Column(Integer, ForeignKey("sign_entries.id", ondelete="CASCADE"), primary_key=True)
+    ease_factor = Column(Float, nullable=False, default=2.5)
+    interval_days = Column(Integer, nullable=False, default=0)
+    repetitions = Column(Integer, nullable=False, default=0)  # successful reviews in a row
+    lapses = Column(Integer, nullable=False, default=0)
+    due_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_reviewed_at = Column(DateTime)
+
+class UserFeatures(Base):
+    __tablename__ = "user_features"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    catalog_version = Column(String, nullable=False)  # content versions the layout follows
+    vector = Column(LargeBinary, nullable=False)  # float64 array, see recommendations.py
+    progress_through = Column(DateTime)  # last UserProgress.last_accessed folded in
+    sessions_through = Column(DateTime)  # last PracticeSession.end_time folded in
+    built_at = Column(DateTime, nullable=False)  # last full rebuild
+
+class LeaderboardScore(Base):
+    __tablename__ = "leaderboard_scores"
+    __table_args__ = (
+        # Top-N and keyset pages: a backward range scan within one window
+        Index("ix_leaderboard_scores_period_points", "period", "points", "user_id"),
+    )
+
+    period = Column(String, primary_key=True)  # e.g. day:2025-01-31, week:2025-W05, all
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    points = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class UserStreak(Base):
+    __tablename__ = "user_streaks"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    current_days = Column(Integer, nullable=False, default=0)
+    longest_days = Column(Integer, nullable=False, default=0)
+    last_active_date = Column(Date)  # UTC day of the latest activity
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claiming: the oldest queued jobs whose run_at has passed
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # name of a task registered with jobs.task
+    payload = Column(JSON)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # earliest next attempt
+    locked_by = Column(String)  # worker running it
+    locked_at = Column(DateTime)  # lease start; expired leases are reclaimed
+    last_error = Column(Text)
+    result = Column(JSON)
+    dedupe_key = Column(String, unique=True)  # at most one job per key (e.g. a schedule slot)
+    # Owner, for the status API; None for system jobs
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime)
+
+class PracticeRollup(Base):
+    __tablename__ = "practice_rollups"
+
+    # Primary key order serves "one user's buckets in a date range"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    granularity = Column(String, primary_key=True)  # day or week
+    bucket_start = Column(Date, primary_key=True)  # the day, or the Monday of the ISO week
+    session_type = Column(String, primary_key=True)
+    sessions = Column(Integer, nullable=False, default=0)
+    practice_seconds = Column(Integer, nullable=False, default=0)
+    scored_sessions = Column(Integer, nullable=False, default=0)  # sessions with an accuracy
+    accuracy_sum = Column(Float, nullable=False, default=0.0)
+
+class ArchivedPracticeSession(Base):
+    __tablename__ = "practice_sessions_archive"
+    __table_args__ = (
+        Index("ix_practice_sessions_archive_user_start", "user_id", "start_time"),
+    )
+
+    # Completed sessions moved out of practice_sessions by archive.py. The
+    # summary columns stay queryable; session_data is compressed.
+    id = Column(Integer, primary_key=True)  # the session's original ID
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    session_type = Column(String, nullable=False)
+    lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=True)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    duration = Column(Integer)  # seconds
+    accuracy_score = Column(Float)
+    session_data = Column(CompressedJSON)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
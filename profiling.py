@@ -0,0 +1,161 @@
+# profiling.py
+"""
+Request-scoped SQL profiling and N+1 detection.
+
+With `QUERY_PROFILING` enabled, `QueryProfilerMiddleware` records every SQL
+statement issued while handling a request, groups them by shape (the
+statement with literals and IN-list lengths normalised away) and reports:
+
+- a `Server-Timing` header with total DB time and statement count,
+- an `X-Query-Count` header,
+- a logged warning when the same shape repeats `QUERY_PROFILING_REPEAT_THRESHOLD`
+  or more times, which is almost always a lazy load inside a loop,
+- the most recent reports at `/debug/query-profiles`.
+"""
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger("zonosign.profiling")
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))+\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise a SQL statement so that repeats differing only in values match."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return _PLACEHOLDER_LIST.sub("(?...)", shape)
+
+
+class QueryProfile:
+    """Every SQL statement issued while handling one request."""
+
+    def __init__(self):
+        self.statements: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, duration: float):
+        self.statements.append((statement, duration))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def duration(self) -> float:
+        return sum(duration for _, duration in self.statements)
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        shapes = Counter(statement_shape(statement) for statement, _ in self.statements)
+        return {shape: n for shape, n in shapes.most_common() if n >= threshold}
+
+    def report(self, threshold: int) -> dict:
+        return {
+            "query_count": self.count,
+            "db_time_ms": round(self.duration * 1000, 3),
+            "repeated_statements": self.repeated(threshold),
+            "statements": [
+                {"sql": statement, "duration_ms": round(duration * 1000, 3)}
+                for statement, duration in self.statements
+            ],
+        }
+
+
+# Set by `QueryProfilerMiddleware`; the engine hooks in `database.py` append
+# to it when present.
+query_profile: ContextVar[Optional[QueryProfile]] = ContextVar(
+    "query_profile", default=None
+)
+
+recent_reports: Deque[dict] = deque(maxlen=50)
+
+
+class QueryProfilerMiddleware:
+    def __init__(self, app, repeat_threshold: int = 3):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = query_profile.set(profile)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                db_ms = profile.duration * 1000
+                server_timing = (
+                    f'db;dur={db_ms:.2f};desc="{profile.count} queries", '
+                    f"app;dur={total_ms - db_ms:.2f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing.encode()),
+                    (b"x-query-count", str(profile.count).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_profile.reset(token)
+            self._report(scope, profile)
+
+    def _report(self, scope, profile: QueryProfile):
+        route = getattr(scope.get("route"), "path", scope["path"])
+        report = {"method": scope["method"], "route": route}
+        report.update(profile.report(self.repeat_threshold))
+        recent_reports.append(report)
+        for shape, n in report["repeated_statements"].items():
+            logger.warning(
+                "Possible N+1 in %s %s: statement ran %d times: %s",
+                scope["method"],
+                route,
+                n,
+                shape,
+            )
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine=None):
+    """
+    Fail if more than `limit` SQL statements run inside the block.
+
+    Listens on the engine directly rather than through the request context, so
+    it also sees statements issued on `TestClient`'s server thread:
+
+        with assert_max_queries(3):  # user lookup, modules, lessons
+            client.get("/v1/curriculum/modules", headers=auth)
+    """
+    if engine is None:
+        from database import engine
+
+    profile = QueryProfile()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        profile.record(statement, 0.0)
+
+    event.listen(engine, "after_cursor_execute", record)
+    try:
+        yield profile
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
+
+    if profile.count > limit:
+        statements = "\n".join(f"  {statement}" for statement, _ in profile.statements)
+        raise AssertionError(
+            f"Expected at most {limit} queries, {profile.count} were issued:\n{statements}"
+        )
@@ -0,0 +1,191 @@
+# rate_limit.py
+"""
+Token-bucket rate limiting and global admission control.
+
+Expensive routes are grouped into route classes (`auth`: bcrypt-backed login
+and registration; `transcription`: frame processing), each with a rate such
+as "10/minute" from settings. A route opts in with
+`dependencies=[rate_limit.limit("auth")]`; every request then spends one
+token from a bucket per client IP and, when the request carries a valid
+bearer token, one per user. An empty bucket is an immediate 429 with
+`Retry-After`.
+
+Buckets live in a `RateLimitStore`. The default `MemoryStore` is per worker;
+set `RATE_LIMIT_STORE` to the import path of another implementation (e.g. a
+Redis-backed one) to share buckets between workers and hosts.
+
+`AdmissionControlMiddleware` caps the requests a worker works on at once and
+answers the excess with an immediate 503 instead of queueing it.
+"""
+import importlib
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from starlette.responses import JSONResponse
+
+import metrics
+from setttings import settings
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """`"10/minute"` -> (capacity 10, refill 10/60 tokens per second)."""
+    count, _, period = rate.partition("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period.strip()]
+
+
+class RateLimitStore:
+    """Backend holding token buckets. Implementations must be thread-safe."""
+
+    def take(self, key: str, capacity: int, refill_rate: float) -> float:
+        """
+        Spend one token from bucket `key` (created full on first use).
+
+        Returns 0 if a token was available, otherwise the seconds until one
+        will be.
+        """
+        raise NotImplementedError
+
+
+class MemoryStore(RateLimitStore):
+    """In-process buckets. Full buckets are dropped, bounding memory by active clients."""
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self._buckets: Dict[str, Tuple[float, float, int, float]] = {}
+        self._lock = threading.Lock()
+        self._sweep_interval = sweep_interval
+        self._swept_at = time.monotonic()
+
+    def take(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _, _ = self._buckets.get(key, (capacity, now, 0, 0.0))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now, capacity, refill_rate)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now, capacity, refill_rate)
+                wait = (1 - tokens) / refill_rate
+            if now - self._swept_at >= self._sweep_interval:
+                self._sweep(now)
+            return wait
+
+    def _sweep(self, now: float):
+        self._swept_at = now
+        for key, (tokens, updated, capacity, refill_rate) in list(self._buckets.items()):
+            if tokens + (now - updated) * refill_rate >= capacity:
+                del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def _load_store(path: str) -> RateLimitStore:
+    module, _, name = path.rpartition(".")
+    return getattr(importlib.import_module(module), name)()
+
+
+store: RateLimitStore = (
+    MemoryStore()
+    if settings.RATE_LIMIT_STORE == "rate_limit.MemoryStore"
+    else _load_store(settings.RATE_LIMIT_STORE)
+)
+
+ROUTE_CLASSES = {
+    "auth": parse_rate(settings.RATE_LIMIT_AUTH),
+    "transcription": parse_rate(settings.RATE_LIMIT_TRANSCRIPTION),
+}
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def check(route_class: str, scope: str, identity: str):
+    """Spend a token for `identity`; raise 429 if its bucket is empty."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    capacity, refill_rate = ROUTE_CLASSES[route_class]
+    wait = store.take(f"{route_class}:{scope}:{identity}", capacity, refill_rate)
+    if wait:
+        metrics.RATE_LIMITED.inc(route_class=route_class, scope=scope)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+def _token_subject(request: Request) -> Optional[str]:
+    # Imported here: auth_utils is heavier and this module is imported early
+    from auth_utils import verify_token
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return verify_token(token).email
+    except HTTPException:
+        return None  # the route's own auth dependency will reject it
+
+
+def limit(route_class: str):
+    """Dependency applying `route_class`'s limit per client IP and per user."""
+    if route_class not in ROUTE_CLASSES:
+        raise ValueError(f"Unknown rate limit class: {route_class!r}")
+
+    async def dependency(request: Request):
+        check(route_class, "ip", client_ip(request))
+        subject = _token_subject(request)
+        if subject is not None:
+            check(route_class, "user", subject)
+
+    return Depends(dependency)
+
+
+class AdmissionControlMiddleware:
+    """
+    Pure ASGI middleware rejecting requests with 503 once `max_in_flight`
+    are already being handled by this worker, so overload sheds work early
+    rather than building an unbounded queue. Probe and metrics paths are
+    always admitted.
+    """
+
+    EXEMPT_PATHS = ("/health", "/metrics")
+
+    def __init__(self, app, max_in_flight: int):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.max_in_flight:
+            metrics.ADMISSION_REJECTED.inc(reason="in_flight")
+            response = JSONResponse(
+                {"detail": "Server busy, retry shortly"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        # Single-threaded event loop: no lock needed around the counter
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
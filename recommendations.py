@@ -0,0 +1,392 @@
+# recommendations.py
+"""
+Next-lesson and practice-sign recommendations.
+
+Scoring is vectorised with numpy over two kinds of arrays:
+
+- a `Catalog`, built once per worker per curriculum/dictionary version: every
+  active lesson in curriculum order with its difficulty and its mix of sign
+  categories (from the signs its content references), and every sign's
+  category and difficulty;
+- a per-user feature vector stored in `user_features`: the progress and
+  score of each catalog lesson, and per sign category the sum and count of
+  practice-session accuracy (sessions are attributed to categories through
+  their lesson's mix).
+
+The feature vector is maintained incrementally. It records how far it has
+read `user_progress` (by `last_accessed`) and `practice_sessions` (by
+`end_time`), and each request folds in only the rows past those watermarks,
+which is usually none or a handful. It is rebuilt from scratch when the
+catalog version changes, since the layout depends on it, and every
+`RECOMMENDATION_REBUILD_HOURS` to pick up anything a watermark missed; a
+rebuild reads archived sessions too (`archive.summaries`).
+
+A request therefore costs one small read per table plus a few vector
+operations over the catalog.
+"""
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import archive
+import content_version
+from database import engine
+from models import (
+    Lesson,
+    Module,
+    PracticeSession,
+    ReviewState,
+    SignEntry,
+    UserFeatures,
+    UserProgress,
+)
+from setttings import settings
+
+CATALOG_CONTENT = [content_version.CURRICULUM, content_version.DICTIONARY]
+
+# Accuracy assumed for a category the user hasn't practised, and how many
+# sessions' worth of weight that assumption carries
+PRIOR_ACCURACY = 0.7
+PRIOR_WEIGHT = 3.0
+PASS_SCORE = 0.7
+# Lessons further past the user's first unfinished one score lower
+SEQUENCE_DECAY = 3.0
+# Difficulty scales run 1-5
+DIFFICULTY_RANGE = 4.0
+
+WEIGHT_SEQUENCE = 1.0
+WEIGHT_WEAKNESS = 0.8
+WEIGHT_DIFFICULTY = 0.6
+WEIGHT_RESUME = 0.5
+
+
+@dataclass(frozen=True)
+class Catalog:
+    version: str
+    categories: List[str]
+    lesson_ids: np.ndarray  # int64, curriculum order
+    lesson_modules: np.ndarray  # int64
+    lesson_titles: List[str]
+    lesson_difficulty: np.ndarray  # float64
+    lesson_mix: np.ndarray  # (lessons, categories), rows sum to 1 or are all 0
+    lesson_index: Dict[int, int]
+    sign_ids: np.ndarray  # int64, ascending
+    sign_category: np.ndarray  # int64 index into `categories`
+    sign_difficulty: np.ndarray  # float64
+    difficulties: np.ndarray  # distinct sign difficulties, ascending
+    sign_group: np.ndarray  # category index * len(difficulties) + difficulty index
+    sign_jitter: np.ndarray  # float64 in [0, 1e-3), breaks ties between equal signs
+
+    @property
+    def size(self) -> int:
+        """Length of a user feature vector laid out for this catalog."""
+        return 2 * len(self.lesson_ids) + 2 * len(self.categories)
+
+    def unpack(self, vector: np.ndarray):
+        """Views of a feature vector: (progress, score, accuracy_sum, accuracy_count)."""
+        lessons, categories = len(self.lesson_ids), len(self.categories)
+        return np.split(vector, np.cumsum([lessons, lessons, categories]))
+
+    def empty_vector(self) -> np.ndarray:
+        vector = np.zeros(self.size)
+        progress, score, _, _ = self.unpack(vector)
+        progress[:] = np.nan  # not started
+        score[:] = np.nan
+        return vector
+
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+
+
+def _build_catalog(connection, version: str) -> Catalog:
+    signs = connection.execute(
+        select(SignEntry.id, SignEntry.category, SignEntry.difficulty, SignEntry.word)
+        .order_by(SignEntry.id)
+    ).all()
+    categories = sorted({row[1] or "" for row in signs})
+    category_index = {category: i for i, category in enumerate(categories)}
+    sign_ids = np.fromiter((row[0] for row in signs), dtype=np.int64, count=len(signs))
+    sign_category = np.fromiter(
+        (category_index[row[1] or ""] for row in signs), dtype=np.int64, count=len(signs)
+    )
+    sign_difficulty = np.fromiter(
+        (row[2] or 1 for row in signs), dtype=np.float64, count=len(signs)
+    )
+
+    difficulties = np.unique(sign_difficulty)
+    # Lesson content references signs by ID or by word (see bundles.py)
+    word_ids: Dict[str, List[int]] = {}
+    for row in signs:
+        word_ids.setdefault(row[3], []).append(row[0])
+
+    lessons = connection.execute(
+        select(
+            Lesson.id, Lesson.module_id, Lesson.title, Lesson.content, Module.difficulty_level
+        )
+        .join(Module, Module.id == Lesson.module_id)
+        .where(Module.is_active == True, Lesson.is_active == True)
+        .order_by(Module.order_index, Lesson.order_index, Lesson.id)
+    ).all()
+    lesson_mix = np.zeros((len(lessons), len(categories)))
+    lesson_difficulty = np.empty(len(lessons))
+    for i, lesson in enumerate(lessons):
+        references = (lesson.content or {}).get("signs") or []
+        ids = {ref for ref in references if isinstance(ref, int)}
+        for ref in references:
+            if isinstance(ref, str):
+                ids.update(word_ids.get(ref, ()))
+        referenced = np.fromiter(sorted(ids), dtype=np.int64, count=len(ids))
+        positions = np.searchsorted(sign_ids, referenced)
+        valid = positions < len(sign_ids)
+        # References that don't resolve to a sign are dropped
+        found = positions[valid][sign_ids[positions[valid]] == referenced[valid]]
+        if len(found):
+            np.add.at(lesson_mix[i], sign_category[found], 1.0 / len(found))
+            lesson_difficulty[i] = sign_difficulty[found].mean()
+        else:
+            lesson_difficulty[i] = lesson.difficulty_level or 1
+
+    return Catalog(
+        version=version,
+        categories=categories,
+        lesson_ids=np.array([lesson.id for lesson in lessons], dtype=np.int64),
+        lesson_modules=np.array([lesson.module_id for lesson in lessons], dtype=np.int64),
+        lesson_titles=[lesson.title for lesson in lessons],
+        lesson_difficulty=lesson_difficulty,
+        lesson_mix=lesson_mix,
+        lesson_index={lesson.id: i for i, lesson in enumerate(lessons)},
+        sign_ids=sign_ids,
+        sign_category=sign_category,
+        sign_difficulty=sign_difficulty,
+        difficulties=difficulties,
+        sign_group=sign_category * len(difficulties)
+        + np.searchsorted(difficulties, sign_difficulty),
+        sign_jitter=((sign_ids * 2654435761) % 9973) / 9973e3,
+    )
+
+
+def cached_catalog(connection) -> Optional[Catalog]:
+    """This worker's catalog if it matches the current content, else None."""
+    catalog = _catalog
+    if catalog is not None and catalog.version == content_version.version_key(
+        connection, CATALOG_CONTENT
+    ):
+        return catalog
+    return None
+
+
+def load_catalog() -> Catalog:
+    """Return the current catalog, rebuilding it if the content has changed."""
+    global _catalog
+    with _catalog_lock, engine.connect() as connection:
+        version = content_version.version_key(connection, CATALOG_CONTENT)
+        if _catalog is None or _catalog.version != version:
+            _catalog = _build_catalog(connection, version)
+        return _catalog
+
+
+def _fold_progress(catalog: Catalog, vector: np.ndarray, rows) -> None:
+    progress, score, _, _ = catalog.unpack(vector)
+    for lesson_id, status, percentage, lesson_score in rows:
+        i = catalog.lesson_index.get(lesson_id)
+        if i is None:
+            continue
+        progress[i] = 1.0 if status == "completed" else (percentage or 0.0) / 100
+        score[i] = np.nan if lesson_score is None else lesson_score
+
+
+def _fold_sessions(catalog: Catalog, vector: np.ndarray, rows) -> None:
+    _, _, accuracy_sum, accuracy_count = catalog.unpack(vector)
+    indices = [catalog.lesson_index.get(lesson_id) for lesson_id, _ in rows]
+    known = [i for i, index in enumerate(indices) if index is not None]
+    if not known:
+        return
+    mix = catalog.lesson_mix[[indices[i] for i in known]]
+    accuracy = np.array([rows[i][1] for i in known])
+    accuracy_sum += accuracy @ mix
+    accuracy_count += mix.sum(axis=0)
+
+
+def features(db: Session, catalog: Catalog, user_id: int, now: datetime) -> np.ndarray:
+    """The user's feature vector, brought up to date and saved if anything changed."""
+    record = db.get(UserFeatures, user_id)
+    rebuild = (
+        record is None
+        or record.catalog_version != catalog.version
+        or record.built_at <= now - timedelta(hours=settings.RECOMMENDATION_REBUILD_HOURS)
+    )
+    if rebuild:
+        vector = catalog.empty_vector()
+        progress_through = sessions_through = None
+    else:
+        vector = np.frombuffer(record.vector, dtype=np.float64).copy()
+        progress_through, sessions_through = record.progress_through, record.sessions_through
+
+    progress_query = select(
+        UserProgress.lesson_id,
+        UserProgress.status,
+        UserProgress.progress_percentage,
+        UserProgress.score,
+        UserProgress.last_accessed,
+    ).where(UserProgress.user_id == user_id)
+    if progress_through is not None:
+        progress_query = progress_query.where(UserProgress.last_accessed > progress_through)
+    progress_rows = db.execute(progress_query.order_by(UserProgress.last_accessed)).all()
+
+    # Archived sessions all ended long before any watermark, so only a
+    # rebuild needs to read them
+    sessions = PracticeSession.__table__ if sessions_through is not None else archive.summaries()
+    session_query = select(
+        sessions.c.lesson_id, sessions.c.accuracy_score, sessions.c.end_time
+    ).where(
+        sessions.c.user_id == user_id,
+        sessions.c.end_time.is_not(None),
+        sessions.c.accuracy_score.is_not(None),
+    )
+    if sessions_through is not None:
+        session_query = session_query.where(sessions.c.end_time > sessions_through)
+    session_rows = db.execute(session_query).all()
+
+    if not rebuild and not progress_rows and not session_rows:
+        return vector
+
+    _fold_progress(catalog, vector, [row[:4] for row in progress_rows])
+    _fold_sessions(catalog, vector, [row[:2] for row in session_rows])
+    if progress_rows:
+        progress_through = max(
+            (row[4] for row in progress_rows if row[4] is not None), default=progress_through
+        )
+    if session_rows:
+        sessions_through = max(row[2] for row in session_rows)
+
+    values = {
+        "catalog_version": catalog.version,
+        "vector": vector.tobytes(),
+        "progress_through": progress_through,
+        "sessions_through": sessions_through,
+        "built_at": now if rebuild else record.built_at,
+    }
+    # Concurrent requests from one user (two tabs) can both get here for a
+    # new user; the last write wins instead of one failing on the primary key
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}[db.get_bind().dialect.name]
+    statement = dialect.insert(UserFeatures).values(user_id=user_id, **values)
+    db.connection().execute(
+        statement.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={column: getattr(statement.excluded, column) for column in values},
+        )
+    )
+    db.commit()
+    return vector
+
+
+def _top(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the `n` highest finite scores, best first."""
+    n = min(n, len(scores))
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, n - 1)[:n]
+    candidates = candidates[np.isfinite(scores[candidates])]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _profile(catalog: Catalog, vector: np.ndarray):
+    """Per-category mastery and the difficulty the user should be working at."""
+    progress, score, accuracy_sum, accuracy_count = catalog.unpack(vector)
+    mastery = (accuracy_sum + PRIOR_ACCURACY * PRIOR_WEIGHT) / (accuracy_count + PRIOR_WEIGHT)
+    completed = progress >= 1.0
+    if completed.any():
+        scored = completed & ~np.isnan(score)
+        mean_score = score[scored].mean() if scored.any() else PASS_SCORE
+        target = catalog.lesson_difficulty[completed].mean() + (mean_score - PASS_SCORE) * 2
+    else:
+        target = catalog.lesson_difficulty.min() if len(catalog.lesson_difficulty) else 1.0
+    return mastery, completed, target
+
+
+def score_lessons(catalog: Catalog, vector: np.ndarray) -> np.ndarray:
+    """One score per catalog lesson; completed lessons are -inf."""
+    progress, _, _, _ = catalog.unpack(vector)
+    mastery, completed, target = _profile(catalog, vector)
+    rank = np.arange(len(catalog.lesson_ids))
+    unfinished = np.flatnonzero(~completed)
+    frontier = unfinished[0] if len(unfinished) else 0
+    # Earlier lessons left unfinished score as if they were the frontier
+    sequence = np.exp(-np.maximum(rank - frontier, 0) / SEQUENCE_DECAY)
+    weakness = catalog.lesson_mix @ (1.0 - mastery)
+    mismatch = np.abs(catalog.lesson_difficulty - target) / DIFFICULTY_RANGE
+    in_progress = np.where(np.isnan(progress), 0.0, progress)
+    scores = (
+        WEIGHT_SEQUENCE * sequence
+        + WEIGHT_WEAKNESS * weakness
+        - WEIGHT_DIFFICULTY * mismatch
+        + WEIGHT_RESUME * in_progress
+    )
+    scores[completed] = -np.inf
+    return scores
+
+
+def score_signs(catalog: Catalog, vector: np.ndarray, user_id: int) -> np.ndarray:
+    """One score per catalog sign: weak categories at a suitable difficulty first."""
+    mastery, _, target = _profile(catalog, vector)
+    # A sign's score depends only on its (category, difficulty) group: score
+    # the groups, then gather
+    groups = (
+        WEIGHT_WEAKNESS * (1.0 - mastery)[:, None]
+        - WEIGHT_DIFFICULTY * np.abs(catalog.difficulties - target)[None, :] / DIFFICULTY_RANGE
+    ).ravel()
+    # Rotated per user so equally good signs differ between users but are stable for each
+    return groups[catalog.sign_group] + np.roll(catalog.sign_jitter, user_id)
+
+
+def recommend(db: Session, catalog: Catalog, user_id: int, lessons: int, signs: int) -> dict:
+    """The user's top `lessons` next lessons and `signs` signs to practise."""
+    vector = features(db, catalog, user_id, datetime.utcnow())
+
+    lesson_scores = score_lessons(catalog, vector)
+    lesson_results = [
+        {
+            "lesson_id": int(catalog.lesson_ids[i]),
+            "module_id": int(catalog.lesson_modules[i]),
+            "title": catalog.lesson_titles[i],
+            "score": round(float(lesson_scores[i]), 4),
+        }
+        for i in _top(lesson_scores, lessons)
+    ]
+
+    sign_scores = score_signs(catalog, vector, user_id)
+    # Signs already in the review deck are scheduled by `srs`
+    deck = np.fromiter(
+        db.execute(select(ReviewState.sign_id).where(ReviewState.user_id == user_id)).scalars(),
+        dtype=np.int64,
+    )
+    if len(deck):
+        sign_scores[np.isin(catalog.sign_ids, deck)] = -np.inf
+    top_signs = _top(sign_scores, signs)
+    details = {
+        row.id: row
+        for row in db.execute(
+            select(SignEntry.id, SignEntry.word, SignEntry.category, SignEntry.difficulty).where(
+                SignEntry.id.in_(catalog.sign_ids[top_signs].tolist())
+            )
+        )
+    }
+    sign_results = [
+        {
+            "id": sign_id,
+            "word": details[sign_id].word,
+            "category": details[sign_id].category,
+            "difficulty": details[sign_id].difficulty,
+            "score": round(float(sign_scores[i]), 4),
+        }
+        for i in top_signs
+        if (sign_id := int(catalog.sign_ids[i])) in details
+    ]
+    return {"lessons": lesson_results, "signs": sign_results}
@@ -0,0 +1,121 @@
+# refresh_tokens.py
+"""
+Rotating refresh tokens.
+
+Logging in costs a bcrypt verify; refreshing costs a SHA-256 and two small
+queries. Clients keep a short-lived access token and trade their refresh
+token for a new pair when it expires, so bcrypt work scales with real
+logins instead of with how often access tokens expire.
+
+Refresh tokens are opaque random strings; only their SHA-256 is stored.
+Each one can be used once: using it marks it used and issues a successor in
+the same family (one family per login). Presenting a used token again means
+it was copied, so the whole family is revoked and both the thief and the
+legitimate client have to log in again.
+"""
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+import metrics
+from models import RefreshToken, User
+from setttings import settings
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _reject(reason: str):
+    metrics.REFRESH_TOKEN_FAILURES.inc(reason=reason)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def issue(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """Create a refresh token for `user_id`, starting a new family by default."""
+    token = secrets.token_urlsafe(32)
+    db.add(
+        RefreshToken(
+            token_hash=_hash(token),
+            user_id=user_id,
+            family_id=family_id or uuid.uuid4().hex,
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    db.commit()
+    return token
+
+
+def rotate(db: Session, token: str) -> Tuple[User, str]:
+    """
+    Spend `token` and return its user and the successor refresh token.
+
+    Raises 401 for unknown, expired or revoked tokens, and revokes the whole
+    family when a token that was already used is presented again.
+    """
+    record = db.get(RefreshToken, _hash(token))
+    if record is None:
+        _reject("unknown")
+    if record.revoked:
+        _reject("revoked")
+    if record.used_at is not None:
+        revoke_family(db, record.family_id)
+        _reject("reused")
+    if record.expires_at <= datetime.utcnow():
+        _reject("expired")
+
+    # Conditional update so two concurrent refreshes can't both succeed
+    spent = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == record.token_hash, RefreshToken.used_at.is_(None))
+        .values(used_at=datetime.utcnow())
+    )
+    if spent.rowcount != 1:
+        db.rollback()
+        revoke_family(db, record.family_id)
+        _reject("reused")
+
+    user = db.get(User, record.user_id)
+    if user is None or not user.is_active:
+        db.commit()
+        _reject("revoked")
+    return user, issue(db, user.id, record.family_id)
+
+
+def revoke_family(db: Session, family_id: str):
+    db.execute(
+        update(RefreshToken).where(RefreshToken.family_id == family_id).values(revoked=True)
+    )
+    db.commit()
+
+
+def revoke_user(db: Session, user_id: int):
+    """
+    Revoke every refresh token the user holds (e.g. after a password change).
+    Doesn't commit: call it in the transaction that makes the change.
+    """
+    db.execute(update(RefreshToken).where(RefreshToken.user_id == user_id).values(revoked=True))
+
+
+def revoke(db: Session, token: str):
+    """Revoke the family `token` belongs to (logout); unknown tokens are ignored."""
+    record = db.get(RefreshToken, _hash(token))
+    if record is not None:
+        revoke_family(db, record.family_id)
+
+
+def prune_expired(db: Session) -> int:
+    """Delete expired refresh tokens; returns how many were removed."""
+    result = db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= datetime.utcnow()))
+    db.commit()
+    return result.rowcount
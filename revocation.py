@@ -0,0 +1,128 @@
+# revocation.py
+"""
+Access-token revocation (logout).
+
+Every token carries a unique `jti` claim. Revoking a token records its jti
+and expiry in `revoked_tokens` and in this worker's in-memory map, which
+`verify_token` consults with a single dict lookup and no I/O. A background
+task started in `main.lifespan` pulls the jtis revoked by other workers from
+the table every `REVOCATION_SYNC_INTERVAL` seconds, in the threadpool; the
+first sync runs at startup, before the worker serves any request.
+
+Entries are only needed until the token would have expired anyway, so
+expired ones are dropped from memory on every sync and from the table on
+every revocation: both stay bounded by the number of revoked tokens that are
+still live.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from database import engine
+from models import RevokedToken
+from setttings import settings
+
+logger = logging.getLogger("zonosign.revocation")
+
+# Rows are stamped before they commit, so a revocation can become visible
+# after newer ones; each sync re-reads this far behind the newest one seen.
+LATE_COMMIT_MARGIN = timedelta(seconds=60)
+
+
+def _utc(timestamp: float) -> datetime:
+    # Stored naive, in UTC, like every other DateTime column
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+class RevocationStore:
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self._revoked: Dict[str, float] = {}  # jti -> token expiry (epoch seconds)
+        self._lock = threading.Lock()
+        self._watermark: Optional[datetime] = None  # newest revoked_at seen
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def is_revoked(self, jti: str) -> bool:
+        expires = self._revoked.get(jti)
+        return expires is not None and expires > time.time()
+
+    def revoke(self, jti: str, expires: float):
+        """Revoke the token `jti`, which expires at `expires` (epoch seconds)."""
+        now = time.time()
+        if expires <= now:
+            return
+        dialect = {"sqlite": sqlite, "postgresql": postgresql}[engine.dialect.name]
+        with engine.begin() as connection:
+            connection.execute(
+                dialect.insert(RevokedToken)
+                .values(jti=jti, expires_at=_utc(expires), revoked_at=datetime.utcnow())
+                .on_conflict_do_nothing(index_elements=["jti"])
+            )
+            connection.execute(delete(RevokedToken).where(RevokedToken.expires_at <= _utc(now)))
+        with self._lock:
+            self._revoked[jti] = expires
+
+    def sync(self):
+        """Pull revocations made by other workers and prune expired entries."""
+        with self._lock:
+            watermark = self._watermark
+
+        now = time.time()
+        statement = select(
+            RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at
+        ).where(RevokedToken.expires_at > _utc(now))
+        if watermark is not None:
+            statement = statement.where(RevokedToken.revoked_at >= watermark - LATE_COMMIT_MARGIN)
+        with engine.connect() as connection:
+            rows = connection.execute(statement).all()
+
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._revoked[jti] = expires_at.replace(tzinfo=timezone.utc).timestamp()
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+            for jti in [jti for jti, expires in self._revoked.items() if expires <= now]:
+                del self._revoked[jti]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await run_in_threadpool(self.sync)
+            except Exception:
+                logger.exception("Revocation sync failed")
+
+    async def start(self):
+        """Sync once, then keep syncing in the background until `stop`."""
+        await run_in_threadpool(self.sync)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+store = RevocationStore(settings.REVOCATION_SYNC_INTERVAL)
+
+REVOKED_TOKENS = metrics.Gauge(
+    "zonosign_revoked_tokens",
+    "Unexpired revoked access tokens held in this worker's revocation map.",
+    callback=lambda: len(store),
+)
@@ -1,24 +1,54 @@
 # routers/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from database import get_db
 from models import User, UserProfile
-from schemas import UserCreate, UserLogin, UserResponse, Token
-from auth_utils import verify_password, get_password_hash, create_access_token
+from schemas import UserCreate, UserLogin, UserResponse, Token, RefreshRequest
+from auth_utils import (
+    verify_password_async,
+    get_password_hash_async,
+    create_access_token,
+    verify_password_reset_token,
+    verify_token,
+)
+import jobs
+import metrics
+import rate_limit
+import refresh_tokens
+import revocation
+from routers.users import security
 from setttings import settings
 
 router = APIRouter()
 
 
+def _token_response(user: User, refresh_token: str) -> dict:
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.email}, expires_delta=access_token_expires
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+        "refresh_expires_in": settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+    }
+
+
 @router.post(
     "/register",
+    dependencies=[rate_limit.limit("auth")],
     response_model=UserResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Register a new user",
     responses={
         201: {"description": "User created successfully"},
         400: {"description": "Email already registered or username taken"},
+        429: {"description": "Too many attempts"},
     },
 )
 async def register(user: UserCreate, db: Session = Depends(get_db)):
@@ -47,7 +77,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Create user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
@@ -68,11 +98,13 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
 
 @router.post(
     "/login",
+    dependencies=[rate_limit.limit("auth")],
     response_model=Token,
     summary="User login",
     responses={
         200: {"description": "Login successful, token returned"},
         401: {"description": "Incorrect email or password"},
+        429: {"description": "Too many attempts"},
     },
 )
 async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
@@ -83,80 +115,134 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     - `password`: User's password
 
     Returns an access token that should be included in the Authorization header
-    for protected endpoints.
+    for protected endpoints, and a refresh token to get new access tokens from
+    `/refresh` without logging in again.
     """
+    # Per account as well as per IP, against password spraying from many IPs
+    rate_limit.check("auth", "account", user_credentials.email)
     user = db.query(User).filter(User.email == user_credentials.email).first()
 
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(
+        user_credentials.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    metrics.TOKENS_ISSUED.inc(grant="password")
+    return _token_response(user, refresh_tokens.issue(db, user.id))
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-    }
+
+@router.post(
+    "/refresh",
+    response_model=Token,
+    summary="Refresh an access token",
+    responses={
+        200: {"description": "New access token and refresh token"},
+        401: {"description": "Refresh token unknown, expired, revoked or reused"},
+    },
+)
+async def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    - `refresh_token`: The refresh token from `/login` or the previous `/refresh`
+
+    Each refresh token works once; always keep the one returned. Presenting
+    an already used refresh token revokes every token descended from the
+    same login.
+    """
+    user, refresh_token = refresh_tokens.rotate(db, request.refresh_token)
+    metrics.TOKENS_ISSUED.inc(grant="refresh")
+    return _token_response(user, refresh_token)
 
 
 @router.post(
     "/logout",
     summary="User logout",
-    responses={200: {"description": "Logout successful"}},
+    responses={
+        200: {"description": "Logout successful"},
+        401: {"description": "Not authenticated"},
+    },
 )
-async def logout():
+async def logout(
+    request: RefreshRequest = Body(None),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+):
     """
-    Log out the current user.
+    Log out the current user by revoking the access token used for this call.
 
-    Note: In production, this should invalidate the current access token.
-    Currently, this is a stub implementation.
+    The token is rejected from then on by this worker immediately, and by
+    every other worker within `REVOCATION_SYNC_INTERVAL` seconds. Send the
+    `refresh_token` as well to revoke it (and its successors) too.
     """
-    # STUB: In production, implement token blacklisting
+    token_data = verify_token(credentials.credentials)
+    if request is not None:
+        refresh_tokens.revoke(db, request.refresh_token)
+    if token_data.jti is None:
+        # Issued before tokens carried a jti; it simply runs to expiry
+        return {"message": "Logout successful"}
+    await run_in_threadpool(revocation.store.revoke, token_data.jti, token_data.exp)
     return {"message": "Logout successful"}
 
 
 @router.post(
     "/forgot-password",
+    dependencies=[rate_limit.limit("auth")],
     summary="Request password reset",
     responses={200: {"description": "Password reset email sent if the email exists"}},
 )
-async def forgot_password(email: str):
+async def forgot_password(email: str, db: Session = Depends(get_db)):
     """
     Initiate password reset process.
 
     - `email`: The email address to send the reset link to
 
-    Note: This is a stub implementation. In production, this would send
-    an email with a password reset link.
+    The email, carrying a single-use link valid for
+    `PASSWORD_RESET_EXPIRE_MINUTES`, is sent by a background job. The
+    response is the same whether or not the address has an account.
     """
-    # STUB: Implement email sending for password reset
+    jobs.enqueue(db, "send_password_reset", {"email": email})
+    db.commit()
     return {"message": "Password reset email sent"}
 
 
 @router.post(
     "/reset-password",
+    dependencies=[rate_limit.limit("auth")],
     summary="Reset password with token",
     responses={
         200: {"description": "Password reset successful"},
         400: {"description": "Invalid or expired token"},
     },
 )
-async def reset_password(token: str, new_password: str):
+async def reset_password(token: str, new_password: str, db: Session = Depends(get_db)):
     """
     Reset user's password using a valid reset token.
 
     - `token`: The reset token received via email
-    - `new_password`: The new password to set
+    - `new_password`: The new password to set (at least 8 characters)
 
-    Note: This is a stub implementation. In production, this would validate
-    the token and update the user's password.
+    The token stops working once the password has changed. All of the
+    user's refresh tokens are revoked in the same transaction, and a
+    notification email is sent by a background job.
+
+    Access tokens already issued stay valid until they expire: they aren't
+    tracked per user, only revoked one by one at logout, so they are left to
+    lapse within `ACCESS_TOKEN_EXPIRE_MINUTES`. Without a refresh token
+    they can't be renewed.
     """
-    # STUB: Implement password reset with token validation
+    user = verify_password_reset_token(token, db)
+    if len(new_password) < 8:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Password must be at least 8 characters",
+        )
+    user.hashed_password = await get_password_hash_async(new_password)
+    refresh_tokens.revoke_user(db, user.id)
+    jobs.enqueue(db, "send_password_changed", {"user_id": user.id})
+    db.commit()
     return {"message": "Password reset successful"}
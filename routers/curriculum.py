@@ -1,14 +1,47 @@
 # routers/curriculum.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+import cache
+import content_version
+from compression import negotiate, precompressed_json
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 from models import Module, Lesson, User
 from schemas import ModuleResponse, LessonResponse
+from serialization import ORJSONResponse, fetch_dicts, group_by, requested_fields, select_for
 from routers.users import get_current_user
+from bundles import get_bundle, decompress_payload
+from setttings import settings
 
 router = APIRouter()
 
+# Single modules and lessons as response dicts. Curriculum edits are rare and
+# a module's change can affect its lessons, so any edit clears the lot.
+curriculum_cache = cache.Cache("curriculum", settings.CURRICULUM_CACHE_ENTRIES, shared=True)
+cache.invalidate_on(Module, curriculum_cache)
+cache.invalidate_on(Lesson, curriculum_cache)
+
+
+def _load_module(db: Session, module_id: int) -> Optional[dict]:
+    modules = fetch_dicts(db, select_for(ModuleResponse, Module).where(
+        Module.id == module_id, Module.is_active == True
+    ))
+    if not modules:
+        return None
+    module = modules[0]
+    module["lessons"] = fetch_dicts(db, select_for(LessonResponse, Lesson).where(
+        Lesson.module_id == module_id
+    ).order_by(Lesson.id))
+    return module
+
+
+async def _cached_module(db: Session, module_id: int) -> Optional[dict]:
+    """The active module with all of its lessons, or None."""
+    return await curriculum_cache.aget_or_load(
+        f"module:{module_id}", lambda: _load_module(db, module_id)
+    )
+
 @router.get(
     "/modules",
     response_model=List[ModuleResponse],
@@ -19,6 +52,13 @@ router = APIRouter()
     }
 )
 async def get_modules(
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated module fields to return, e.g. `name,order_index` "
+        "(`id` is always included). Include `lessons` to nest the lessons.",
+    ),
+    summary: bool = Query(False, description="Omit the nested lessons"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -27,9 +67,32 @@ async def get_modules(
     
     Modules are returned in the order specified by their `order_index`.
     Only active modules (where `is_active` is True) are included.
+
+    Use `summary=true` or `fields=` for navigation lists; lessons are only
+    queried when they're returned.
     """
-    modules = db.query(Module).filter(Module.is_active == True).order_by(Module.order_index).all()
-    return modules
+    summary_fields = [name for name in ModuleResponse.model_fields if name != "lessons"]
+    selected = requested_fields(ModuleResponse, fields, summary_fields if summary else None)
+
+    def build():
+        # Two queries, projected straight to dicts: the modules, then all of
+        # their lessons at once.
+        modules = fetch_dicts(db, select_for(ModuleResponse, Module, selected).where(
+            Module.is_active == True
+        ).order_by(Module.order_index))
+        if selected is not None and "lessons" not in selected:
+            return modules
+        lessons = group_by(fetch_dicts(db, select_for(LessonResponse, Lesson).where(
+            Lesson.module_id.in_([module["id"] for module in modules])
+        ).order_by(Lesson.id)), "module_id")
+        for module in modules:
+            module["lessons"] = lessons.get(module["id"], [])
+        return modules
+
+    # Serialised and compressed once per curriculum version
+    return await precompressed_json(
+        request, db.connection(), f"modules:{selected}", [content_version.CURRICULUM], build
+    )
 
 @router.get(
     "/modules/{module_id}",
@@ -54,10 +117,10 @@ async def get_module(
         
     Returns the module details if found and active, otherwise returns 404.
     """
-    module = db.query(Module).filter(Module.id == module_id, Module.is_active == True).first()
+    module = await _cached_module(db, module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
-    return module
+    return ORJSONResponse(module)
 
 @router.get(
     "/modules/{module_id}/lessons",
@@ -71,6 +134,11 @@ async def get_module(
 )
 async def get_module_lessons(
     module_id: int,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated lesson fields to return, e.g. `title,order_index` "
+        "(`id` is always included)",
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -79,19 +147,25 @@ async def get_module_lessons(
     
     Args:
         module_id: The ID of the parent module
+        fields: Only return these fields
         
     Returns a list of active lessons in the module, ordered by their `order_index`.
     """
-    # Verify module exists and is active
-    module = db.query(Module).filter(Module.id == module_id, Module.is_active == True).first()
-    if not module:
+    selected = requested_fields(LessonResponse, fields)
+
+    def load():
+        # Verify module exists and is active
+        if not db.query(Module.id).filter(Module.id == module_id, Module.is_active == True).first():
+            return None
+        return fetch_dicts(db, select_for(LessonResponse, Lesson, selected).where(
+            Lesson.module_id == module_id,
+            Lesson.is_active == True
+        ).order_by(Lesson.order_index))
+
+    lessons = await curriculum_cache.aget_or_load(f"lessons:{module_id}:{selected}", load)
+    if lessons is None:
         raise HTTPException(status_code=404, detail="Module not found")
-        
-    lessons = db.query(Lesson).filter(
-        Lesson.module_id == module_id,
-        Lesson.is_active == True
-    ).order_by(Lesson.order_index).all()
-    return lessons
+    return ORJSONResponse(lessons)
 
 @router.get(
     "/modules/{module_id}/lessons/{lesson_id}",
@@ -119,17 +193,66 @@ async def get_lesson(
     Returns the lesson details if found, active, and belonging to the specified module.
     Otherwise, returns 404.
     """
-    # Verify module exists and is active
-    module = db.query(Module).filter(Module.id == module_id, Module.is_active == True).first()
+    module = await _cached_module(db, module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
-        
-    lesson = db.query(Lesson).filter(
+    lesson = next(
+        (
+            lesson
+            for lesson in module["lessons"]
+            if lesson["id"] == lesson_id and lesson["is_active"]
+        ),
+        None,
+    )
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    return ORJSONResponse(lesson)
+
+
+@router.get(
+    "/modules/{module_id}/lessons/{lesson_id}/bundle",
+    summary="Get a lesson bundle",
+    responses={
+        200: {"description": "Bundle with the lesson, its signs and media manifests"},
+        304: {"description": "Client's cached bundle is current"},
+        401: {"description": "Not authenticated"},
+        404: {"description": "Lesson or module not found or inactive"}
+    }
+)
+async def get_lesson_bundle(
+    module_id: int,
+    lesson_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Retrieve everything needed to open a lesson in a single request.
+
+    The bundle contains the module summary, the lesson with its full `content`,
+    every sign the content references and a manifest (size, hash, duration)
+    for each media URL involved.
+
+    Bundles are prebuilt and stored gzip-compressed; they are only rebuilt
+    after curriculum, dictionary or media content changes. Send the returned
+    `ETag` back in `If-None-Match` to get a 304 when nothing changed.
+    """
+    lesson = db.query(Lesson).join(Module).filter(
         Lesson.id == lesson_id,
         Lesson.module_id == module_id,
-        Lesson.is_active == True
+        Lesson.is_active == True,
+        Module.is_active == True
     ).first()
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    return lesson
 
+    bundle = await run_in_threadpool(get_bundle, db, lesson)
+    etag = f'"{bundle.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if negotiate(request.headers.get("accept-encoding", "")) == "gzip":
+        headers["Content-Encoding"] = "gzip"
+        return Response(bundle.payload, media_type="application/json", headers=headers)
+    return Response(decompress_payload(bundle), media_type="application/json", headers=headers)
@@ -1,61 +1,78 @@
 # routers/dictionary.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import content_version
+import favorites
+import localized
+import sign_details
+from compression import precompressed_json
 from database import get_db
-from models import SignEntry, User
-from schemas import SignEntryResponse
+from export import ExportFormat, stream_export
+from localized import SignLanguage
+from models import LocalizedSign, SignEntry, User
+from schemas import FavoritesPage, LocalizedSignResponse, SignEntryResponse, SignEntrySummary
+from serialization import ORJSONResponse, fetch_dicts, requested_fields, select_for
 from routers.users import get_current_user
 
 router = APIRouter()
 
+FIELDS_DESCRIPTION = (
+    "Comma-separated fields to return, e.g. `word,category` (`id` is always "
+    "included). Overrides `summary`."
+)
+SUMMARY_DESCRIPTION = (
+    "Return only `id`, `word`, `category` and `difficulty`, skipping the "
+    "JSON handshape/movement/variant/example data."
+)
+FAVORITES_DESCRIPTION = "Add an `is_favorite` flag to each sign for the current user"
+
+def _sign_fields(fields: Optional[str], summary: bool):
+    summary_fields = SignEntrySummary.model_fields if summary else None
+    return requested_fields(SignEntryResponse, fields, summary_fields)
+
 
 @router.get("/signs", response_model=List[SignEntryResponse])
 async def get_signs(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     category: Optional[str] = None,
     difficulty: Optional[int] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    summary: bool = Query(False, description=SUMMARY_DESCRIPTION),
+    include_favorites: bool = Query(False, description=FAVORITES_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = db.query(SignEntry)
+    """
+    List dictionary signs, optionally filtered by `category` and `difficulty`.
 
-    if category:
-        query = query.filter(SignEntry.category == category)
-    if difficulty:
-        query = query.filter(SignEntry.difficulty == difficulty)
+    Use `summary=true` or `fields=` for word lists: only the requested
+    columns are read from the database and returned.
+    """
+    selected = _sign_fields(fields, summary)
 
-    signs = query.offset(skip).limit(limit).all()
-    return signs
+    def build():
+        statement = select_for(SignEntryResponse, SignEntry, selected)
 
+        if category:
+            statement = statement.where(SignEntry.category == category)
+        if difficulty:
+            statement = statement.where(SignEntry.difficulty == difficulty)
 
-@router.get(
-    "/signs/{sign_id}",
-    response_model=SignEntryResponse,
-    summary="Get sign by ID",
-    responses={
-        200: {"description": "Sign found"},
-        401: {"description": "Not authenticated (optional for public access)"},
-        404: {"description": "Sign not found"},
-    },
-)
-async def get_sign(
-    sign_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """
-    Retrieve a specific sign by its unique ID.
+        return fetch_dicts(db, statement.offset(skip).limit(limit))
 
-    - `sign_id`: The unique identifier of the sign
+    if include_favorites:
+        # Per-user, so not served from the shared precompressed pages
+        return ORJSONResponse(favorites.annotate(db, current_user.id, build()))
 
-    Returns the complete sign details if found, otherwise 404.
-    """
-    sign = db.query(SignEntry).filter(SignEntry.id == sign_id).first()
-    if not sign:
-        raise HTTPException(status_code=404, detail="Sign not found")
-    return sign
+    # Pages are serialised and compressed once per dictionary version
+    key = f"signs:{skip}:{limit}:{category}:{difficulty}:{selected}"
+    return await precompressed_json(
+        request, db.connection(), key, [content_version.DICTIONARY], build
+    )
 
 
 @router.get(
@@ -70,6 +87,9 @@ async def get_sign(
 )
 async def search_signs(
     q: str = Query(..., description="Search query"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    summary: bool = Query(False, description=SUMMARY_DESCRIPTION),
+    include_favorites: bool = Query(False, description=FAVORITES_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -80,11 +100,90 @@ async def search_signs(
 
     Args:
         q: Search term to look for in words
+        fields: Only return these fields
+        summary: Only return the summary fields
+        include_favorites: Flag the current user's favorites
 
     Returns a list of matching signs.
     """
-    signs = db.query(SignEntry).filter(SignEntry.word.contains(q)).limit(50).all()
-    return signs
+    statement = select_for(SignEntryResponse, SignEntry, _sign_fields(fields, summary))
+    signs = fetch_dicts(db, statement.where(SignEntry.word.contains(q)).limit(50))
+    if include_favorites:
+        favorites.annotate(db, current_user.id, signs)
+    return ORJSONResponse(signs)
+
+
+@router.get(
+    "/languages/{language}/signs",
+    response_model=List[LocalizedSignResponse],
+    summary="List signs for one sign language",
+    responses={
+        200: {"description": "Signs with the language's variant merged in"},
+        401: {"description": "Not authenticated"},
+        422: {"description": "Unknown language"},
+    },
+)
+async def get_localized_signs(
+    language: SignLanguage,
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[str] = None,
+    difficulty: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    List dictionary signs as seen by learners of one sign language.
+
+    - `language`: `ASL` or `BSL` (see the user's `preferred_language`)
+
+    Each sign has the language's variant merged into it: variant data that
+    names a sign field overrides that field, the rest is returned as
+    `variant`. The other language's variant is not included. Signs are
+    served from a precomputed per-language view, ordered by id; after a bulk
+    import the view may lag the dictionary until its rebuild job has run.
+    """
+    if localized.is_stale(db.connection()):
+        localized.request_rebuild(db)
+
+    statement = select(LocalizedSign.payload).where(LocalizedSign.language == language.value)
+    if category:
+        statement = statement.where(LocalizedSign.category == category)
+    if difficulty:
+        statement = statement.where(LocalizedSign.difficulty == difficulty)
+    payloads = db.execute(
+        statement.order_by(LocalizedSign.sign_id).offset(skip).limit(limit)
+    ).scalars().all()
+    # Rows are already serialised; just join them into a JSON array
+    return Response(b"[" + b",".join(payloads) + b"]", media_type="application/json")
+
+
+@router.get(
+    "/signs/{sign_id}",
+    response_model=SignEntryResponse,
+    summary="Get sign by ID",
+    responses={
+        200: {"description": "Sign found"},
+        401: {"description": "Not authenticated (optional for public access)"},
+        404: {"description": "Sign not found"},
+    },
+)
+async def get_sign(
+    sign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Retrieve a specific sign by its unique ID.
+
+    - `sign_id`: The unique identifier of the sign
+
+    Returns the complete sign details if found, otherwise 404.
+    """
+    sign = await sign_details.get(db, sign_id)
+    if not sign:
+        raise HTTPException(status_code=404, detail="Sign not found")
+    return ORJSONResponse(sign)
 
 
 @router.post(
@@ -113,10 +212,96 @@ async def favorite_sign(
     or an error if the sign doesn't exist or is already in favorites.
     """
     # Verify sign exists
-    sign = db.query(SignEntry).filter(SignEntry.id == sign_id).first()
+    sign = await sign_details.get(db, sign_id)
     if not sign:
         raise HTTPException(status_code=404, detail="Sign not found")
 
-    # STUB: Implement add to favorites logic
-    # In a real implementation, this would add a record to a user_favorites join table
+    if not favorites.add(db, current_user.id, sign_id):
+        raise HTTPException(status_code=400, detail="Sign already in favorites")
     return {"message": "Added to favorites"}
+
+
+@router.delete(
+    "/signs/{sign_id}/favorite",
+    status_code=204,
+    summary="Remove sign from favorites",
+    responses={
+        204: {"description": "Sign removed from favorites"},
+        401: {"description": "Not authenticated"},
+        404: {"description": "Sign not in favorites"},
+    },
+)
+async def unfavorite_sign(
+    sign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Remove a sign from the current user's favorites.
+
+    Args:
+        sign_id: The ID of the sign to remove
+    """
+    if not favorites.remove(db, current_user.id, sign_id):
+        raise HTTPException(status_code=404, detail="Sign not in favorites")
+    return Response(status_code=204)
+
+
+@router.get(
+    "/favorites",
+    response_model=FavoritesPage,
+    summary="List favorite signs",
+    responses={
+        200: {"description": "One page of the user's favorite signs"},
+        400: {"description": "Unknown field requested"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def list_favorites(
+    after: int = Query(
+        0, description="Return favorites with a sign ID above this (the previous page's `next_after`)"
+    ),
+    limit: int = Query(50, ge=1, le=200),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    summary: bool = Query(False, description=SUMMARY_DESCRIPTION),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    List the current user's favorite signs, in sign ID order.
+
+    Pages are keyset-paginated: pass the returned `next_after` as `after` to
+    get the next page. `next_after` is null on the last page.
+    """
+    signs = favorites.page(db, current_user.id, after, limit, _sign_fields(fields, summary))
+    next_after = signs[-1]["id"] if len(signs) == limit else None
+    return ORJSONResponse({"items": signs, "next_after": next_after})
+
+
+@router.get(
+    "/export",
+    summary="Export the dictionary",
+    responses={
+        200: {"description": "Streamed NDJSON or CSV, one sign per line"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def export_signs(
+    format: ExportFormat = ExportFormat.ndjson,
+    category: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream every sign in the dictionary, optionally limited to one `category`.
+
+    - `format`: `ndjson` (one JSON object per line) or `csv`
+
+    Rows are streamed in id order straight from the database, so this works
+    with constant memory regardless of dictionary size. The CSV layout can be
+    fed back into `sign_import.py`.
+    """
+    columns = [SignEntry.__table__.c[name] for name in SignEntryResponse.model_fields]
+    statement = select(*columns).order_by(SignEntry.id)
+    if category:
+        statement = statement.where(SignEntry.category == category)
+    return stream_export(statement, format, "signs")
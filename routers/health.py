@@ -0,0 +1,117 @@
+# routers/health.py
+import asyncio
+import time
+
+from fastapi import APIRouter, Response, status
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from database import engine
+from loop_monitor import monitor
+from setttings import settings
+
+router = APIRouter()
+
+
+def _probe_database() -> float:
+    # Read a real table rather than `SELECT 1` so a lock on the SQLite file
+    # is noticed too.
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1 FROM users LIMIT 1"))
+    return time.perf_counter() - start
+
+
+def _pool_status() -> dict:
+    pool = engine.pool
+    size = pool.size() if hasattr(pool, "size") else 0
+    checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+    capacity = size + max(getattr(pool, "_max_overflow", 0), 0)
+    return {
+        "size": size,
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "utilisation": checked_out / capacity if capacity else 0.0,
+    }
+
+
+@router.get(
+    "/health",
+    summary="Liveness check",
+    responses={200: {"description": "The process is up and serving requests"}},
+)
+async def health_check():
+    """
+    Liveness probe. Answers without touching any dependency, so it only fails
+    when the worker itself is wedged. Use `/health/ready` for load balancing.
+    """
+    return {"status": "healthy", "service": "zonosign-api"}
+
+
+@router.get(
+    "/health/live",
+    summary="Liveness check",
+    responses={200: {"description": "The process is up and serving requests"}},
+)
+async def liveness():
+    """Alias of `/health` for orchestrators that expect a `/live` path."""
+    return await health_check()
+
+
+@router.get(
+    "/health/ready",
+    summary="Readiness check",
+    responses={
+        200: {"description": "Ready to take traffic"},
+        503: {"description": "Overloaded or a dependency is unavailable"},
+    },
+)
+async def readiness(response: Response):
+    """
+    Readiness probe. Reports not-ready (503) when any of these is over its
+    configured limit, so the load balancer sheds traffic from this worker
+    before its latency explodes:
+
+    - `database`: latency of a timed read, or a timeout/error
+    - `pool`: fraction of the connection pool checked out
+    - `event_loop`: most recent event-loop lag
+    - `requests`: requests currently in flight on this worker
+    """
+    checks = {}
+
+    try:
+        latency = await asyncio.wait_for(
+            run_in_threadpool(_probe_database),
+            timeout=settings.READINESS_DB_TIMEOUT_MS / 1000,
+        )
+        checks["database"] = {
+            "ok": latency * 1000 <= settings.READINESS_MAX_DB_LATENCY_MS,
+            "latency_ms": round(latency * 1000, 3),
+        }
+    except asyncio.TimeoutError:
+        checks["database"] = {"ok": False, "error": "timeout"}
+    except Exception as e:
+        checks["database"] = {"ok": False, "error": str(e)}
+
+    pool = _pool_status()
+    pool["ok"] = pool["utilisation"] < settings.READINESS_MAX_POOL_UTILISATION
+    checks["pool"] = pool
+
+    lag_ms = monitor.lag * 1000
+    checks["event_loop"] = {
+        "ok": lag_ms <= settings.READINESS_MAX_LOOP_LAG_MS,
+        "lag_ms": round(lag_ms, 3),
+    }
+
+    in_flight = int(metrics.HTTP_REQUESTS_IN_PROGRESS.value())
+    checks["requests"] = {
+        "ok": not settings.READINESS_MAX_IN_FLIGHT
+        or in_flight <= settings.READINESS_MAX_IN_FLIGHT,
+        "in_flight": in_flight,
+    }
+
+    ready = all(check["ok"] for check in checks.values())
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if ready else "not_ready", "checks": checks}
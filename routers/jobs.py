@@ -0,0 +1,44 @@
+# routers/jobs.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import Job, User
+from routers.users import get_current_user
+from schemas import JobResponse
+from serialization import ORJSONResponse, fetch_dicts, select_for
+
+router = APIRouter()
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobResponse,
+    summary="Get the status of a background job",
+    responses={
+        200: {"description": "Job status retrieved successfully"},
+        401: {"description": "Not authenticated"},
+        404: {"description": "Job not found"},
+    },
+)
+async def get_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Retrieve the status of a background job started by the current user.
+
+    - `job_id`: The ID returned by the endpoint that started the job
+
+    `status` is `queued` (waiting, or waiting to retry after a failure until
+    `run_at`), `running`, `succeeded` (with its `result`) or `failed` (after
+    `max_attempts`, with the last error).
+    """
+    rows = fetch_dicts(
+        db,
+        select_for(JobResponse, Job).where(Job.id == job_id, Job.user_id == current_user.id),
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return ORJSONResponse(rows[0])
@@ -0,0 +1,102 @@
+# routers/media.py
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from media import asset_metadata, resolve_media_path
+from setttings import settings
+
+router = APIRouter()
+
+
+class MediaFileResponse(FileResponse):
+    """
+    `FileResponse` that lets the server send whole files itself, with
+    sendfile, when it supports the ASGI `http.response.pathsend` extension.
+    Range requests still go through Starlette, which reads only the requested
+    bytes.
+    """
+
+    async def __call__(self, scope, receive, send):
+        extensions = scope.get("extensions") or {}
+        headers = dict(scope.get("headers") or [])
+        if "http.response.pathsend" not in extensions or b"range" in headers:
+            await super().__call__(scope, receive, send)
+            return
+
+        self.headers["content-length"] = str(self.stat_result.st_size)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope["method"].upper() != "HEAD":
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        else:
+            await send({"type": "http.response.body", "body": b""})
+
+
+RESPONSES = {
+    200: {"description": "The whole file"},
+    206: {"description": "The requested byte range"},
+    304: {"description": "Client copy is current (ETag matched)"},
+    404: {"description": "Media not found"},
+    416: {"description": "Requested range not satisfiable"},
+}
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def _serve(relative_path: str, request: Request):
+    path = resolve_media_path(relative_path)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    stat = path.stat()
+    metadata = await run_in_threadpool(asset_metadata, relative_path, stat)
+    headers = {"Cache-Control": f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"}
+    media_type = None
+    if metadata:
+        # Strong validator from the content hash; files that haven't been
+        # scanned yet fall back to Starlette's mtime/size-based ETag.
+        headers["ETag"] = f'"{metadata["sha256"]}"'
+        media_type = metadata["content_type"]
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        # Behind nginx: let it stream the file with sendfile (and handle Range)
+        # from an `internal` location mapped onto MEDIA_ROOT.
+        headers["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + relative_path
+        return Response(media_type=media_type, headers=headers)
+
+    return MediaFileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+
+@router.get("/videos/{path:path}", summary="Stream a video", responses=RESPONSES)
+async def get_video(path: str, request: Request):
+    """
+    Serve a sign or lesson video from local media storage.
+
+    Supports HTTP range requests (for seeking) and conditional requests via
+    the content-hash ETag.
+    """
+    return await _serve(f"videos/{path}", request)
+
+
+@router.get("/animations/{path:path}", summary="Fetch an animation", responses=RESPONSES)
+async def get_animation(path: str, request: Request):
+    """
+    Serve a sign animation (e.g. glTF) from local media storage.
+
+    Supports HTTP range requests and conditional requests via the
+    content-hash ETag.
+    """
+    return await _serve(f"animations/{path}", request)
@@ -1,10 +1,35 @@
 # routers/progress.py
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+import analytics
+import archive
+import gamification
+import recommendations
 from database import get_db
-from models import UserProgress, User
-from schemas import ProgressResponse
+from export import ExportFormat, stream_export
+from analytics import Granularity
+from gamification import LeaderboardPeriod
+from models import (
+    ArchivedPracticeSession,
+    Lesson,
+    Module,
+    PracticeSession,
+    User,
+    UserProgress,
+    UserStreak,
+)
+from schemas import (
+    LeaderboardPage,
+    PracticeAnalytics,
+    ProgressResponse,
+    Recommendations,
+    StreakResponse,
+)
+from serialization import ORJSONResponse, fetch_dicts, select_for
 from routers.users import get_current_user
 
 router = APIRouter()
@@ -67,10 +92,99 @@ async def get_module_progress(
 
     This provides granular progress tracking per module.
     """
-    progress = (
-        db.query(UserProgress).filter(UserProgress.user_id == current_user.id).all()
+    statement = select_for(ProgressResponse, UserProgress).where(
+        UserProgress.user_id == current_user.id
+    )
+    return ORJSONResponse(fetch_dicts(db, statement))
+
+
+@router.get(
+    "/recommendations",
+    response_model=Recommendations,
+    summary="Get recommended lessons and signs",
+    responses={
+        200: {"description": "Ranked next lessons and signs to practise"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def get_recommendations(
+    lessons: int = Query(5, ge=1, le=50),
+    signs: int = Query(20, ge=0, le=200),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Recommend what the user should study next.
+
+    - `lessons`: How many unfinished lessons to return, best first
+    - `signs`: How many dictionary signs to suggest for practice
+
+    Lessons are ranked by curriculum order from the first unfinished one,
+    how much they cover the sign categories the user's practice sessions
+    show they are weakest in, how close their difficulty is to the user's
+    level, and whether they are already in progress. Signs come from weak
+    categories at a suitable difficulty, excluding signs already in the
+    review deck.
+    """
+    catalog = recommendations.cached_catalog(db.connection())
+    if catalog is None:
+        catalog = await run_in_threadpool(recommendations.load_catalog)
+    return ORJSONResponse(recommendations.recommend(db, catalog, current_user.id, lessons, signs))
+
+
+@router.get(
+    "/export/progress",
+    summary="Export lesson progress history",
+    responses={
+        200: {"description": "Streamed NDJSON or CSV, one progress record per line"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def export_progress(
+    format: ExportFormat = ExportFormat.ndjson,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream all of the current user's lesson progress records.
+
+    - `format`: `ndjson` (one JSON object per line) or `csv`
+    """
+    columns = [UserProgress.__table__.c[name] for name in ProgressResponse.model_fields]
+    statement = (
+        select(*columns)
+        .where(UserProgress.user_id == current_user.id)
+        .order_by(UserProgress.id)
     )
-    return progress
+    return stream_export(statement, format, "progress")
+
+
+@router.get(
+    "/export/sessions",
+    summary="Export practice session history",
+    responses={
+        200: {"description": "Streamed NDJSON or CSV, one session per line"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def export_sessions(
+    format: ExportFormat = ExportFormat.ndjson,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream all of the current user's practice sessions, oldest first.
+
+    - `format`: `ndjson` (one JSON object per line) or `csv`
+
+    Each record carries the session type, lesson, timing, accuracy score and
+    raw `session_data`. Archived sessions are included, before the others.
+    """
+    statements = [
+        select(*(getattr(model, name) for name in archive.ARCHIVED_COLUMNS if name != "user_id"))
+        .where(model.user_id == current_user.id)
+        .order_by(model.id)
+        for model in (ArchivedPracticeSession, PracticeSession)
+    ]
+    return stream_export(statements, format, "sessions")
 
 
 @router.post(
@@ -99,10 +213,44 @@ async def start_lesson(
 
     Note: Only one lesson can be in progress at a time per user.
     """
-    # STUB: Implement lesson start logic
-    # 1. Verify lesson exists and is accessible
-    # 2. Check no other lesson is in progress
-    # 3. Create/update progress record with start time
+    lesson = db.execute(
+        select(Lesson.id, Lesson.module_id)
+        .join(Module, Module.id == Lesson.module_id)
+        .where(Lesson.id == lesson_id, Lesson.is_active == True, Module.is_active == True)
+    ).one_or_none()
+    if lesson is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+
+    in_progress = db.execute(
+        select(UserProgress.lesson_id).where(
+            UserProgress.user_id == current_user.id, UserProgress.status == "in_progress"
+        )
+    ).scalars().first()
+    if in_progress == lesson_id:
+        raise HTTPException(status_code=400, detail="Lesson already in progress")
+    if in_progress is not None:
+        raise HTTPException(
+            status_code=400, detail=f"Lesson {in_progress} is already in progress"
+        )
+
+    now = datetime.utcnow()
+    progress = db.execute(
+        select(UserProgress).where(
+            UserProgress.user_id == current_user.id, UserProgress.lesson_id == lesson_id
+        )
+    ).scalars().first()
+    if progress is None:
+        progress = UserProgress(
+            user_id=current_user.id, module_id=lesson.module_id, lesson_id=lesson_id
+        )
+        db.add(progress)
+    # Restarting a completed lesson keeps its last score until it's completed again
+    progress.status = "in_progress"
+    progress.progress_percentage = 0.0
+    progress.started_at = now
+    progress.completed_at = None
+    progress.last_accessed = now
+    db.commit()
     return {"message": "Lesson started", "lesson_id": lesson_id}
 
 
@@ -118,7 +266,7 @@ async def start_lesson(
 )
 async def complete_lesson(
     lesson_id: int,
-    score: float,
+    score: float = Query(..., ge=0.0, le=1.0),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -131,11 +279,159 @@ async def complete_lesson(
     Updates the progress record with completion status, score, and end time.
     Calculates time spent based on start time.
 
-    Returns the completion status and recorded score.
+    Completing a lesson awards leaderboard points (more for a higher score)
+    and counts towards the daily streak.
+
+    Returns the completion status, recorded score, points awarded and the
+    current streak.
+    """
+    if db.get(Lesson, lesson_id) is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    progress = db.execute(
+        select(UserProgress).where(
+            UserProgress.user_id == current_user.id,
+            UserProgress.lesson_id == lesson_id,
+            UserProgress.status == "in_progress",
+        )
+    ).scalars().first()
+    if progress is None:
+        raise HTTPException(status_code=400, detail="Lesson not started or already completed")
+
+    now = datetime.utcnow()
+    progress.status = "completed"
+    progress.progress_percentage = 100.0
+    progress.score = score
+    progress.completed_at = now
+    progress.last_accessed = now
+    if progress.started_at is not None:
+        minutes = round((now - progress.started_at).total_seconds() / 60)
+        progress.time_spent = (progress.time_spent or 0) + minutes
+
+    points = gamification.lesson_points(score)
+    streak = gamification.record_activity(db, current_user.id, points, now)
+    db.commit()
+    return {
+        "message": "Lesson completed",
+        "lesson_id": lesson_id,
+        "score": score,
+        "points": points,
+        "streak_days": streak.current_days,
+    }
+
+
+@router.get(
+    "/analytics",
+    response_model=PracticeAnalytics,
+    summary="Get practice analytics over time",
+    responses={
+        200: {"description": "Practice time and accuracy per day or week"},
+        400: {"description": "Invalid date range"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def get_practice_analytics(
+    granularity: Granularity = Granularity.day,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    session_type: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Chart the current user's practice over time.
+
+    - `granularity`: `day` or `week` (ISO weeks, starting Monday)
+    - `start`, `end`: Inclusive UTC dates; default to the last 30 days or
+      the last 12 weeks
+    - `session_type`: Only count sessions of this type
+
+    Each bucket has the number of finished sessions, total practice seconds
+    and mean accuracy; buckets without practice are included with zeros.
+    At most 366 buckets can be requested at once.
+    """
+    end = end or datetime.utcnow().date()
+    if start is None:
+        span = timedelta(weeks=11) if granularity is Granularity.week else timedelta(days=29)
+        start = end - span
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    step = 7 if granularity is Granularity.week else 1
+    buckets = (
+        analytics.bucket_start(granularity, end) - analytics.bucket_start(granularity, start)
+    ).days // step + 1
+    if buckets > analytics.MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range spans {buckets} buckets; at most {analytics.MAX_BUCKETS} allowed",
+        )
+    return ORJSONResponse(
+        analytics.series(db, current_user.id, granularity, start, end, session_type)
+    )
+
+
+@router.get(
+    "/leaderboard",
+    response_model=LeaderboardPage,
+    summary="Get the points leaderboard",
+    responses={
+        200: {"description": "One page of the leaderboard, highest points first"},
+        400: {"description": "Invalid cursor"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def get_leaderboard(
+    period: LeaderboardPeriod = LeaderboardPeriod.weekly,
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(
+        None, description="The previous page's `next_after`, to get the next page"
+    ),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Rank learners by the points earned in the current window.
+
+    - `period`: `daily` (today, UTC), `weekly` (this ISO week) or `all-time`
+    - `limit`: Entries per page
+    - `after`: Cursor from the previous page
+
+    Points come from completed lessons and finished practice sessions. Each
+    page is read straight off an index, so deep pages cost the same as the
+    first. `me` is the caller's own rank and points, if they have any in the
+    window.
     """
-    # STUB: Implement lesson completion logic
-    # 1. Verify lesson exists and is accessible
-    # 2. Check lesson is in progress for this user
-    # 3. Update progress record with completion status and score
-    # 4. Calculate time spent and update user's total learning time
-    return {"message": "Lesson completed", "lesson_id": lesson_id, "score": score}
+    key = gamification.window(period, datetime.utcnow().date())
+    items, next_after = gamification.top(db, key, limit, after)
+    return ORJSONResponse(
+        {
+            "period": period.value,
+            "window": key,
+            "items": items,
+            "next_after": next_after,
+            "me": gamification.standing(db, key, current_user.id),
+        }
+    )
+
+
+@router.get(
+    "/streak",
+    response_model=StreakResponse,
+    summary="Get the daily learning streak",
+    responses={
+        200: {"description": "Current and longest streak"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def get_streak(
+    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+):
+    """
+    Retrieve the current user's daily streak.
+
+    A day counts when the user completes a lesson or finishes a practice
+    session (UTC days). The streak stays alive until the end of the day after
+    the last active one.
+    """
+    return gamification.current_streak(
+        db.get(UserStreak, current_user.id), datetime.utcnow().date()
+    )
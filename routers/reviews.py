@@ -0,0 +1,91 @@
+# routers/reviews.py
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+import srs
+from database import get_db
+from models import User
+from routers.users import get_current_user
+from schemas import ReviewCard, ReviewCardsAdd, ReviewGradeBatch, ReviewGradeResult
+from serialization import ORJSONResponse
+
+router = APIRouter()
+
+
+@router.post(
+    "/cards",
+    status_code=201,
+    summary="Add signs to the review deck",
+    responses={
+        201: {"description": "Signs added (already present ones are skipped)"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def add_review_cards(
+    request: ReviewCardsAdd,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Add dictionary signs to the current user's spaced-repetition deck.
+
+    - `sign_ids`: Up to 1000 sign IDs; unknown IDs and signs already in the
+      deck are ignored
+
+    New cards are due immediately.
+    """
+    added = srs.add_cards(db, current_user.id, request.sign_ids)
+    return {"added": added}
+
+
+@router.get(
+    "/due",
+    response_model=List[ReviewCard],
+    summary="Get due reviews",
+    responses={
+        200: {"description": "Cards due for review, most overdue first"},
+        401: {"description": "Not authenticated"},
+    },
+)
+async def get_due_reviews(
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Retrieve the cards the current user should review now.
+
+    Returns up to `limit` cards whose due time has passed, most overdue first,
+    with the sign's word, category and video.
+    """
+    return ORJSONResponse(srs.due_cards(db, current_user.id, datetime.utcnow(), limit))
+
+
+@router.post(
+    "/grades",
+    response_model=List[ReviewGradeResult],
+    summary="Submit review grades",
+    responses={
+        200: {"description": "Cards rescheduled"},
+        401: {"description": "Not authenticated"},
+        422: {"description": "Grade outside 0-5"},
+    },
+)
+async def submit_review_grades(
+    batch: ReviewGradeBatch,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Grade a batch of reviewed cards and reschedule them (SM-2).
+
+    - `grades`: Up to 500 `{sign_id, grade}` pairs, with grade from 0 (no
+      recall) to 5 (perfect recall); grades below 3 restart the card
+
+    Returns each card's new due time. Cards not in the user's deck are skipped.
+    """
+    grades = {grade.sign_id: grade.grade for grade in batch.grades}
+    return ORJSONResponse(srs.grade_cards(db, current_user.id, grades, datetime.utcnow()))
@@ -1,11 +1,13 @@
 # routers/transcription.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 from database import get_db
 from models import PracticeSession, User
 from schemas import TranscriptionRequest
 from routers.users import get_current_user
+import jobs
+import rate_limit
 from datetime import datetime
 
 from setttings import settings
@@ -15,6 +17,7 @@ router = APIRouter()
 
 @router.post(
     "/start-session",
+    dependencies=[rate_limit.limit("transcription")],
     summary="Start a new transcription session",
     responses={
         200: {"description": "Session started successfully"},
@@ -53,12 +56,14 @@ async def start_transcription_session(
 
 @router.post(
     "/process-frame",
+    dependencies=[rate_limit.limit("transcription")],
     summary="Process a single video frame",
     responses={
         200: {"description": "Frame processed successfully"},
         400: {"description": "Invalid session ID or frame data"},
         401: {"description": "Not authenticated"},
         404: {"description": "Session not found"},
+        429: {"description": "Frame rate limit exceeded"},
     },
 )
 async def process_frame(
@@ -109,7 +114,33 @@ async def end_transcription_session(
 
     - `session_id`: The ID of the session to end
 
-    Returns a confirmation of session termination.
+    The session is closed immediately. Finalising it (awarding leaderboard
+    points for the time practised, scaled by accuracy when the session has
+    one, and counting it towards the daily streak) runs as a background job;
+    poll `/v1/jobs/{job_id}` for the points awarded.
+
+    Returns a confirmation of session termination and the finalisation job ID.
     """
-    # STUB: Implement session cleanup and final processing
-    return {"message": "Session ended", "session_id": session_id}
+    if not session_id.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid session ID")
+    session = db.get(PracticeSession, int(session_id))
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if session.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to end this session")
+    if session.end_time is not None:
+        raise HTTPException(status_code=400, detail="Session already ended")
+
+    now = datetime.utcnow()
+    session.end_time = now
+    session.duration = int((now - session.start_time).total_seconds())
+    job_id = jobs.enqueue(
+        db, "finalise_session", {"session_id": session.id}, user_id=current_user.id
+    )
+    db.commit()
+    return {
+        "message": "Session ended",
+        "session_id": session_id,
+        "duration": session.duration,
+        "job_id": job_id,
+    }
@@ -1,27 +1,51 @@
 # routers/users.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+import cache
 from database import get_db
 from models import User
 from schemas import UserResponse
 from auth_utils import verify_token
+from setttings import settings
 
 router = APIRouter()
 security = HTTPBearer()
 
+# The user row by email, minus the password hash (loaded on access when needed)
+CACHED_USER_COLUMNS = [column for column in User.__table__.c if column.name != "hashed_password"]
+current_users = cache.Cache("current_user", settings.CURRENT_USER_CACHE_USERS)
+cache.invalidate_on(
+    User,
+    current_users,
+    # The old address too, if this write changed it
+    lambda user: [user.email, *inspect(user).attrs.email.history.deleted],
+)
+
+
+def _load_user(db: Session, email: str):
+    row = db.execute(select(*CACHED_USER_COLUMNS).where(User.email == email)).mappings().first()
+    return dict(row) if row is not None else None
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
 ):
     token_data = verify_token(credentials.credentials)
-    user = db.query(User).filter(User.email == token_data.email).first()
-    if user is None:
+    columns = await current_users.aget_or_load(
+        token_data.email, lambda: _load_user(db, token_data.email)
+    )
+    if columns is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
         )
-    return user
+    # Attach a copy to this request's session without a query; writes to it
+    # are flushed as usual and invalidate the cached row
+    user = User(**columns)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
 
 
 @router.get(
@@ -1,7 +1,7 @@
 # schemas.py
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, Field, validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 
 # User schemas
 class UserBase(BaseModel):
@@ -35,9 +35,16 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     expires_in: int
+    refresh_token: Optional[str] = None
+    refresh_expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    jti: Optional[str] = None
+    exp: Optional[int] = None
 
 # Profile schemas
 class UserProfileBase(BaseModel):
@@ -114,6 +121,46 @@ class SignEntryResponse(SignEntryBase):
     class Config:
         from_attributes = True
 
+class SignEntrySummary(BaseModel):
+    """The fields returned by the dictionary's `summary=true` list mode."""
+    id: int
+    word: str
+    category: Optional[str] = None
+    difficulty: int = 1
+
+class LocalizedSignResponse(SignEntryBase):
+    """A sign with one language's variant merged in (see `localized.py`)."""
+    id: int
+    language: str
+    handshapes: Optional[Dict[str, Any]] = None
+    movement_pattern: Optional[Dict[str, Any]] = None
+    location: Optional[str] = None
+    palm_orientation: Optional[str] = None
+    facial_expression: Optional[str] = None
+    usage_examples: Optional[List[str]] = None
+    video_url: Optional[str] = None
+    animation_url: Optional[str] = None
+    created_at: datetime
+    variant: Optional[Dict[str, Any]] = None  # variant data with no base field
+
+class FavoritesPage(BaseModel):
+    items: List[SignEntryResponse]
+    next_after: Optional[int] = None  # pass as `after` for the next page
+
+class SignEntryImport(SignEntryBase):
+    """One row of a bulk dictionary import; upserted by `word` + `category`."""
+    category: str
+    handshapes: Optional[Dict[str, Any]] = None
+    movement_pattern: Optional[Dict[str, Any]] = None
+    location: Optional[str] = None
+    palm_orientation: Optional[str] = None
+    facial_expression: Optional[str] = None
+    asl_variant: Optional[Dict[str, Any]] = None
+    bsl_variant: Optional[Dict[str, Any]] = None
+    usage_examples: Optional[List[str]] = None
+    video_url: Optional[str] = None
+    animation_url: Optional[str] = None
+
 # Progress schemas
 class ProgressBase(BaseModel):
     status: str = "not_started"
@@ -133,6 +180,100 @@ class ProgressResponse(ProgressBase):
     class Config:
         from_attributes = True
 
+# Review (spaced repetition) schemas
+class ReviewCardsAdd(BaseModel):
+    sign_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class ReviewCard(BaseModel):
+    sign_id: int
+    word: str
+    category: Optional[str] = None
+    video_url: Optional[str] = None
+    due_at: datetime
+    interval_days: int
+    repetitions: int
+    ease_factor: float
+
+class ReviewGrade(BaseModel):
+    sign_id: int
+    grade: int = Field(..., ge=0, le=5)  # SM-2 quality: 0 blackout .. 5 perfect
+
+class ReviewGradeBatch(BaseModel):
+    grades: List[ReviewGrade] = Field(..., min_length=1, max_length=500)
+
+class ReviewGradeResult(BaseModel):
+    sign_id: int
+    due_at: datetime
+    interval_days: int
+
+# Recommendation schemas
+class LessonRecommendation(BaseModel):
+    lesson_id: int
+    module_id: int
+    title: str
+    score: float
+
+class SignRecommendation(BaseModel):
+    id: int
+    word: str
+    category: Optional[str] = None
+    difficulty: Optional[int] = None
+    score: float
+
+class Recommendations(BaseModel):
+    lessons: List[LessonRecommendation]
+    signs: List[SignRecommendation]
+
+# Gamification schemas
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: str
+    points: int
+
+class LeaderboardPage(BaseModel):
+    period: str
+    window: str  # the window shown, e.g. week:2025-W05
+    items: List[LeaderboardEntry]
+    next_after: Optional[str] = None  # pass as `after` for the next page
+    me: Optional[LeaderboardEntry] = None  # the caller, if they have points in the window
+
+class StreakResponse(BaseModel):
+    current_days: int
+    longest_days: int
+    last_active_date: Optional[date] = None
+    active_today: bool
+
+# Analytics schemas
+class AnalyticsTotals(BaseModel):
+    sessions: int
+    practice_seconds: int
+    accuracy: Optional[float] = None  # mean over sessions with a score
+
+class AnalyticsBucket(AnalyticsTotals):
+    bucket_start: date
+
+class PracticeAnalytics(BaseModel):
+    granularity: str
+    start: date
+    end: date
+    session_type: Optional[str] = None
+    buckets: List[AnalyticsBucket]  # one per day/week in range, empty ones included
+    totals: AnalyticsTotals
+
+# Job schemas
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: str  # queued, running, succeeded, failed
+    attempts: int
+    max_attempts: int
+    run_at: datetime  # earliest next attempt while queued
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
 # Transcription schemas
 class TranscriptionRequest(BaseModel):
     session_type: str
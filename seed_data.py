@@ -1,6 +1,43 @@
 # seed_data.py
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+import analytics
+import content_version
+import gamification
+from auth_utils import get_password_hash
 from database import SessionLocal, engine
-from models import Base, Module, Lesson, SignEntry
+from models import (
+    Base,
+    Module,
+    Lesson,
+    SignEntry,
+    User,
+    UserProfile,
+    UserProgress,
+    PracticeSession,
+)
+
+SYNTHETIC_PASSWORD = "synthetic-password"
+SIGN_CATEGORIES = [
+    "greetings",
+    "courtesy",
+    "family",
+    "food",
+    "numbers",
+    "colors",
+    "animals",
+    "emotions",
+    "time",
+    "places",
+    "actions",
+    "questions",
+]
+HANDSHAPES = ["open_hand", "flat_hand", "fist", "index", "v_shape", "claw", "c_shape"]
+LOCATIONS = ["head_level", "chin_level", "chest_level", "neutral_space", "waist_level"]
 
 
 def create_sample_data():
@@ -105,5 +142,226 @@ def create_sample_data():
         db.close()
 
 
+def _insert_chunked(db, model, rows, chunk_size=5000):
+    for start in range(0, len(rows), chunk_size):
+        db.execute(insert(model), rows[start : start + chunk_size])
+
+
+def create_synthetic_data(
+    users=100,
+    signs=100_000,
+    modules=12,
+    lessons_per_module=8,
+    sessions_per_user=50,
+    seed=42,
+):
+    """
+    Generate a reproducible dataset of arbitrary size for benchmarking.
+
+    The same `seed` always produces the same rows. Every synthetic user has
+    the password `SYNTHETIC_PASSWORD` (hashed once and shared, so generating
+    thousands of users doesn't cost thousands of bcrypt rounds) and an email
+    of the form `user{n}@example.com`.
+    """
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+
+    try:
+        _insert_chunked(
+            db,
+            Module,
+            [
+                {
+                    "id": m,
+                    "name": f"Module {m}",
+                    "description": f"Synthetic module {m}",
+                    "order_index": m,
+                    "difficulty_level": 1 + (m - 1) * 5 // modules,
+                    "estimated_duration": rng.randint(60, 300),
+                    "is_active": True,
+                    "created_at": now,
+                }
+                for m in range(1, modules + 1)
+            ],
+        )
+
+        lessons = []
+        for m in range(1, modules + 1):
+            for i in range(1, lessons_per_module + 1):
+                duration = rng.randint(10, 60)
+                references = [rng.randint(1, max(signs, 1)) for _ in range(5)]
+                if len(lessons) % 4 == 3:
+                    # Content may also name signs by word, including ones
+                    # that don't exist
+                    references = [f"word_{n}" for n in references] + ["no-such-sign"]
+                lessons.append(
+                    {
+                        "id": len(lessons) + 1,
+                        "module_id": m,
+                        "title": f"Lesson {m}.{i}",
+                        "description": f"Synthetic lesson {i} of module {m}",
+                        "order_index": i,
+                        "estimated_duration": duration,
+                        "content": {
+                            "type": "video",
+                            "url": f"/videos/lesson{len(lessons) + 1}.mp4",
+                            "signs": references,
+                        },
+                        "is_active": True,
+                        "created_at": now,
+                    }
+                )
+        _insert_chunked(db, Lesson, lessons)
+
+        _insert_chunked(
+            db,
+            SignEntry,
+            [
+                {
+                    "id": n,
+                    "word": f"word_{n}",
+                    "category": rng.choice(SIGN_CATEGORIES),
+                    "difficulty": rng.randint(1, 5),
+                    "description": f"Synthetic sign number {n}",
+                    "handshapes": {
+                        "dominant": rng.choice(HANDSHAPES),
+                        "non_dominant": rng.choice(HANDSHAPES + [None]),
+                    },
+                    "movement_pattern": {
+                        "type": rng.choice(["wave", "tap", "circle", "forward"]),
+                        "repetitions": rng.randint(1, 3),
+                    },
+                    "location": rng.choice(LOCATIONS),
+                    "palm_orientation": rng.choice(["up", "down", "forward", "in"]),
+                    "facial_expression": rng.choice([None, "raised_brows", "neutral"]),
+                    "asl_variant": {"handshape": rng.choice(HANDSHAPES)},
+                    "bsl_variant": {"handshape": rng.choice(HANDSHAPES)},
+                    "usage_examples": [f"Example sentence with word_{n}."],
+                    "video_url": f"/videos/signs/{n}.mp4",
+                    "animation_url": f"/animations/signs/{n}.glb",
+                    "created_at": now,
+                }
+                for n in range(1, signs + 1)
+            ],
+        )
+
+        hashed_password = get_password_hash(SYNTHETIC_PASSWORD)
+        _insert_chunked(
+            db,
+            User,
+            [
+                {
+                    "id": u,
+                    "email": f"user{u}@example.com",
+                    "username": f"user{u}",
+                    "hashed_password": hashed_password,
+                    "full_name": f"Synthetic User {u}",
+                    "is_active": True,
+                    "is_verified": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for u in range(1, users + 1)
+            ],
+        )
+        _insert_chunked(
+            db,
+            UserProfile,
+            [
+                {"user_id": u, "preferred_language": rng.choice(["ASL", "BSL"])}
+                for u in range(1, users + 1)
+            ],
+        )
+
+        progress = []
+        sessions = []
+        for u in range(1, users + 1):
+            for lesson in lessons[: rng.randint(0, len(lessons))]:
+                started = now - timedelta(days=rng.randint(1, 365))
+                completed = rng.random() < 0.8
+                progress.append(
+                    {
+                        "user_id": u,
+                        "module_id": lesson["module_id"],
+                        "lesson_id": lesson["id"],
+                        "status": "completed" if completed else "in_progress",
+                        "progress_percentage": 100.0 if completed else rng.uniform(0, 99),
+                        "score": rng.uniform(0.4, 1.0) if completed else None,
+                        "time_spent": rng.randint(5, 90),
+                        "started_at": started,
+                        "completed_at": started + timedelta(hours=1) if completed else None,
+                        "last_accessed": started + timedelta(hours=1),
+                    }
+                )
+            for _ in range(sessions_per_user):
+                start = now - timedelta(minutes=rng.randint(1, 525_600))
+                duration = rng.randint(30, 1800)
+                session_type = rng.choice(["transcription", "practice", "assessment"])
+                lesson_id = rng.choice(lessons)["id"] if lessons else None
+                accuracy = rng.uniform(0.3, 1.0)
+                sessions.append(
+                    {
+                        "user_id": u,
+                        "session_type": session_type,
+                        "lesson_id": lesson_id,
+                        "start_time": start,
+                        "end_time": start + timedelta(seconds=duration),
+                        "duration": duration,
+                        "accuracy_score": accuracy,
+                        # Seeded as already finalised, so the rollups count them
+                        "session_data": {
+                            "language": rng.choice(["ASL", "BSL"]),
+                            "points": gamification.session_points(duration, accuracy),
+                        },
+                    }
+                )
+        _insert_chunked(db, UserProgress, progress)
+        _insert_chunked(db, PracticeSession, sessions)
+        analytics.rebuild(db.connection())
+        content_version.bump(
+            db.connection(), [content_version.CURRICULUM, content_version.DICTIONARY]
+        )
+
+        db.commit()
+        print(
+            f"Synthetic data created: {users} users, {signs} signs, "
+            f"{modules} modules, {len(lessons)} lessons, "
+            f"{len(progress)} progress records, {len(sessions)} practice sessions"
+        )
+
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
-    create_sample_data()
+    parser = argparse.ArgumentParser(description="Seed the ZonoSign database")
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="Generate a large reproducible dataset instead of the sample data",
+    )
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--signs", type=int, default=100_000)
+    parser.add_argument("--modules", type=int, default=12)
+    parser.add_argument("--lessons-per-module", type=int, default=8)
+    parser.add_argument("--sessions-per-user", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        create_synthetic_data(
+            users=args.users,
+            signs=args.signs,
+            modules=args.modules,
+            lessons_per_module=args.lessons_per_module,
+            sessions_per_user=args.sessions_per_user,
+            seed=args.seed,
+        )
+    else:
+        create_sample_data()
@@ -0,0 +1,77 @@
+# serialization.py
+"""
+Fast JSON path for read-heavy list endpoints.
+
+Instead of loading full ORM objects, validating each one into a Pydantic
+`from_attributes` model and running the result through `jsonable_encoder`,
+these endpoints select exactly the columns their response schema declares
+(in the schema's field order) and encode the plain row dicts with orjson.
+The JSON produced is identical to the Pydantic path; see
+`benchmarks/serialization.py`, which checks that and measures the per-row
+cost of both.
+
+The endpoints keep their `response_model` so the OpenAPI schema is
+unchanged; returning a `Response` directly skips FastAPI's validation step.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Type
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse  # noqa: F401  (re-exported for routers)
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+
+def requested_fields(
+    schema: Type[BaseModel],
+    fields: Optional[str],
+    summary_fields: Optional[Iterable[str]] = None,
+) -> Optional[List[str]]:
+    """
+    Resolve a `fields=word,category` query parameter against `schema`.
+
+    Returns the requested field names in schema order, always including `id`,
+    or `summary_fields` when given and no `fields` were requested, or None
+    for "all fields". Unknown names are a 400.
+    """
+    if not fields:
+        return list(summary_fields) if summary_fields is not None else None
+
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(names - schema.model_fields.keys())
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    names.add("id")
+    return [name for name in schema.model_fields if name in names]
+
+
+def columns_for(
+    schema: Type[BaseModel], model, fields: Optional[Iterable[str]] = None
+) -> list:
+    """The table columns backing `schema`'s fields (or `fields`), in field order."""
+    table = model.__table__
+    names = schema.model_fields if fields is None else fields
+    return [table.c[name] for name in names if name in table.c]
+
+
+def select_for(schema: Type[BaseModel], model, fields: Optional[Iterable[str]] = None):
+    return select(*columns_for(schema, model, fields))
+
+
+def fetch_dicts(db: Session, statement) -> List[dict]:
+    return [dict(row) for row in db.execute(statement).mappings()]
+
+
+def group_by(rows: List[dict], key: str) -> Dict[object, List[dict]]:
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row[key]].append(row)
+    return groups
+
+
+def dumps(data) -> bytes:
+    return orjson.dumps(data)
@@ -8,6 +8,102 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    DATABASE_URL: str = "sqlite:///./zonosign.db"
+
+    # Server
+    HOST: str = "0.0.0.0"
+    PORT: int = 8024
+    WORKERS: int = 1  # 0 means one worker per CPU core
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30  # seconds to drain in-flight requests
+    WARM_UP_ON_STARTUP: bool = True
+
+    # Password hashing runs on its own thread pool so it never blocks the loop
+    BCRYPT_WORKERS: int = 4
+    # Hashing requests waiting beyond this are refused with 503 instead of queued
+    BCRYPT_MAX_QUEUE: int = 32
+
+    # Sign videos, animations and lesson media, served under /videos and /animations
+    MEDIA_ROOT: str = "./media"
+    MEDIA_CACHE_MAX_AGE: int = 86400  # seconds
+    # e.g. "/internal-media/" to hand file transfer to nginx via X-Accel-Redirect
+    MEDIA_ACCEL_REDIRECT_PREFIX: str = ""
+
+    # Responses smaller than this (bytes) are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    # Serialised + compressed curriculum/dictionary listings kept per worker
+    PRECOMPRESSED_CACHE_ENTRIES: int = 256
+
+    # Token-bucket rate limits per client IP and per user, as "count/period"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORE: str = "rate_limit.MemoryStore"  # import path of the bucket store
+    RATE_LIMIT_AUTH: str = "10/minute"  # login, register, password reset
+    RATE_LIMIT_TRANSCRIPTION: str = "60/second"  # frame processing
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # key on X-Forwarded-For behind a proxy
+    # Requests handled at once per worker before new ones get a 503 (0 disables)
+    MAX_IN_FLIGHT_REQUESTS: int = 512
+
+    # Rotating refresh tokens; trading one for a new access token needs no bcrypt
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # How often each worker's background sync pulls tokens revoked by other
+    # workers (seconds)
+    REVOCATION_SYNC_INTERVAL: float = 5.0
+
+    # Read-through caches (cache.py). Per-worker entries live CACHE_LOCAL_TTL
+    # seconds, which bounds how long another worker's write can go unseen.
+    # CACHE_SHARED_BACKEND is the import path of a cache.CacheBackend shared
+    # by all workers (e.g. "cache.SQLiteBackend"); empty for per-worker only.
+    CACHE_LOCAL_TTL: float = 30.0
+    CACHE_SHARED_BACKEND: str = ""
+    CACHE_SHARED_PATH: str = "./cache.sqlite3"  # for cache.SQLiteBackend
+    CACHE_SHARED_TTL: int = 300
+    CURRENT_USER_CACHE_USERS: int = 10000
+    CURRICULUM_CACHE_ENTRIES: int = 2000
+    SIGN_CACHE_ENTRIES: int = 20000
+
+    # Per-worker cache of each user's favorite sign IDs
+    FAVORITES_CACHE_TTL: int = 30  # seconds; bounds staleness across workers
+    FAVORITES_CACHE_USERS: int = 10000
+
+    # Per-user recommendation features are folded forward incrementally and
+    # rebuilt from scratch this often, to pick up anything a watermark missed
+    RECOMMENDATION_REBUILD_HOURS: int = 24
+
+    # Background jobs (jobs.py), run by every API worker
+    JOBS_ENABLED: bool = True
+    JOB_CONCURRENCY: int = 4  # jobs run at once per worker
+    JOB_POLL_INTERVAL: float = 1.0  # seconds; jobs enqueued in-process start at once
+    JOB_LEASE_SECONDS: int = 600  # renewed while a job runs; retried once it lapses
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_BACKOFF_SECONDS: float = 2.0  # first retry delay; doubles per attempt
+    JOB_BACKOFF_MAX_SECONDS: float = 600.0
+    JOB_RETENTION_DAYS: int = 7  # finished jobs are deleted after this
+
+    # Completed practice sessions older than this move to the compressed
+    # archive table (archive.py), in batches of SESSION_ARCHIVE_BATCH_SIZE
+    SESSION_ARCHIVE_AFTER_DAYS: int = 180
+    SESSION_ARCHIVE_BATCH_SIZE: int = 1000
+
+    # Password reset links (delivered by a background job)
+    PASSWORD_RESET_URL: str = "http://localhost:3000/reset-password"
+    PASSWORD_RESET_EXPIRE_MINUTES: int = 60
+
+    # Opt-in SQL profiling: Server-Timing headers and N+1 warnings per request
+    QUERY_PROFILING: bool = False
+    QUERY_PROFILING_REPEAT_THRESHOLD: int = 3
+
+    # Event-loop lag sampling and blocking-call watchdog
+    LOOP_LAG_INTERVAL_MS: int = 100
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_BLOCK_THRESHOLD_MS: int = 250  # log the loop's stack past this stall
+
+    # Readiness: /health/ready returns 503 when any limit is exceeded
+    READINESS_DB_TIMEOUT_MS: int = 1000
+    READINESS_MAX_DB_LATENCY_MS: int = 250
+    READINESS_MAX_LOOP_LAG_MS: int = 200
+    READINESS_MAX_POOL_UTILISATION: float = 0.9
+    READINESS_MAX_IN_FLIGHT: int = 256  # 0 disables the check
+
     @property
     def TZ(self):
         return datetime.UTC
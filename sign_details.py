@@ -0,0 +1,35 @@
+# sign_details.py
+"""
+Full sign details by ID, cached as response dicts.
+
+Entries are keyed on the dictionary content version as well as the sign ID.
+Every dictionary write bumps that version, whether it goes through the ORM
+(`content_version`'s flush listener) or not (`sign_import` bumps it per
+chunk), so the next lookup in any worker misses and reloads the sign.
+Entries for older versions are never read again and age out of the LRU.
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+import cache
+import content_version
+from models import SignEntry
+from schemas import SignEntryResponse
+from serialization import fetch_dicts, select_for
+from setttings import settings
+
+sign_cache = cache.Cache("signs", settings.SIGN_CACHE_ENTRIES, shared=True)
+
+
+def load_sign(db: Session, sign_id: int) -> Optional[dict]:
+    signs = fetch_dicts(db, select_for(SignEntryResponse, SignEntry).where(SignEntry.id == sign_id))
+    return signs[0] if signs else None
+
+
+async def get(db: Session, sign_id: int) -> Optional[dict]:
+    """The sign's response dict, or None if there is no such sign."""
+    version = content_version.version_key(db.connection(), [content_version.DICTIONARY])
+    return await sign_cache.aget_or_load(
+        f"{sign_id}@{version}", lambda: load_sign(db, sign_id)
+    )
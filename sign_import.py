@@ -0,0 +1,200 @@
+# sign_import.py
+"""
+Streaming bulk import of sign dictionary entries from CSV or JSONL.
+
+Rows are read lazily, validated against `SignEntryImport` in chunks and
+written with one multi-row upsert (keyed on `word` + `category`) per chunk,
+each chunk in its own transaction. Memory use is bounded by the chunk size
+rather than the file size.
+
+The per-language views in `localized_signs` are rebuilt once at the end.
+The upserts bypass the ORM, so each chunk bumps the dictionary content
+version itself; that is what invalidates derived data, including the cached
+sign details in running API workers (`sign_details`).
+
+For large imports the secondary indexes on `sign_entries` are dropped before
+loading and rebuilt once at the end, which is much cheaper than maintaining
+them row by row.
+
+Usage:
+    python sign_import.py signs.jsonl
+    python sign_import.py signs.csv --chunk-size 5000 --keep-indexes
+"""
+import argparse
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+
+import content_version
+import localized
+from database import engine
+from models import Base, SignEntry
+from schemas import SignEntryImport
+
+IMPORT_COLUMNS = list(SignEntryImport.model_fields)
+JSON_COLUMNS = {
+    "handshapes",
+    "movement_pattern",
+    "asl_variant",
+    "bsl_variant",
+    "usage_examples",
+}
+NATURAL_KEY = ["word", "category"]
+
+# A row as read from the file, or the reason it couldn't be parsed
+Row = Union[dict, json.JSONDecodeError]
+
+
+def _read_jsonl(path: Path) -> Iterator[Tuple[int, Row]]:
+    with path.open(encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, e
+
+
+def _read_csv(path: Path) -> Iterator[Tuple[int, Row]]:
+    # JSON columns are stored as JSON text in their CSV cells
+    with path.open(encoding="utf-8", newline="") as f:
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                for column in JSON_COLUMNS & row.keys():
+                    row[column] = json.loads(row[column]) if row[column] else None
+            except json.JSONDecodeError as e:
+                yield line_number, e
+                continue
+            yield line_number, {k: v for k, v in row.items() if v != ""}
+
+
+def read_rows(path: Path, format: Optional[str] = None) -> Iterator[Tuple[int, Row]]:
+    format = format or path.suffix.lstrip(".").lower()
+    if format in ("jsonl", "ndjson"):
+        return _read_jsonl(path)
+    if format == "csv":
+        return _read_csv(path)
+    raise ValueError(f"Unsupported import format: {format!r}")
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _upsert_statement():
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(engine.dialect.name)
+    if dialect is None:
+        raise RuntimeError(f"Bulk upsert is not supported on {engine.dialect.name}")
+    stmt = dialect.insert(SignEntry)
+    return stmt.on_conflict_do_update(
+        index_elements=NATURAL_KEY,
+        set_={
+            column: stmt.excluded[column]
+            for column in IMPORT_COLUMNS
+            if column not in NATURAL_KEY
+        },
+    )
+
+
+def _secondary_indexes():
+    return [index for index in SignEntry.__table__.indexes if not index.unique]
+
+
+def import_signs(
+    rows: Iterable[Tuple[int, Row]],
+    chunk_size: int = 2000,
+    rebuild_indexes: bool = True,
+    progress: bool = False,
+) -> Dict[str, object]:
+    """
+    Validate and upsert `(line_number, row)` pairs into `sign_entries`.
+
+    Invalid rows are skipped and reported; they never abort the import.
+    Returns a report with row counts, errors, elapsed time and rows/second.
+    """
+    Base.metadata.create_all(bind=engine)
+    # Tables created before the natural-key index existed won't have it
+    unique_key = next(i for i in SignEntry.__table__.indexes if i.unique)
+    unique_key.create(bind=engine, checkfirst=True)
+
+    if rebuild_indexes:
+        for index in _secondary_indexes():
+            index.drop(bind=engine, checkfirst=True)
+
+    upsert = _upsert_statement()
+    imported = 0
+    errors: List[dict] = []
+    start = time.perf_counter()
+
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            valid = []
+            for line_number, row in chunk:
+                if isinstance(row, json.JSONDecodeError):
+                    errors.append({"line": line_number, "error": f"Invalid JSON: {row}"})
+                    continue
+                try:
+                    valid.append(SignEntryImport.model_validate(row).model_dump())
+                except ValidationError as e:
+                    errors.append({"line": line_number, "error": str(e)})
+            if valid:
+                with engine.begin() as conn:
+                    conn.execute(upsert, valid)
+                    content_version.bump(conn, [content_version.DICTIONARY])
+                imported += len(valid)
+            if progress:
+                elapsed = time.perf_counter() - start
+                print(f"{imported} rows imported ({imported / elapsed:.0f} rows/s)")
+    finally:
+        if rebuild_indexes:
+            for index in _secondary_indexes():
+                index.create(bind=engine, checkfirst=True)
+            with engine.begin() as conn:
+                conn.execute(text("ANALYZE sign_entries"))
+        if imported:
+            with engine.begin() as conn:
+                localized.rebuild(conn)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "imported": imported,
+        "rejected": len(errors),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "rows_per_s": imported / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import sign dictionary entries")
+    parser.add_argument("path", type=Path, help="CSV or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from extension")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument(
+        "--keep-indexes",
+        action="store_true",
+        help="maintain secondary indexes during the load instead of rebuilding them",
+    )
+    args = parser.parse_args()
+
+    report = import_signs(
+        read_rows(args.path, args.format),
+        chunk_size=args.chunk_size,
+        rebuild_indexes=not args.keep_indexes,
+        progress=True,
+    )
+    for error in report["errors"][:20]:
+        print(f"line {error['line']}: {error['error']}")
+    print(
+        f"Imported {report['imported']} rows, rejected {report['rejected']}, "
+        f"in {report['elapsed_s']:.2f}s ({report['rows_per_s']:.0f} rows/s)"
+    )
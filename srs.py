@@ -0,0 +1,144 @@
+# srs.py
+"""
+Spaced-repetition scheduling of dictionary signs (SM-2).
+
+Each (user, sign) card in `review_states` carries its SM-2 state and the
+time it is next due. The due queue is answered by a range scan of the
+`(user_id, due_at)` index, so its cost depends on the page size rather than
+on how many cards the user has. Grades are applied in batches: one query
+loads every graded card and one executemany writes them back.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import ReviewState, SignEntry
+
+MIN_EASE = 1.3
+PASSING_GRADE = 3
+SCHEDULED_COLUMNS = (
+    "ease_factor",
+    "interval_days",
+    "repetitions",
+    "lapses",
+    "due_at",
+    "last_reviewed_at",
+)
+
+
+def schedule(state: Dict, grade: int, now: datetime) -> Dict:
+    """
+    Apply one SM-2 review with quality `grade` (0-5) to `state`.
+
+    `state` holds `ease_factor`, `interval_days`, `repetitions` and `lapses`;
+    returns the new values plus `due_at` and `last_reviewed_at`.
+    """
+    ease = state["ease_factor"]
+    repetitions = state["repetitions"]
+    lapses = state["lapses"]
+
+    if grade < PASSING_GRADE:
+        repetitions, interval, lapses = 0, 1, lapses + 1
+    else:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = round(state["interval_days"] * ease)
+        repetitions += 1
+
+    ease = max(MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    return {
+        "ease_factor": ease,
+        "interval_days": interval,
+        "repetitions": repetitions,
+        "lapses": lapses,
+        "due_at": now + timedelta(days=interval),
+        "last_reviewed_at": now,
+    }
+
+
+def add_cards(db: Session, user_id: int, sign_ids: Iterable[int]) -> int:
+    """Add signs to the user's deck, due now; existing cards are left alone."""
+    existing = set(
+        db.execute(select(SignEntry.id).where(SignEntry.id.in_(set(sign_ids)))).scalars()
+    )
+    if not existing:
+        return 0
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}[db.get_bind().dialect.name]
+    now = datetime.utcnow()
+    result = db.connection().execute(
+        dialect.insert(ReviewState).on_conflict_do_nothing(
+            index_elements=["user_id", "sign_id"]
+        ),
+        [{"user_id": user_id, "sign_id": sign_id, "due_at": now} for sign_id in existing],
+    )
+    db.commit()
+    return result.rowcount
+
+
+def due_statement(user_id: int, now: datetime, limit: int):
+    """SELECT for the user's cards due at `now`, most overdue first."""
+    return (
+        select(
+            ReviewState.sign_id,
+            SignEntry.word,
+            SignEntry.category,
+            SignEntry.video_url,
+            ReviewState.due_at,
+            ReviewState.interval_days,
+            ReviewState.repetitions,
+            ReviewState.ease_factor,
+        )
+        .join(SignEntry, SignEntry.id == ReviewState.sign_id)
+        .where(ReviewState.user_id == user_id, ReviewState.due_at <= now)
+        .order_by(ReviewState.due_at)
+        .limit(limit)
+    )
+
+
+def due_cards(db: Session, user_id: int, now: datetime, limit: int) -> List[dict]:
+    """The user's cards due at `now`, most overdue first."""
+    return [dict(row) for row in db.execute(due_statement(user_id, now, limit)).mappings()]
+
+
+def grade_cards(db: Session, user_id: int, grades: Dict[int, int], now: datetime) -> List[dict]:
+    """
+    Apply `{sign_id: grade}` to the user's cards in one read and one write.
+
+    Signs that aren't in the user's deck are skipped.
+    """
+    states = db.execute(
+        select(
+            ReviewState.sign_id,
+            ReviewState.ease_factor,
+            ReviewState.interval_days,
+            ReviewState.repetitions,
+            ReviewState.lapses,
+        ).where(ReviewState.user_id == user_id, ReviewState.sign_id.in_(grades))
+    ).mappings()
+
+    updates = [
+        {"sign_id": state["sign_id"], **schedule(state, grades[state["sign_id"]], now)}
+        for state in states
+    ]
+    if updates:
+        # Bind names can't collide with the columns being SET
+        db.connection().execute(
+            update(ReviewState)
+            .where(
+                ReviewState.user_id == user_id,
+                ReviewState.sign_id == bindparam("b_sign_id"),
+            )
+            .values({column: bindparam(f"b_{column}") for column in SCHEDULED_COLUMNS}),
+            [{f"b_{key}": value for key, value in row.items()} for row in updates],
+        )
+    db.commit()
+    return [
+        {"sign_id": u["sign_id"], "due_at": u["due_at"], "interval_days": u["interval_days"]}
+        for u in updates
+    ]
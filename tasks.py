@@ -0,0 +1,123 @@
+# tasks.py
+"""
+Background job handlers and schedules (see `jobs.py`).
+
+Importing this module registers them; `main` does so at startup.
+"""
+import logging
+from datetime import datetime
+from urllib.parse import urlencode
+
+from sqlalchemy.orm import Session
+
+import analytics
+import archive
+import bundles
+import gamification
+import jobs
+import localized
+import refresh_tokens
+from auth_utils import create_password_reset_token
+from models import PracticeSession, User
+from setttings import settings
+
+mail_logger = logging.getLogger("zonosign.mail")
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+
+
+def send_email(to: str, subject: str, body: str):
+    # No mail provider is configured yet; delivery is a log line. Raising
+    # here (e.g. a provider timeout) makes the job retry with backoff.
+    mail_logger.info("Email to %s: %s\n%s", to, subject, body)
+
+
+@jobs.task("send_password_reset", max_attempts=5, concurrency=2)
+def send_password_reset(db: Session, payload: dict):
+    user = db.query(User).filter(User.email == payload["email"]).first()
+    if user is None or not user.is_active:
+        # Same response either way, so the endpoint doesn't reveal accounts
+        return {"sent": False}
+    token = create_password_reset_token(user.email, user.hashed_password)
+    link = f"{settings.PASSWORD_RESET_URL}?{urlencode({'token': token})}"
+    send_email(
+        user.email,
+        "Reset your ZonoSign password",
+        f"Use this link within {settings.PASSWORD_RESET_EXPIRE_MINUTES} minutes "
+        f"to choose a new password:\n{link}",
+    )
+    return {"sent": True}
+
+
+@jobs.task("send_password_changed", max_attempts=5, concurrency=2)
+def send_password_changed(db: Session, payload: dict):
+    user = db.get(User, payload["user_id"])
+    if user is None:
+        return {"sent": False}
+    send_email(
+        user.email,
+        "Your ZonoSign password was changed",
+        "If this wasn't you, reset your password now and contact support.",
+    )
+    return {"sent": True}
+
+
+@jobs.task("finalise_session", concurrency=4)
+def finalise_session(db: Session, payload: dict):
+    session = db.get(PracticeSession, payload["session_id"])
+    if session is None:
+        return {"points": 0}  # archived before the job ran; nothing left to award
+    data = dict(session.session_data or {})
+    if "points" in data:
+        return {"points": data["points"]}  # a retry after the commit below
+    points = gamification.session_points(session.duration, session.accuracy_score)
+    streak = gamification.record_activity(db, session.user_id, points, session.end_time)
+    analytics.record_session(db, session)
+    # Recorded in the same transaction, so a rerun can't award twice
+    session.session_data = {**data, "points": points}
+    db.commit()
+    return {"points": points, "streak_days": streak.current_days}
+
+
+@jobs.task("rebuild_lesson_bundles")
+def rebuild_lesson_bundles(db: Session, payload: dict):
+    return {"rebuilt": bundles.rebuild_stale_bundles(db)}
+
+
+@jobs.task("rebuild_localized_signs")
+def rebuild_localized_signs(db: Session, payload: dict):
+    stale = localized.is_stale(db.connection())
+    if stale:
+        localized.ensure_fresh()
+    return {"rebuilt": stale}
+
+
+@jobs.task("prune_expired_tokens")
+def prune_expired_tokens(db: Session, payload: dict):
+    return {"refresh_tokens": refresh_tokens.prune_expired(db)}
+
+
+@jobs.task("prune_leaderboards")
+def prune_leaderboards(db: Session, payload: dict):
+    return {"windows": gamification.prune(db, datetime.utcnow().date())}
+
+
+@jobs.task("archive_sessions")
+def archive_sessions(db: Session, payload: dict):
+    return {"archived": archive.archive_sessions(db)}
+
+
+@jobs.task("prune_jobs")
+def prune_jobs(db: Session, payload: dict):
+    return {"jobs": jobs.prune(db)}
+
+
+# Derived tables are also refreshed on demand when a request finds them
+# stale; rebuilding them here means requests rarely have to.
+jobs.periodic("rebuild_lesson_bundles", every=5 * MINUTE)
+jobs.periodic("rebuild_localized_signs", every=MINUTE)
+jobs.periodic("prune_expired_tokens", every=HOUR)
+jobs.periodic("prune_leaderboards", every=HOUR)
+jobs.periodic("prune_jobs", every=HOUR)
+jobs.periodic("archive_sessions", every=24 * HOUR)